@@ -0,0 +1,42 @@
+# backend/app/api/health_endpoint.py
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.instrumentation import process_info
+from app.services.model_registry import model_registry
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Health"],
+)
+
+@router.get("/live", summary="Liveness: o processo está respondendo")
+def live():
+    """Responde 200 assim que a API sobe, mesmo com os modelos ainda carregando."""
+    return {"status": "alive"}
+
+@router.get(
+    "/ready",
+    responses={503: {"description": "Artefatos ainda carregando ou com falha."}},
+    summary="Readiness: artefatos de ML carregados (e aquecidos)"
+)
+def ready():
+    """
+    200 quando os artefatos da versão ativa estão carregados e aquecidos; 503 caso
+    contrário. `process` identifica o processo que respondeu (no modo prefork, um
+    dos workers), com a memória atual e o tempo de subida.
+    """
+    prediction_service = model_registry.active
+    body = {
+        "model_version": prediction_service.version,
+        "status": prediction_service.status,
+        "artifacts_load_seconds": prediction_service.load_seconds,
+        "warm_up_seconds": prediction_service.warm_up_seconds,
+        "process": process_info.describe(),
+    }
+    if prediction_service.ready:
+        return body
+    if prediction_service.load_error is not None:
+        body["error"] = str(prediction_service.load_error)
+    return JSONResponse(status_code=503, content=body)
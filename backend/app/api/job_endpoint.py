@@ -0,0 +1,74 @@
+# backend/app/api/job_endpoint.py
+
+import logging
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Response
+
+from app.models.prediction_schema import AnalysisResult, JobStatus
+from app.services.job_service import job_manager, JobNotFoundError
+from app.api.prediction_endpoint import validate_extension
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/predict/jobs",
+    tags=["Jobs"],
+)
+
+def get_job_or_404(job_id: str) -> dict:
+    try:
+        return job_manager.store.get(job_id)
+    except JobNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado (inexistente ou expirado)."
+        )
+
+@router.post(
+    "",
+    response_model=JobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Cria um job de análise para um arquivo CSV, XLSX, Parquet ou Arrow IPC"
+)
+def create_job(file: UploadFile = File(..., description="Arquivo CSV, XLSX, Parquet ou Arrow IPC com dados.")):
+    """
+    Grava o arquivo e enfileira a análise, retornando o id do job imediatamente.
+    Acompanhe em `GET /predict/jobs/{job_id}` e busque o AnalysisResult em
+    `GET /predict/jobs/{job_id}/result`.
+    """
+    file_extension = validate_extension(file)
+    job = job_manager.submit(file.filename, file_extension, file.file)
+    logger.info(f"Job {job['job_id']} criado para '{file.filename}'.")
+    return job
+
+@router.get("/{job_id}", response_model=JobStatus, summary="Status e progresso de um job")
+def get_job(job_id: str):
+    """Status do job e progresso de cada etapa da pipeline."""
+    return get_job_or_404(job_id)
+
+@router.get(
+    "/{job_id}/result",
+    response_model=AnalysisResult,
+    responses={409: {"description": "Job ainda em execução ou com falha."}},
+    summary="Resultado (AnalysisResult) de um job concluído"
+)
+def get_job_result(job_id: str):
+    """Retorna o AnalysisResult gravado pelo job (o mesmo de `/predict/upload-csv`)."""
+    job = get_job_or_404(job_id)
+    if job['status'] == 'failed':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"O job falhou: {job['error']}"
+        )
+    if job['status'] != 'succeeded':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"O job ainda não terminou (status: {job['status']})."
+        )
+    try:
+        content = job_manager.store.result_path(job_id).read_bytes()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Resultado não encontrado (expirado)."
+        )
+    return Response(content=content, media_type="application/json")
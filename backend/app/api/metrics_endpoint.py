@@ -0,0 +1,21 @@
+# backend/app/api/metrics_endpoint.py
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.instrumentation import metrics, process_info
+
+router = APIRouter(tags=["Metrics"])
+
+# Content-Type do formato de exposição em texto do Prometheus (o charset é incluído pela resposta)
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4"
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Métricas da pipeline (formato Prometheus)")
+def prometheus_metrics():
+    """
+    Histogramas por etapa da pipeline (rótulo `stage`): duração em segundos,
+    linhas processadas e variação da memória residente do processo, em bytes.
+    Mais a memória atual do processo (rss, pss, private, shared) e, nos workers
+    prefork, o tempo de subida. Cada worker responde pelas próprias métricas.
+    """
+    return PlainTextResponse(metrics.render() + process_info.render(), media_type=PROMETHEUS_MEDIA_TYPE)
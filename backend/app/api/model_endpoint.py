@@ -0,0 +1,65 @@
+# backend/app/api/model_endpoint.py
+
+import logging
+from fastapi import APIRouter, HTTPException, status, Query
+
+from app.services.instrumentation import process_info
+from app.services.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/models",
+    tags=["Models"],
+)
+
+@router.get("", summary="Versões de modelos disponíveis e a versão ativa")
+def list_models():
+    """Versão ativa (status e fingerprint), troca em andamento e versões disponíveis."""
+    return model_registry.describe()
+
+@router.get("/features", summary="Features derivadas calculadas e puladas pela versão ativa")
+def feature_report():
+    """Relatório da poda de features (settings.PRUNE_UNUSED_FEATURES) da versão ativa."""
+    service = model_registry.active
+    if not service.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Os artefatos de ML ainda estão carregando. Tente novamente em instantes."
+        )
+    return {"model_version": service.version, **service.feature_report()}
+
+@router.post(
+    "/{version}/activate",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        404: {"description": "Versão inexistente."},
+        409: {"description": "Outra versão ainda está sendo carregada, ou o servidor roda em modo prefork."},
+    },
+    summary="Ativa outra versão de modelos sem reiniciar a API"
+)
+def activate_model(
+    version: str,
+    warm_up: bool = Query(True, description="Executa o warm-up da nova versão antes da troca.")
+):
+    """
+    Carrega a versão em segundo plano e a torna ativa quando estiver pronta.
+    Requisições em andamento terminam na versão anterior; acompanhe a troca em `GET /models`.
+    Recusada no modo prefork: a troca valeria só para o worker que recebeu a requisição.
+    """
+    if process_info.mode == "prefork":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="No modo prefork a versão não pode ser trocada em execução: defina settings.ML_MODEL_VERSION (ou versions/ACTIVE) e reinicie o servidor."
+        )
+    try:
+        model_registry.activate(version, warm_up=warm_up)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Versão de modelos '{version}' não encontrada."
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    logger.info(f"Ativação da versão de modelos '{version}' iniciada.")
+    return model_registry.describe()
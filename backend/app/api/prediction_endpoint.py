@@ -2,16 +2,27 @@
 
 import pandas as pd
 import io
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+import hashlib
+from fastapi import APIRouter, UploadFile, File, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 import logging # Importa o módulo de logging
+from typing import Iterator, List, Optional
+
+from app.core.config import settings
 
 # Importa o schema de resposta
-from app.models.prediction_schema import AnalysisResult
-# Importa a instância do serviço de predição
-from app.services.prediction_service import prediction_service
+from app.models.prediction_schema import AnalysisResult, RowScoringRequest, RowScoringResult
+# Importa o registro de versões dos modelos (serviço de predição ativo)
+from app.services.model_registry import model_registry
+from app.services.prediction_service import PredictionService
+from app.services import columnar_export, ndjson_stream, response_projection, upload_reader
+from app.services.ndjson_stream import NDJSON_MEDIA_TYPE
+from app.services.pipeline_executor import pipeline_executor, ExecutorBusyError, ExecutionTiming
+from app.services.result_cache import result_cache
+from app.services.row_batcher import row_batcher
 
-# Configura um logger básico (opcional, mas bom para logs)
-logging.basicConfig(level=logging.INFO)
+# Configura um logger básico (nível em settings.LOG_LEVEL)
+logging.basicConfig(level=settings.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(
@@ -19,78 +30,434 @@ router = APIRouter(
     tags=["Predictions"],
 )
 
+def validate_extension(file: UploadFile) -> str:
+    """Valida o formato do arquivo (CSV, XLSX, Parquet ou Arrow IPC) e retorna a extensão."""
+    file_extension = file.filename.split('.')[-1].lower()
+    extensions = upload_reader.supported_extensions()
+    if file_extension not in extensions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato de arquivo inválido. Por favor, envie um arquivo {', '.join('.' + ext for ext in extensions)}"
+        )
+    return file_extension
+
+async def read_upload(file: UploadFile, file_extension: str) -> pd.DataFrame:
+    """
+    Lê o arquivo enviado (ver `upload_reader.read_dataframe`) e converte as
+    colunas de tipo conhecido. Lança EmptyDataError se não houver dados.
+    """
+    logger.info(f"Recebido arquivo: {file.filename}")
+    contents = await file.read()
+    return upload_reader.read_dataframe(io.BytesIO(contents), file_extension)
+
+def iter_upload_chunks(file: UploadFile, file_extension: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Lê o arquivo enviado em blocos de `chunk_rows` linhas (ver `upload_reader`)."""
+    logger.info(f"Recebido arquivo: {file.filename} (blocos de {chunk_rows} linhas)")
+    file.file.seek(0)
+    return upload_reader.iter_dataframe_chunks(file.file, file_extension, chunk_rows)
+
+async def hash_upload(file: UploadFile) -> str:
+    """SHA-256 dos bytes enviados, lidos em blocos; o arquivo volta ao início."""
+    digest = hashlib.sha256()
+    await file.seek(0)
+    while True:
+        block = await file.read(1024 * 1024)
+        if not block:
+            break
+        digest.update(block)
+    await file.seek(0)
+    return digest.hexdigest()
+
+def resolve_projection(fields: Optional[str]) -> response_projection.Projection:
+    """Projeção de `original_data` pedida em `fields` (ver `response_projection`); 400 se inválida."""
+    try:
+        return response_projection.parse_projection(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+def resolve_chunk_rows(chunk_rows: Optional[int]) -> Optional[int]:
+    """Tamanho de bloco da requisição ou, na falta dele, o configurado em `settings`."""
+    return chunk_rows or settings.PIPELINE_CHUNK_ROWS
+
+def chunked_variant(variant: str, chunk_rows: Optional[int]) -> str:
+    """Variante do cache com o tamanho de bloco: o resultado em blocos não serve o do arquivo inteiro."""
+    return f"{variant}:chunks={chunk_rows}" if chunk_rows else variant
+
+def empty_file_error(file: UploadFile) -> HTTPException:
+    logger.error(f"Erro ao processar '{file.filename}': Arquivo vazio.")
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Arquivo enviado está vazio ou não pôde ser lido."
+    )
+
+def too_large_error(file: UploadFile, e: upload_reader.UploadTooLargeError) -> HTTPException:
+    logger.warning(f"Recusando '{file.filename}': {e}")
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=str(e)
+    )
+
+def busy_error(file: UploadFile, e: ExecutorBusyError) -> HTTPException:
+    logger.warning(f"Fila da pipeline cheia; recusando '{file.filename}'.")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado processando outras análises. Tente novamente em instantes.",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def ensure_service_ready(service: PredictionService) -> None:
+    """Recusa com 503 enquanto os artefatos de ML ainda estão carregando (ou falharam)."""
+    if service.ready:
+        return
+    service.start_loading()
+    if service.status == "failed":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Falha ao carregar os artefatos de ML: {service.load_error}"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Os artefatos de ML ainda estão carregando. Tente novamente em instantes.",
+        headers={"Retry-After": str(settings.PIPELINE_RETRY_AFTER_SECONDS)}
+    )
+
+def timing_headers(timing: ExecutionTiming, service: PredictionService) -> dict:
+    """Tempo de fila e de execução da pipeline (Server-Timing) e a versão dos modelos usada."""
+    return {"Server-Timing": timing.server_timing(), "X-Model-Version": service.version}
+
+def log_timing(message: str, timing: ExecutionTiming) -> None:
+    logger.info(f"{message} (fila: {timing.queue_wait * 1000:.0f} ms, execução: {timing.execution * 1000:.0f} ms)")
+
+def unexpected_error(file: UploadFile, e: Exception) -> HTTPException:
+    logger.error(f"Erro inesperado durante o processamento de '{file.filename}': {e}", exc_info=True) 
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=f"Ocorreu um erro interno ao processar o arquivo: {str(e)}"
+    )
+
 @router.post(
     "/upload-csv",
     response_model=AnalysisResult,
+    responses={
+        200: {"description": "AnalysisResult (format=rows) ou ColumnarAnalysisResult (format=columnar)."},
+        413: {"description": "Planilha XLSX com mais linhas que settings.XLSX_MAX_ROWS."},
+        503: {"description": "Fila da pipeline cheia; tente novamente após o cabeçalho Retry-After."},
+    },
     summary="Realiza predição em um arquivo CSV"
 )
 
-async def upload_and_predict(file: UploadFile = File(..., description="Arquivo CSV ou XLSX com dados.")):
+async def upload_and_predict(
+    file: UploadFile = File(..., description="Arquivo CSV, XLSX, Parquet ou Arrow IPC com dados."),
+    response_format: str = Query(
+        "rows",
+        alias="format",
+        pattern="^(rows|columnar)$",
+        description="'rows' (padrão, uma linha por jogador) ou 'columnar' (listas por coluna, ver ColumnarAnalysisResult)."
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Colunas de original_data: 'all' (padrão), 'none', o preset 'dashboard' ou uma lista separada por vírgulas."
+    ),
+    chunk_rows: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Processa o arquivo em blocos deste número de linhas (limita a memória; mesmo resultado). Padrão: settings.PIPELINE_CHUNK_ROWS."
+    )
+):
     """
-    Recebe um arquivo CSV ou XLSX, executa a pipeline de ML e retorna um JSON com os
+    Recebe um arquivo CSV, XLSX, Parquet ou Arrow IPC, executa a pipeline de ML e retorna um JSON com os
     dados originais mais as colunas de predição.
+    Com `format=columnar`, a resposta é serializada direto das colunas NumPy,
+    sem um objeto por linha. Com `chunk_rows`, o arquivo é processado em blocos.
+    Com `fields`, `original_data` (ou as colunas extras do formato colunar) traz
+    só as colunas pedidas; as demais nem são convertidas.
     """
-    # 1. Validação do formato do arquivo (CSV ou XLSX)
-    file_extension = file.filename.split('.')[-1].lower()
-    if file_extension not in ['csv', 'xlsx']:
+    # 1. Validação do formato do arquivo (CSV, XLSX, Parquet ou Arrow IPC)
+    file_extension = validate_extension(file)
+    chunk_rows = resolve_chunk_rows(chunk_rows)
+    projection = resolve_projection(fields)
+
+    # A requisição inteira usa a versão ativa neste momento, mesmo que outra seja ativada no meio
+    service = model_registry.active
+
+    try:
+        # Recusa cedo, antes de ler o arquivo, se os modelos não estiverem prontos
+        ensure_service_ready(service)
+
+        # Uploads repetidos (mesmos bytes, mesmos artefatos) são servidos do cache
+        cache_key = None
+        if result_cache.enabled:
+            variant = chunked_variant(response_projection.cache_variant(response_format, projection), chunk_rows)
+            cache_key = result_cache.make_key(await hash_upload(file), variant, service.output_fingerprint)
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Resultado de '{file.filename}' servido do cache.")
+                return Response(content=cached, media_type="application/json", headers={"X-Cache": "HIT", "X-Model-Version": service.version})
+
+        # Recusa cedo também se a fila estiver cheia
+        pipeline_executor.check_capacity()
+
+        if chunk_rows:
+            # Os blocos são lidos do upload sob demanda: roda em thread do servidor
+            chunks = iter_upload_chunks(file, file_extension, chunk_rows)
+            logger.info("Enviando blocos para o serviço de predição...")
+            if response_format == "columnar":
+                content, timing = await pipeline_executor.run_local(service.execute_prediction_pipeline_columnar_chunked, chunks, projection)
+            else:
+                content, timing = await pipeline_executor.run_local(service.execute_prediction_pipeline_chunked_json, chunks, projection)
+            log_timing("Predição em blocos concluída com sucesso.", timing)
+        else:
+            # 2. Ler o conteúdo do arquivo
+            df = await read_upload(file, file_extension)
+
+            # 3. Chamar o serviço de predição (fora do event loop)
+            logger.info("Enviando DataFrame para o serviço de predição...")
+            if response_format == "columnar":
+                content, timing = await pipeline_executor.run_service(service, 'execute_prediction_pipeline_columnar', df, projection)
+            else:
+                content, timing = await pipeline_executor.run_service(service, 'execute_prediction_pipeline_json', df, projection)
+            log_timing("Predição concluída com sucesso.", timing)
+
+        if cache_key is not None:
+            result_cache.put(cache_key, content)
+
+        # 4. Retornar os resultados (JSON já serializado no worker)
+        return Response(content=content, media_type="application/json", headers={**timing_headers(timing, service), "X-Cache": "MISS"})
+
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        raise busy_error(file, e)
+    except pd.errors.EmptyDataError:
+        raise empty_file_error(file)
+    except upload_reader.UploadTooLargeError as e:
+        raise too_large_error(file, e)
+    except Exception as e:
+        raise unexpected_error(file, e)
+
+@router.post(
+    "/upload-csv/stream",
+    response_class=StreamingResponse,
+    responses={200: {
+        "content": {NDJSON_MEDIA_TYPE: {}},
+        "description": "Uma PredictionRow por linha (NDJSON) seguida de um registro final {\"summary\": AnalysisSummary}."
+    }, 413: {"description": "Planilha XLSX com mais linhas que settings.XLSX_MAX_ROWS."},
+    503: {"description": "Fila da pipeline cheia; tente novamente após o cabeçalho Retry-After."}},
+    summary="Realiza predição em um arquivo CSV com resposta em streaming (NDJSON)"
+)
+async def upload_and_predict_stream(
+    file: UploadFile = File(..., description="Arquivo CSV, XLSX, Parquet ou Arrow IPC com dados."),
+    fields: Optional[str] = Query(
+        None,
+        description="Colunas de original_data: 'all' (padrão), 'none', o preset 'dashboard' ou uma lista separada por vírgulas."
+    ),
+    chunk_rows: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Linhas por bloco (limita a memória; mesmo resultado). Padrão: settings.PIPELINE_CHUNK_ROWS ou, sem ele, settings.STREAM_CHUNK_ROWS."
+    )
+):
+    """
+    Igual a `/upload-csv`, mas envia cada linha de predição como um objeto JSON
+    separado por quebra de linha. O arquivo é sempre processado em blocos de
+    `chunk_rows` linhas e cada bloco é enviado assim que é predito; o R² e o
+    heatmap vêm no último registro (`{"summary": {...}}`). Sem estatísticas de
+    referência (settings.USE_REFERENCE_STATS), as passadas de estatística
+    (medianas, categorias e médias por cluster do arquivo inteiro) ainda leem
+    todos os blocos antes da primeira linha. `fields` funciona como em `/upload-csv`.
+    """
+    file_extension = validate_extension(file)
+    chunk_rows = resolve_chunk_rows(chunk_rows) or settings.STREAM_CHUNK_ROWS
+    projection = resolve_projection(fields)
+
+    service = model_registry.active
+
+    try:
+        ensure_service_ready(service)
+        pipeline_executor.check_capacity()
+
+        # As passadas de estatística rodam antes do envio, para que erros virem HTTP 4xx/5xx.
+        # A engenharia final e a predição de cada bloco acontecem durante o envio, também
+        # nas threads do executor (que fica com uma vaga ocupada até o fim do envio).
+        run = service.run_pipeline_chunked(iter_upload_chunks(file, file_extension, chunk_rows))
+        run, timing = await pipeline_executor.run_local(run.prepare)
+        log_timing("Estatísticas calculadas; iniciando envio NDJSON por bloco.", timing)
+        records = pipeline_executor.iter_local(ndjson_stream.iter_chunked_records(run, projection=projection))
+        return StreamingResponse(records, media_type=NDJSON_MEDIA_TYPE, headers=timing_headers(timing, service))
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        raise busy_error(file, e)
+    except pd.errors.EmptyDataError:
+        raise empty_file_error(file)
+    except upload_reader.UploadTooLargeError as e:
+        raise too_large_error(file, e)
+    except Exception as e:
+        raise unexpected_error(file, e)
+
+@router.post(
+    "/export",
+    response_class=Response,
+    responses={
+        200: {
+            "content": {media_type: {} for media_type, _ in columnar_export.EXPORT_FORMATS.values()},
+            "description": "Predições, codigo_acesso e as features escolhidas em um arquivo Parquet ou Arrow IPC."
+        },
+        400: {"description": "Formato/compressão inválidos ou features inexistentes."},
+        413: {"description": "Planilha XLSX com mais linhas que settings.XLSX_MAX_ROWS."},
+        501: {"description": "pyarrow não instalado no servidor."},
+        503: {"description": "Fila da pipeline cheia; tente novamente após o cabeçalho Retry-After."},
+    },
+    summary="Exporta as predições de um arquivo em Parquet ou Arrow IPC"
+)
+async def export_predictions(
+    file: UploadFile = File(..., description="Arquivo CSV, XLSX, Parquet ou Arrow IPC com dados."),
+    export_format: str = Query(
+        "parquet",
+        alias="format",
+        pattern="^(parquet|arrow)$",
+        description="'parquet' (padrão) ou 'arrow' (Arrow IPC, formato de arquivo/Feather v2)."
+    ),
+    compression: str = Query(
+        "none",
+        description="Compressão: 'none' (padrão), 'snappy', 'gzip', 'zstd', 'lz4' ou 'brotli' no Parquet; 'none', 'lz4' ou 'zstd' no Arrow."
+    ),
+    features: Optional[List[str]] = Query(
+        None,
+        description="Features da pipeline a incluir (repita o parâmetro). Padrão: as features dos modelos de target."
+    ),
+    chunk_rows: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Processa o arquivo em blocos deste número de linhas (limita a memória; mesmo resultado). Padrão: settings.PIPELINE_CHUNK_ROWS."
+    )
+):
+    """
+    Executa a pipeline como `/upload-csv` e devolve um arquivo colunar com as
+    predições, `codigo_acesso` e as features escolhidas, gravado direto das colunas
+    de `df_pipeline` (sem `original_data` nem objetos por linha). Pensado para
+    cargas de BI, que leem o arquivo com pyarrow, pandas, DuckDB, Spark etc.
+    """
+    file_extension = validate_extension(file)
+    chunk_rows = resolve_chunk_rows(chunk_rows)
+    try:
+        columnar_export.check_export_options(export_format, compression)
+    except columnar_export.ExportUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    media_type, file_suffix = columnar_export.EXPORT_FORMATS[export_format]
+    export_headers = {"Content-Disposition": f'attachment; filename="predicoes.{file_suffix}"'}
+
+    service = model_registry.active
+
+    try:
+        ensure_service_ready(service)
+
+        cache_key = None
+        if result_cache.enabled:
+            variant = chunked_variant(f"export:{export_format}:{compression}:{','.join(features or [])}", chunk_rows)
+            cache_key = result_cache.make_key(await hash_upload(file), variant, service.output_fingerprint)
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Exportação de '{file.filename}' servida do cache.")
+                return Response(content=cached, media_type=media_type, headers={**export_headers, "X-Cache": "HIT", "X-Model-Version": service.version})
+
+        pipeline_executor.check_capacity()
+
+        if chunk_rows:
+            chunks = iter_upload_chunks(file, file_extension, chunk_rows)
+            content, timing = await pipeline_executor.run_local(
+                service.execute_prediction_export_chunked, chunks, export_format, compression, features
+            )
+        else:
+            df = await read_upload(file, file_extension)
+            content, timing = await pipeline_executor.run_service(
+                service, 'execute_prediction_export', df, export_format, compression, features
+            )
+        log_timing(f"Exportação {export_format} concluída com sucesso ({len(content)} bytes).", timing)
+
+        if cache_key is not None:
+            result_cache.put(cache_key, content)
+
+        return Response(content=content, media_type=media_type, headers={**export_headers, **timing_headers(timing, service), "X-Cache": "MISS"})
+
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        raise busy_error(file, e)
+    except pd.errors.EmptyDataError:
+        raise empty_file_error(file)
+    except upload_reader.UploadTooLargeError as e:
+        raise too_large_error(file, e)
+    except columnar_export.UnknownFeaturesError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise unexpected_error(file, e)
+
+@router.post(
+    "/rows",
+    response_model=RowScoringResult,
+    responses={
+        413: {"description": "Mais linhas que settings.ROW_BATCH_MAX_ROWS em uma requisição."},
+        503: {"description": "Fila da pipeline cheia; tente novamente após o cabeçalho Retry-After."},
+    },
+    summary="Realiza predição em linhas enviadas como JSON"
+)
+async def predict_rows(
+    request: RowScoringRequest,
+    fields: Optional[str] = Query(
+        None,
+        description="Colunas de original_data: 'all' (padrão), 'none', o preset 'dashboard' ou uma lista separada por vírgulas."
+    ),
+):
+    """
+    Recebe linhas como objetos JSON (mesmas colunas do arquivo de upload) e retorna
+    uma PredictionRow por linha, na ordem enviada. Requisições simultâneas são
+    agrupadas por alguns milissegundos e preditas juntas (ver `RowBatcher`); o
+    cabeçalho `X-Batch-Rows` informa o tamanho do lote que processou a requisição.
+    `fields` funciona como em `/upload-csv` (aplicado às linhas desta requisição).
+    """
+    projection = resolve_projection(fields)
+    if len(request.records) > settings.ROW_BATCH_MAX_ROWS:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Formato de arquivo inválido. Por favor, envie um arquivo .csv ou .xlsx"
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Envie no máximo {settings.ROW_BATCH_MAX_ROWS} linhas por requisição (ou use /predict/upload-csv)."
         )
 
+    service = model_registry.active
+
     try:
-        # 2. Ler o conteúdo do arquivo
-        logger.info(f"Recebido arquivo: {file.filename}")
-        contents = await file.read()
-        
-        df = None # Inicializa o DataFrame
-
-        if file_extension == 'csv':
-            # --- Lógica para CSV (como antes) ---
-            buffer = io.StringIO(contents.decode('utf-8'))
-            df = pd.read_csv(buffer, sep=';')
-            logger.info("Arquivo CSV lido com sucesso.")
-        
-        elif file_extension == 'xlsx':
-            # --- LÓGICA ADICIONADA PARA EXCEL ---
-            buffer = io.BytesIO(contents) # Excel lê bytes, não texto
-            # pd.read_excel lê a *primeira aba* por padrão, o que geralmente é o correto.
-            df = pd.read_excel(buffer, engine='openpyxl') 
-            logger.info("Arquivo XLSX lido com sucesso.")
-
-        if df is None or df.empty:
-             raise pd.errors.EmptyDataError("O arquivo está vazio ou não pôde ser lido.")
-
-        logger.info(f"Dimensões do DataFrame: {df.shape}")
-
-        # --- CORREÇÃO DE DECIMAL (Mantida, pois é segura) ---
-        target_cols_to_fix = ['Target1', 'Target2', 'Target3']
-        for col in target_cols_to_fix:
-            if col in df.columns:
-                df[col] = pd.to_numeric(
-                    df[col].astype(str).str.replace(',', '.'), 
-                    errors='coerce'
-                )
-        logger.info("Colunas Target forçadas para numérico (tratando decimal , e .)")
-        # --- FIM DA CORREÇÃO ---
-
-        # 3. Chamar o serviço de predição
-        logger.info("Enviando DataFrame para o serviço de predição...")
-        results = prediction_service.execute_prediction_pipeline(df)
-        logger.info("Predição concluída com sucesso.")
-
-        # 4. Retornar os resultados formatados
-        return results
+        ensure_service_ready(service)
+        pipeline_executor.check_capacity()
 
-    except pd.errors.EmptyDataError:
-        logger.error(f"Erro ao processar '{file.filename}': Arquivo vazio.")
+        result = await row_batcher.score(service, request.records, projection)
+    except HTTPException:
+        raise
+    except ExecutorBusyError as e:
+        logger.warning("Fila da pipeline cheia; recusando /predict/rows.")
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Arquivo enviado está vazio ou não pôde ser lido."
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado processando outras análises. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)}
         )
     except Exception as e:
-        logger.error(f"Erro inesperado durante o processamento de '{file.filename}': {e}", exc_info=True) 
+        logger.error(f"Erro inesperado durante a predição de linhas: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Ocorreu um erro interno ao processar o arquivo: {str(e)}"
-        )
\ No newline at end of file
+            detail=f"Ocorreu um erro interno ao processar as linhas: {str(e)}"
+        )
+
+    rows = result.rows
+    content = RowScoringResult(
+        processed_rows=len(rows),
+        predictions=rows,
+        model_version=service.version
+    ).model_dump_json().encode('utf-8')
+    headers = {**timing_headers(result.timing, service), "X-Batch-Rows": str(result.batch_rows)}
+    return Response(content=content, media_type="application/json", headers=headers)
+
+@router.get("/cache/stats", summary="Contadores do cache de resultados")
+def cache_stats():
+    """Acertos (memória/disco), erros, remoções e ocupação do cache de resultados."""
+    return result_cache.stats()
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Optional
 
 # O Ponto de partida é o diretório 'app'
 # Path(__file__) -> Obtém o caminho do arquivo atual (config.py)
@@ -14,5 +15,103 @@ class Settings:
     # Ex: backend/app/ml/
     ML_ARTIFACTS_PATH: Path = APP_DIR / "ml"
 
+    # Versão de modelos carregada no startup (registro de modelos). None usa a
+    # registrada em ML_ARTIFACTS_PATH/versions/ACTIVE ou, na falta dela, "base"
+    # (os artefatos na raiz de ML_ARTIFACTS_PATH).
+    ML_MODEL_VERSION: Optional[str] = None
+
+    # Usa as estatísticas de referência do conjunto de artefatos (arquivo
+    # 'estatisticas_referencia.pkl', gerado por `python -m tools.gerar_estatisticas_referencia`)
+    # em vez das calculadas sobre cada upload: medianas, categorias e médias por
+    # cluster fixas, de modo que cada linha é pontuada igual em qualquer arquivo.
+    USE_REFERENCE_STATS: bool = False
+
+    # Calcula só as features derivadas do Bloco 11 ('_vs_cluster_mean', agregações,
+    # polinomiais) usadas por algum modelo, pelo clustering ou pelo heatmap. As
+    # demais deixam de aparecer em `original_data`. False calcula todas.
+    PRUNE_UNUSED_FEATURES: bool = True
+
+    # Compacta os tipos do DataFrame final da pipeline (ver app/ml/compactacao.py):
+    # flags 0/1 em int8, inteiros no menor tipo, floats em float32 e textos repetidos
+    # em category. As features dos modelos e do heatmap continuam float64, então
+    # predições, R² e heatmap não mudam; os demais floats de `original_data` passam
+    # a ter precisão de float32 (erro relativo <= 6e-8).
+    COMPACT_DTYPES: bool = False
+    # Com COMPACT_DTYPES, converte também as features dos modelos e do heatmap para
+    # float32. Só para modelos que toleram: nos artefatos de benchmark (100k linhas),
+    # modelos lineares mudaram as predições em até 4e-7 (absoluto); árvores mudam
+    # quando um valor cai junto a um limiar de divisão (0,7% das linhas, até 0,09).
+    COMPACT_MODEL_FEATURES: bool = False
+
+    # Planos de execução compilados por esquema do upload (cabeçalho + dtypes): quais
+    # colunas converter, imputar, sinalizar, remover, agregar e passar a cada modelo.
+    # Uploads com o mesmo layout reaproveitam o plano. Máximo de planos guardados por
+    # versão de modelos (0 compila o plano a cada execução).
+    PIPELINE_PLAN_CACHE_SIZE: int = 64
+
+    # Nível de log da aplicação ("DEBUG", "INFO", "WARNING", ...). O progresso da
+    # pipeline é registrado em INFO; "WARNING" deixa só avisos e erros.
+    LOG_LEVEL: str = "INFO"
+    # Mede duração, linhas, variação de memória e tamanho dos DataFrames de cada etapa da pipeline (GET /metrics).
+    METRICS_ENABLED: bool = True
+
+    # Threads usadas para carregar os artefatos em paralelo (em segundo plano, após o startup).
+    ARTIFACT_LOAD_THREADS: int = 4
+    # Passa uma linha sintética por cada modelo antes de marcar a API como pronta (/health/ready).
+    WARM_UP_ON_STARTUP: bool = True
+
+    # Lê uploads CSV com o motor multithread do pyarrow (quando instalado). False usa
+    # o motor C do pandas. A leitura em blocos (`chunk_rows`) sempre usa o motor C.
+    CSV_ARROW_ENGINE: bool = True
+    # Máximo de linhas aceitas em uma planilha XLSX (None = sem limite). O arquivo é
+    # lido em streaming e recusado (HTTP 413) assim que passa do limite.
+    XLSX_MAX_ROWS: Optional[int] = None
+
+    # Processamento em blocos: número de linhas por bloco. Limita o pico de memória
+    # da pipeline ao tamanho do bloco. None processa o arquivo inteiro de uma vez
+    # (pode ser sobrescrito por requisição com o parâmetro `chunk_rows`).
+    PIPELINE_CHUNK_ROWS: Optional[int] = None
+    # Tamanho de bloco do `/predict/upload-csv/stream` quando nem a requisição nem
+    # PIPELINE_CHUNK_ROWS definem um: o envio é sempre em blocos, então a primeira
+    # linha e o pico de memória não crescem com o tamanho do arquivo.
+    STREAM_CHUNK_ROWS: int = 10_000
+
+    # Pasta onde os blocos intermediários são gravados (None = pasta temporária do sistema).
+    PIPELINE_SPILL_DIR: Optional[Path] = None
+
+    # Executor da pipeline (fora do event loop): "thread" ou "process".
+    PIPELINE_EXECUTOR: str = "thread"
+    # Execuções simultâneas da pipeline.
+    PIPELINE_WORKERS: int = 2
+    # Threads que executam os pares scaler+modelo dos targets em paralelo, dentro
+    # de cada execução (1 = um target por vez).
+    TARGET_INFERENCE_THREADS: int = 3
+    # Execuções aguardando na fila; acima disso a API responde 503.
+    PIPELINE_MAX_QUEUE: int = 8
+    # Valor do cabeçalho Retry-After (segundos) nas respostas 503.
+    PIPELINE_RETRY_AFTER_SECONDS: int = 5
+
+    # Micro-batching de /predict/rows: requisições que chegam dentro desta janela
+    # (milissegundos) são processadas juntas em uma única chamada da pipeline (0 desativa).
+    # Só agrupa com USE_REFERENCE_STATS; sem elas cada requisição é processada sozinha.
+    ROW_BATCH_WINDOW_MS: float = 5.0
+    # Linhas por lote: ao atingir o limite o lote sai antes do fim da janela. É
+    # também o máximo de linhas aceito em uma requisição.
+    ROW_BATCH_MAX_ROWS: int = 512
+
+    # Jobs assíncronos (/predict/jobs): pasta dos uploads, status e resultados.
+    JOBS_PATH: Path = APP_DIR.parent / "jobs_data"
+    # Tempo (segundos) que um job finalizado e seu resultado ficam disponíveis.
+    JOB_TTL_SECONDS: int = 24 * 60 * 60
+    # Jobs executados ao mesmo tempo.
+    JOB_WORKERS: int = 1
+
+    # Cache de resultados (/predict/upload-csv), endereçado pelo conteúdo do upload.
+    # Limite do nível em memória, em bytes (0 desativa este nível).
+    RESULT_CACHE_MEMORY_BYTES: int = 256 * 1024 * 1024
+    # Pasta do nível em disco (None desativa este nível) e seu limite em bytes.
+    RESULT_CACHE_DIR: Optional[Path] = None
+    RESULT_CACHE_DISK_BYTES: int = 2 * 1024 * 1024 * 1024
+
 # Cria uma instância única das configurações para ser usada em toda a aplicação
 settings = Settings()
\ No newline at end of file
@@ -3,34 +3,69 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-# Importa apenas o roteador de predição
-from app.api import prediction_endpoint
-
-app = FastAPI(
-    title="API de Predição de Performance de Jogadores",
-    description="API que utiliza um modelo de ML para prever a performance de jogadores.",
-    version="1.0.0"
-)
-
-# ... (o código do CORS continua igual)
-origins = [
-    "http://localhost",
-    "http://localhost:5173",
-    "http://localhost:3000",
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Inclui apenas o roteador de predição
-app.include_router(prediction_endpoint.router)
-
-@app.get("/", tags=["Root"])
-def read_root():
-    """Endpoint raiz para verificar o status da API."""
-    return {"message": "Bem-vindo à API de Predição de Jogadores!"}
\ No newline at end of file
+# Importa os roteadores de predição, jobs, health checks, versões de modelos e métricas
+from app.api import prediction_endpoint, job_endpoint, health_endpoint, model_endpoint, metrics_endpoint
+from app.core.config import settings
+from app.services.model_registry import model_registry
+from app.services.pipeline_executor import pipeline_executor
+from app.services.job_service import job_manager
+
+def create_app() -> FastAPI:
+    """
+    Cria a aplicação. Os artefatos não são carregados aqui: o `startup` inicia o
+    carregamento (ou não faz nada, se o processo já os herdou carregados do master
+    em `app.prefork`). Uso com o uvicorn: `uvicorn --factory app.main:create_app`.
+    """
+    app = FastAPI(
+        title="API de Predição de Performance de Jogadores",
+        description="API que utiliza um modelo de ML para prever a performance de jogadores.",
+        version="1.0.0"
+    )
+
+    # ... (o código do CORS continua igual)
+    origins = [
+        "http://localhost",
+        "http://localhost:5173",
+        "http://localhost:3000",
+    ]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Inclui os roteadores de predição, jobs, health checks, versões de modelos e métricas
+    app.include_router(prediction_endpoint.router)
+    app.include_router(job_endpoint.router)
+    app.include_router(health_endpoint.router)
+    app.include_router(model_endpoint.router)
+    app.include_router(metrics_endpoint.router)
+
+    @app.on_event("startup")
+    def start_loading_artifacts():
+        """Carrega os artefatos da versão ativa em segundo plano: a API aceita conexões sem esperar os modelos."""
+        model_registry.start(warm_up=settings.WARM_UP_ON_STARTUP)
+
+    @app.on_event("startup")
+    def start_job_manager():
+        """Prepara a pasta de jobs e remove os expirados."""
+        job_manager.start()
+
+    @app.on_event("shutdown")
+    def shutdown_workers():
+        """Encerra os pools de workers da pipeline e dos jobs."""
+        pipeline_executor.shutdown()
+        job_manager.shutdown()
+
+    @app.get("/", tags=["Root"])
+    def read_root():
+        """Endpoint raiz para verificar o status da API."""
+        return {"message": "Bem-vindo à API de Predição de Jogadores!"}
+
+    return app
+
+# Instância usada por `uvicorn app.main:app`
+app = create_app()
@@ -0,0 +1,566 @@
+# backend/app/ml/feature_builder.py
+
+import logging
+from dataclasses import dataclass
+
+import pandas as pd
+import numpy as np
+from typing import Iterable, List, Optional, Set, Tuple
+
+from app.ml.feature_engineering import epsilon
+from app.ml.reference_stats import EstatisticasReferencia
+
+logger = logging.getLogger(__name__)
+
+# Motor de construção de features em passada única.
+# Reproduz exatamente a saída de `criar_features_desempenho_jogo1`,
+# `criar_features_tempo_contexto`, `criar_features_interacao` e `engenharia_final`
+# (mesmos valores, dtypes e ordem de colunas), mas calcula as colunas derivadas em
+# buffers NumPy pré-alocados e monta o DataFrame uma única vez, sem as cópias
+# intermediárias (`df.copy()`) nem as inserções coluna a coluna.
+
+COLUNAS_JOGO1 = ['Q0401', 'Q0402', 'Q0403', 'T0404', 'Q0405', 'Q0406', 'Q0407', 'T0408', 'Q0409', 'Q0410', 'Q0411', 'T0412', 'Q0413', 'Q0414', 'Q0415', 'T0498']
+COLUNAS_CONTEXTO = ['TempoTotalExpl', 'TempoTotal', 'tempo_medio_questao', 'QtdHorasDormi', 'QtdHorasSono', 'Acordar', 'QtdPessoas', 'QtdSom', 'QtdComida', 'F0705', 'F0706', 'F0707', 'F0708', 'F0709', 'F0710', 'F0711', 'F0712', 'F0713', 'F1101', 'F1103', 'F1105', 'F1107', 'F1109', 'F1111', 'TempoTotal11']
+COLUNAS_EMOCIONAL = ['F0705', 'F0706', 'F0707', 'F0708', 'F0709', 'F0710', 'F0711', 'F0712', 'F0713']
+COLUNAS_SATISFACAO = ['F1101', 'F1103', 'F1105', 'F1107', 'F1109', 'F1111']
+COLUNAS_INTERACAO_1 = ['taxa_acerto_total', 'qualidade_sono', 'nivel_social', 'tempo_medio_questao', 'media_emocional', 'taxa_erro_total']
+COLUNAS_INTERACAO_2 = ['Q1201', 'Q1203', 'T1204', 'Q1206', 'Q1208', 'Q1209']
+COLUNAS_VARIABILIDADE = ['taxa_acerto_r1', 'taxa_acerto_r2', 'taxa_acerto_r3']
+
+FEATURES_JOGO1_FLOAT = [
+    'taxa_acerto_r1', 'taxa_erro_r1', 'taxa_omissao_r1', 'tempo_por_questao_r1',
+    'taxa_acerto_r2', 'taxa_erro_r2', 'taxa_omissao_r2', 'tempo_por_questao_r2',
+    'taxa_acerto_r3', 'taxa_erro_r3', 'taxa_omissao_r3', 'tempo_por_questao_r3',
+    'taxa_acerto_total', 'taxa_erro_total', 'taxa_omissao_total',
+    'taxa_acerto_media', 'evolucao_desempenho', 'consistencia_acerto', 'tempo_medio_questao',
+    'tempo_investido_acertos', 'tempo_desperdicado', 'aceleracao',
+]
+FEATURES_CONTEXTO_FLOAT = ['proporcao_tempo_extra', 'velocidade_relativa', 'qualidade_sono', 'indice_descanso', 'nivel_social', 'media_emocional', 'estabilidade_emocional', 'satisfacao_jogo', 'engajamento']
+FEATURES_CONTEXTO_INT = ['passou_do_tempo', 'sono_adequado', 'acordou_cedo', 'ambiente_estimulante', 'comeu_adequadamente', 'respostas_positivas_questionario', 'respostas_negativas_questionario']
+FEATURES_INTERACAO_1 = ['desempenho_sono', 'desempenho_social', 'velocidade_energia', 'acertos_quando_positivo', 'erros_quando_negativo']
+FEATURES_INTERACAO_2_FLOAT = ['taxa_acerto_parte_a', 'eficiencia_parte_a', 'taxa_acerto_parte_b', 'melhoria_jogo3', 'consistencia_jogo3']
+
+# Bloco 11: agregações por prefixo e listas de top10 usadas nas polinomiais
+PREFIXOS_AGREGACAO = ['Q0', 'P', 'T', 'F']
+SUFIXOS_AGREGACAO = ('_mean', '_std', '_range')
+TOP10_POR_TARGET = [('Target1', 'target1_top10'), ('Target2', 'target2_top10'), ('Target3', 'target3_top10')]
+
+
+class _BufferFeatures:
+    """
+    Buffers pré-alocados (ordem Fortran, uma coluna contígua por feature) para as
+    colunas derivadas, separados em float64 e int64.
+    Mantém a ordem de criação das colunas para montar o DataFrame final.
+    """
+    def __init__(self, n_linhas: int, n_float: int, n_int: int):
+        self.float = np.empty((n_linhas, n_float), dtype=np.float64, order='F')
+        self.int = np.empty((n_linhas, n_int), dtype=np.int64, order='F')
+        self._proximo_float = 0
+        self._proximo_int = 0
+        self.colunas = {}
+
+    def novo_float(self, nome: str) -> np.ndarray:
+        destino = self.float[:, self._proximo_float]
+        self._proximo_float += 1
+        self.colunas[nome] = destino
+        return destino
+
+    def novo_int(self, nome: str) -> np.ndarray:
+        destino = self.int[:, self._proximo_int]
+        self._proximo_int += 1
+        self.colunas[nome] = destino
+        return destino
+
+    def guardar(self, nome: str, valores: np.ndarray) -> None:
+        """
+        Copia `valores` para o buffer do dtype correspondente. Colunas cujo dtype
+        depende da entrada e não cabem no buffer são guardadas como estão.
+        """
+        if valores.dtype == np.float64 and self._proximo_float < self.float.shape[1]:
+            self.novo_float(nome)[:] = valores
+        elif valores.dtype == np.int64 and self._proximo_int < self.int.shape[1]:
+            self.novo_int(nome)[:] = valores
+        else:
+            self.colunas[nome] = valores
+
+
+def _desvio_linhas(colunas: list) -> np.ndarray:
+    """Desvio padrão por linha (ddof=1, ignorando NaN), idêntico a `DataFrame.std(axis=1)`."""
+    return pd.DataFrame(np.array(colunas).T).std(axis=1).to_numpy()
+
+
+def _e_numerico(valores: np.ndarray) -> bool:
+    """Equivalente a `select_dtypes(include=np.number)` para um array."""
+    return valores.dtype.kind in 'iufc'
+
+
+def _e_texto(serie: pd.Series) -> bool:
+    return serie.dtype == object or pd.api.types.is_string_dtype(serie.dtype)
+
+
+@dataclass(frozen=True)
+class PlanoJogador:
+    """
+    Blocos de `construir_features_jogador` que rodam para um cabeçalho, colunas
+    'Pxx' do questionário, colunas do desvio de variabilidade (None quando não
+    roda) e tamanho dos buffers float/int.
+    """
+    roda_jogo1: bool
+    roda_contexto: bool
+    roda_interacao_1: bool
+    roda_interacao_2: bool
+    colunas_p: Tuple[str, ...]
+    cols_variabilidade: Optional[Tuple[str, ...]]
+    n_float: int
+    n_int: int
+
+
+def planejar_features_jogador(colunas: Iterable[str]) -> PlanoJogador:
+    """ Decide, só pelo cabeçalho, quais blocos rodam antes de alocar os buffers. """
+    colunas = list(colunas)
+    existentes = set(colunas)
+    roda_jogo1 = all(col in existentes for col in COLUNAS_JOGO1)
+    disponiveis = existentes | (set(FEATURES_JOGO1_FLOAT) if roda_jogo1 else set())
+    roda_contexto = all(col in disponiveis for col in COLUNAS_CONTEXTO)
+    if roda_contexto:
+        disponiveis |= set(FEATURES_CONTEXTO_FLOAT) | set(FEATURES_CONTEXTO_INT)
+    roda_interacao_1 = all(c in disponiveis for c in COLUNAS_INTERACAO_1)
+    roda_interacao_2 = all(c in disponiveis for c in COLUNAS_INTERACAO_2)
+    if roda_interacao_2:
+        disponiveis |= set(FEATURES_INTERACAO_2_FLOAT)
+    colunas_p = tuple(col for col in colunas if col.startswith('P') and col[1:].isdigit() and len(col) <= 5)
+    cols_variabilidade = None
+    if all(c in disponiveis for c in COLUNAS_VARIABILIDADE):
+        cols_variabilidade = list(COLUNAS_VARIABILIDADE)
+        if 'taxa_acerto_parte_a' in disponiveis: cols_variabilidade.extend(['taxa_acerto_parte_a', 'taxa_acerto_parte_b'])
+        cols_variabilidade = tuple(cols_variabilidade)
+    roda_variabilidade = cols_variabilidade is not None
+
+    n_float = (len(FEATURES_JOGO1_FLOAT) if roda_jogo1 else 0) \
+        + (len(FEATURES_CONTEXTO_FLOAT) if roda_contexto else 0) \
+        + (len(FEATURES_INTERACAO_1) if roda_interacao_1 else 0) \
+        + (len(FEATURES_INTERACAO_2_FLOAT) if roda_interacao_2 else 0) \
+        + (1 if colunas_p else 0) + (1 if roda_variabilidade else 0)
+    n_int = (len(FEATURES_CONTEXTO_INT) + 1 if roda_contexto else 0) \
+        + (1 if roda_interacao_2 else 0) + (3 if colunas_p else 0) + (1 if roda_variabilidade else 0)
+    return PlanoJogador(roda_jogo1, roda_contexto, roda_interacao_1, roda_interacao_2,
+                        colunas_p, cols_variabilidade, n_float, n_int)
+
+
+def construir_features_jogador(df: pd.DataFrame, mediana_tempo: Optional[float] = None,
+                               plano: Optional[PlanoJogador] = None) -> pd.DataFrame:
+    """
+    Blocos 7, 8 e 9 do notebook em uma única passada.
+    Equivalente a `criar_features_interacao(criar_features_tempo_contexto(criar_features_desempenho_jogo1(df)))`.
+    As colunas de entrada não são copiadas: o resultado compartilha memória com `df`.
+    `mediana_tempo` substitui a mediana de 'tempo_medio_questao' calculada no lote.
+    `plano` é o `planejar_features_jogador(df.columns)` já compilado (ex.: em cache por cabeçalho).
+    """
+    logger.info("   -> Criando features de Jogo 1, Tempo/Contexto e Interação (passada única)...")
+    n = len(df)
+    if plano is None:
+        plano = planejar_features_jogador(df.columns)
+    roda_jogo1, roda_contexto = plano.roda_jogo1, plano.roda_contexto
+    roda_interacao_1, roda_interacao_2 = plano.roda_interacao_1, plano.roda_interacao_2
+    colunas_p = list(plano.colunas_p)
+    n_float, n_int = plano.n_float, plano.n_int
+    buf = _BufferFeatures(n, n_float, n_int)
+
+    def col(nome: str) -> np.ndarray:
+        if nome in buf.colunas:
+            return buf.colunas[nome]
+        return df[nome].to_numpy()
+
+    # --- Bloco 7: desempenho Jogo 1 ---
+    if roda_jogo1:
+        for sufixo, (acerto, erro, omissao, tempo) in {
+            'r1': ('Q0401', 'Q0402', 'Q0403', 'T0404'),
+            'r2': ('Q0405', 'Q0406', 'Q0407', 'T0408'),
+            'r3': ('Q0409', 'Q0410', 'Q0411', 'T0412'),
+        }.items():
+            total = col(acerto) + col(erro) + col(omissao) + epsilon
+            np.divide(col(acerto), total, out=buf.novo_float(f'taxa_acerto_{sufixo}'))
+            np.divide(col(erro), total, out=buf.novo_float(f'taxa_erro_{sufixo}'))
+            np.divide(col(omissao), total, out=buf.novo_float(f'taxa_omissao_{sufixo}'))
+            np.divide(col(tempo), total, out=buf.novo_float(f'tempo_por_questao_{sufixo}'))
+
+        total_geral = col('Q0413') + col('Q0414') + col('Q0415') + epsilon
+        np.divide(col('Q0413'), total_geral, out=buf.novo_float('taxa_acerto_total'))
+        np.divide(col('Q0414'), total_geral, out=buf.novo_float('taxa_erro_total'))
+        np.divide(col('Q0415'), total_geral, out=buf.novo_float('taxa_omissao_total'))
+
+        acertos = [col('taxa_acerto_r1'), col('taxa_acerto_r2'), col('taxa_acerto_r3')]
+        np.divide(acertos[0] + acertos[1] + acertos[2], 3, out=buf.novo_float('taxa_acerto_media'))
+        np.subtract(acertos[2], acertos[0], out=buf.novo_float('evolucao_desempenho'))
+        buf.novo_float('consistencia_acerto')[:] = _desvio_linhas(acertos)
+        np.divide(col('T0498'), total_geral, out=buf.novo_float('tempo_medio_questao'))
+        np.multiply(col('T0498'), col('taxa_acerto_total'), out=buf.novo_float('tempo_investido_acertos'))
+        np.multiply(col('T0498'), col('taxa_erro_total'), out=buf.novo_float('tempo_desperdicado'))
+        np.divide(col('T0412'), col('T0404') + epsilon, out=buf.novo_float('aceleracao'))
+    else:
+        logger.warning("      ⚠️ Colunas do Jogo 1 ausentes. Pulando features.")
+
+    # --- Bloco 8: tempo e contexto ---
+    if roda_contexto:
+        np.divide(col('TempoTotalExpl'), col('TempoTotal') + epsilon, out=buf.novo_float('proporcao_tempo_extra'))
+        buf.novo_int('passou_do_tempo')[:] = col('TempoTotal') >= 180
+        if mediana_tempo is None:
+            mediana_tempo = pd.Series(col('tempo_medio_questao')).median() # Mediana nos dados atuais
+        np.divide(col('tempo_medio_questao'), mediana_tempo + epsilon, out=buf.novo_float('velocidade_relativa'))
+        np.divide(col('QtdHorasDormi') + col('QtdHorasSono'), 2, out=buf.novo_float('qualidade_sono'))
+        buf.novo_int('sono_adequado')[:] = col('QtdHorasSono') >= 2
+        buf.novo_int('acordou_cedo')[:] = col('Acordar') <= 2
+        np.multiply(col('qualidade_sono'), 5 - col('Acordar'), out=buf.novo_float('indice_descanso'))
+        buf.guardar('nivel_social', col('QtdPessoas') + col('QtdSom'))
+        buf.novo_int('ambiente_estimulante')[:] = col('nivel_social') >= 3
+        buf.novo_int('comeu_adequadamente')[:] = col('QtdComida') >= 2
+        emocional = df[COLUNAS_EMOCIONAL]
+        buf.novo_float('media_emocional')[:] = emocional.mean(axis=1).to_numpy()
+        buf.novo_float('estabilidade_emocional')[:] = emocional.std(axis=1).to_numpy()
+        valores_emocional = emocional.to_numpy()
+        buf.novo_int('respostas_positivas_questionario')[:] = (valores_emocional >= 4).sum(axis=1)
+        buf.novo_int('respostas_negativas_questionario')[:] = (valores_emocional <= 2).sum(axis=1)
+        buf.novo_float('satisfacao_jogo')[:] = df[COLUNAS_SATISFACAO].mean(axis=1).to_numpy()
+        np.multiply(col('satisfacao_jogo'), col('TempoTotal11'), out=buf.novo_float('engajamento'))
+    else:
+        logger.warning("      ⚠️ Colunas de Tempo/Contexto ausentes. Pulando features.")
+
+    # --- Bloco 9: interação ---
+    features_criadas = 0
+    if roda_interacao_1:
+        np.multiply(col('taxa_acerto_total'), col('qualidade_sono'), out=buf.novo_float('desempenho_sono'))
+        buf.guardar('desempenho_social', col('taxa_acerto_total') * col('nivel_social'))
+        np.divide(col('tempo_medio_questao'), col('qualidade_sono') + epsilon, out=buf.novo_float('velocidade_energia'))
+        np.multiply(col('taxa_acerto_total'), col('media_emocional') / 5, out=buf.novo_float('acertos_quando_positivo'))
+        np.multiply(col('taxa_erro_total'), 1 - col('media_emocional') / 5, out=buf.novo_float('erros_quando_negativo'))
+        features_criadas += 5
+
+    if roda_interacao_2:
+        total_parte_a = col('Q1201') + col('Q1203') + epsilon
+        np.divide(col('Q1201'), total_parte_a, out=buf.novo_float('taxa_acerto_parte_a'))
+        np.divide(col('taxa_acerto_parte_a'), col('T1204') + epsilon, out=buf.novo_float('eficiencia_parte_a'))
+        total_parte_b = col('Q1206') + col('Q1208') + epsilon
+        np.divide(col('Q1206'), total_parte_b, out=buf.novo_float('taxa_acerto_parte_b'))
+        buf.novo_int('passou_limite_b')[:] = col('Q1209') >= 300
+        np.subtract(col('taxa_acerto_parte_b'), col('taxa_acerto_parte_a'), out=buf.novo_float('melhoria_jogo3'))
+        np.abs(col('taxa_acerto_parte_a') - col('taxa_acerto_parte_b'), out=buf.novo_float('consistencia_jogo3'))
+        features_criadas += 6
+
+    if colunas_p:
+        valores_p = df[colunas_p].to_numpy()
+        positivas = buf.novo_int('soma_respostas_positivas')
+        positivas[:] = (valores_p >= 4).sum(axis=1)
+        negativas = buf.novo_int('soma_respostas_negativas')
+        negativas[:] = (valores_p <= 2).sum(axis=1)
+        np.divide(positivas, len(colunas_p) + epsilon, out=buf.novo_float('tendencia_positiva'))
+        np.abs(positivas - negativas, out=buf.novo_int('polarizacao'))
+        features_criadas += 4
+
+    if plano.cols_variabilidade is not None:
+        cols_variabilidade = plano.cols_variabilidade
+        variabilidade = buf.novo_float('variabilidade_total')
+        variabilidade[:] = _desvio_linhas([col(c) for c in cols_variabilidade])
+        buf.novo_int('jogador_estavel')[:] = variabilidade < 0.1
+        features_criadas += 2
+
+    if features_criadas > 0:
+        logger.info(f"      ✅ Features criadas em passada única ({features_criadas} de Interação).")
+    else:
+        logger.warning("      ⚠️ Nenhuma Feature de Interação criada (colunas ausentes).")
+    return _anexar_colunas(df, buf.colunas)
+
+
+def _anexar_colunas(df: pd.DataFrame, novas: dict) -> pd.DataFrame:
+    """
+    Anexa as colunas novas ao final de `df` em uma única operação.
+    Colunas que já existiam são sobrescritas na mesma posição, como faria `df[col] = ...`.
+    """
+    sobrescritas = [nome for nome in novas if nome in df.columns]
+    if sobrescritas:
+        df = df.copy()
+        for nome in sobrescritas:
+            df[nome] = novas.pop(nome)
+    if not novas:
+        return df
+    df_novas = pd.DataFrame(novas, index=df.index)
+    return pd.concat([df, df_novas], axis=1, copy=False)
+
+
+def _limpar_float(valores: np.ndarray, mediana: bool) -> np.ndarray:
+    """
+    NaN -> mediana da coluna (se `mediana`) -> 0, e ±Inf -> 0.
+    Retorna o próprio array quando não há nada para corrigir.
+    """
+    invalidos = ~np.isfinite(valores)
+    if not invalidos.any():
+        return valores
+    nan = np.isnan(valores)
+    if mediana and nan.any():
+        valores = np.where(nan, pd.Series(valores).median(), valores)
+    else:
+        valores = valores.copy()
+    valores[~np.isfinite(valores)] = 0
+    return valores
+
+
+def recalcular_velocidade_relativa(df: pd.DataFrame, mediana_tempo: float) -> None:
+    """Refaz 'velocidade_relativa' (Bloco 8) com outra mediana de 'tempo_medio_questao'."""
+    df['velocidade_relativa'] = df['tempo_medio_questao'].to_numpy() / (mediana_tempo + epsilon)
+
+
+def valores_base(serie: pd.Series, categorias: Optional[list] = None) -> np.ndarray:
+    """
+    Valores de uma coluna como o Bloco 11 os enxerga antes do tratamento de NaN:
+    colunas 'object' viram códigos de categoria (-1 de 'não visto' vira NaN).
+    `categorias` fixa a lista de categorias (por padrão, as presentes no lote).
+    """
+    if not _e_texto(serie):
+        return serie.to_numpy()
+    codigos = pd.Categorical(serie, categories=categorias).codes
+    nao_visto = codigos == -1 # -1 de 'não visto' vira NaN
+    if nao_visto.any():
+        codigos = codigos.astype(np.float64)
+        codigos[nao_visto] = np.nan
+    return codigos
+
+
+@dataclass(frozen=True)
+class PlanoEngenhariaFinal:
+    """
+    Decisões do Bloco 11 que dependem só do cabeçalho: colunas mantidas e removidas
+    via 'colunas_deletar' e as colunas de cada prefixo de agregação.
+    """
+    mantidas: Tuple[str, ...]
+    removidas: Tuple[str, ...]
+    prefixos: dict
+
+
+def planejar_engenharia_final(colunas: Iterable[str], coluns_json: dict) -> PlanoEngenhariaFinal:
+    colunas_deletar = set(coluns_json.get('colunas_deletar', []))
+    mantidas = tuple(col for col in colunas if col not in colunas_deletar)
+    removidas = tuple(col for col in colunas if col in colunas_deletar)
+    # As dummies ('Cluster_*') e as interações ('*_vs_cluster_mean', terminam em '_mean')
+    # nunca entram nos grupos: eles dependem só das colunas mantidas
+    prefixos = {p: tuple(col for col in mantidas if col != 'Cluster' and col.startswith(p) and not col.endswith(SUFIXOS_AGREGACAO))
+                for p in PREFIXOS_AGREGACAO}
+    return PlanoEngenhariaFinal(mantidas, removidas, prefixos)
+
+
+def _colunas_limpas(df: pd.DataFrame, coluns_json: dict, estatisticas: EstatisticasReferencia,
+                    plano: Optional[PlanoEngenhariaFinal] = None) -> dict:
+    """Passos 1 e 2 do Bloco 11 (remoção via JSON, codificação e NaN/Inf), coluna a coluna."""
+    # --- 1. LIMPEZA CONTROLADA PELO JSON ---
+    if plano is None:
+        plano = planejar_engenharia_final(df.columns, coluns_json)
+    if plano.removidas:
+        logger.info(f"      🗑️ {len(plano.removidas)} colunas removidas via 'colunas_deletar'.")
+
+    # --- 2. PRÉ-PROCESSAMENTO FINAL DE ROBUSTEZ (coluna a coluna, sem copiar o DataFrame) ---
+    colunas = {}
+    for col in plano.mantidas:
+        valores = valores_base(df[col], estatisticas.categorias.get(col))
+        if valores.dtype.kind in 'fc':
+            if col in estatisticas.medianas_finais:
+                valores = _limpar_float(np.where(np.isnan(valores), estatisticas.medianas_finais[col], valores), mediana=False)
+            else:
+                valores = _limpar_float(valores, mediana=True)
+        elif valores.dtype.kind not in 'iub':
+            # Tipos não numéricos remanescentes (ex.: datas) seguem o caminho do pandas
+            serie = pd.Series(valores, index=df.index)
+            if serie.isna().any():
+                serie = serie.fillna(serie.median())
+            valores = serie.fillna(0).replace([np.inf, -np.inf], 0).to_numpy()
+        colunas[col] = valores
+    logger.info("      ✅ Codificação 'object', tratamento NaN/Inf finalizados.")
+    return colunas
+
+
+def _colunas_interacao(colunas: dict, necessarias: Optional[Set[str]] = None) -> list:
+    """
+    Colunas numéricas usadas nas features '_vs_cluster_mean' (sem Cluster e Cluster_*).
+    Com `necessarias`, só as que geram uma feature '_vs_cluster_mean' necessária.
+    """
+    numericas = [c for c, v in colunas.items() if _e_numerico(v) and c != 'Cluster' and not c.startswith('Cluster_')]
+    if necessarias is None:
+        return numericas
+    return [c for c in numericas if f'{c}_vs_cluster_mean' in necessarias]
+
+
+def nomes_polinomiais(coluns_json: dict) -> dict:
+    """Features polinomiais do Bloco 11 (nome -> coluna de origem), na ordem de criação."""
+    polinomiais = {}
+    for target, chave in TOP10_POR_TARGET:
+        for col in coluns_json.get(chave, []):
+            polinomiais[f'{target}_{col}_sq'] = col
+            polinomiais[f'{target}_{col}_sqrt'] = col
+    return polinomiais
+
+
+def nomes_agregacoes() -> List[str]:
+    """Features de agregação por prefixo do Bloco 11 ('Q0_mean', 'Q0_std', ...)."""
+    return [f'{prefix}{sufixo}' for prefix in PREFIXOS_AGREGACAO for sufixo in SUFIXOS_AGREGACAO]
+
+
+def fechar_dependencias(necessarias: Iterable[str], coluns_json: dict) -> Set[str]:
+    """
+    Grafo de dependências das features derivadas do Bloco 11: devolve `necessarias`
+    mais tudo de que elas dependem. Uma polinomial depende da sua coluna de origem
+    (que pode ser outra derivada); '_vs_cluster_mean' e as agregações dependem só
+    de colunas de entrada, que são sempre mantidas.
+    """
+    polinomiais = nomes_polinomiais(coluns_json)
+    fechadas = set(necessarias)
+    pendentes = list(fechadas)
+    while pendentes:
+        origem = polinomiais.get(pendentes.pop())
+        if origem is not None and origem not in fechadas:
+            fechadas.add(origem)
+            pendentes.append(origem)
+    return fechadas
+
+
+def somar_por_cluster(df: pd.DataFrame, coluns_json: dict, estatisticas: Optional[EstatisticasReferencia] = None,
+                      necessarias: Optional[Set[str]] = None,
+                      plano: Optional[PlanoEngenhariaFinal] = None) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Soma e contagem por cluster das colunas usadas em '_vs_cluster_mean', após os
+    passos 1 e 2 do Bloco 11. Somando o resultado de vários blocos obtém-se
+    `medias_cluster` do arquivo inteiro. `necessarias` limita as colunas como em
+    `construir_engenharia_final`.
+    """
+    estatisticas = estatisticas or EstatisticasReferencia()
+    colunas = _colunas_limpas(df, coluns_json, estatisticas, plano)
+    clusters = colunas['Cluster']
+    numericas = _colunas_interacao(colunas, necessarias)
+    somas = pd.DataFrame({c: colunas[c] for c in numericas}).groupby(clusters).sum()
+    contagens = pd.Series(clusters).value_counts().reindex(somas.index)
+    return somas, contagens
+
+
+def construir_engenharia_final(df: pd.DataFrame, coluns_json: dict, estatisticas: Optional[EstatisticasReferencia] = None,
+                               necessarias: Optional[Set[str]] = None,
+                               plano: Optional[PlanoEngenhariaFinal] = None) -> pd.DataFrame:
+    """
+    Bloco 11 do notebook com montagem única do DataFrame.
+    Equivalente a `engenharia_final(df, coluns_json)`. Com `estatisticas`, as
+    categorias, medianas, clusters e médias por cluster vêm de fora do lote.
+    Com `necessarias` (ver `fechar_dependencias`), as features derivadas
+    ('_vs_cluster_mean', agregações e polinomiais) fora do conjunto não são
+    calculadas; as demais colunas saem iguais e na mesma ordem. `plano` é o
+    `planejar_engenharia_final(df.columns, coluns_json)` já compilado.
+    """
+    logger.info("   -> Iniciando Engenharia Final (passada única)...")
+    n = len(df)
+    estatisticas = estatisticas or EstatisticasReferencia()
+    if plano is None:
+        plano = planejar_engenharia_final(df.columns, coluns_json)
+    colunas = _colunas_limpas(df, coluns_json, estatisticas, plano)
+
+    CLUSTER_COL = 'Cluster'
+    if CLUSTER_COL not in colunas:
+        logger.warning("      ⚠️ Coluna 'Cluster' não encontrada, engenharia avançada ignorada.")
+        logger.info("   ✅ Engenharia Final concluída.")
+        return pd.DataFrame(colunas, index=df.index)
+
+    # --- 3. CRIAÇÃO DE FEATURES AVANÇADAS (BASEADO EM CLUSTER) ---
+    logger.info("      -> Criando features baseadas em Cluster...")
+    clusters = colunas[CLUSTER_COL]
+    desconhecidos = None
+    if estatisticas.clusters is not None:
+        valores_cluster = np.asarray(sorted(estatisticas.clusters))
+        grupo = np.searchsorted(valores_cluster, clusters)
+        # Cluster fora da lista de referência: sem coluna Cluster_* e sem média (interação 0)
+        fora = (grupo >= len(valores_cluster)) | (valores_cluster[np.minimum(grupo, max(len(valores_cluster) - 1, 0))] != clusters)
+        if fora.any():
+            logger.warning(f"      ⚠️ {int(fora.sum())} linhas com cluster fora das estatísticas de referência.")
+            desconhecidos = fora
+            grupo = np.where(fora, len(valores_cluster), grupo)
+    else:
+        valores_cluster, grupo = np.unique(clusters, return_inverse=True)
+
+    # One-Hot Encoding (mesma nomenclatura de pd.get_dummies)
+    dummies = np.zeros((n, len(valores_cluster)), dtype=np.int64, order='F')
+    if desconhecidos is None:
+        dummies[np.arange(n), grupo] = 1
+    else:
+        conhecidas = np.flatnonzero(~desconhecidos)
+        dummies[conhecidas, grupo[conhecidas]] = 1
+    nomes_dummies = [f'{CLUSTER_COL}_{valor}' for valor in valores_cluster]
+
+    # Features de Interação (valor - média do cluster), escritas direto no buffer
+    numericas = _colunas_interacao(colunas, necessarias)
+    puladas = {'_vs_cluster_mean': len(_colunas_interacao(colunas)) - len(numericas), 'agregação': 0, 'polinomial': 0}
+    if estatisticas.medias_cluster is not None:
+        medias_cluster = estatisticas.medias_cluster.reindex(index=valores_cluster, columns=numericas).to_numpy()
+    else:
+        medias_cluster = pd.DataFrame({c: colunas[c] for c in numericas}).groupby(clusters).mean().to_numpy()
+    if desconhecidos is not None:
+        medias_cluster = np.vstack([medias_cluster, np.full((1, len(numericas)), np.nan)])
+    interacoes = np.empty((n, len(numericas)), dtype=np.float64, order='F')
+    for j, c in enumerate(numericas):
+        np.subtract(colunas[c], medias_cluster[grupo, j], out=interacoes[:, j])
+    nomes_interacoes = [f'{c}_vs_cluster_mean' for c in numericas]
+
+    del colunas[CLUSTER_COL] # Remove a original
+    partes = [
+        pd.DataFrame(colunas, index=df.index),
+        pd.DataFrame(dummies, columns=nomes_dummies, index=df.index),
+        pd.DataFrame(interacoes, columns=nomes_interacoes, index=df.index),
+    ]
+    fonte = dict(colunas)
+    fonte.update(zip(nomes_dummies, dummies.T))
+    fonte.update(zip(nomes_interacoes, interacoes.T))
+
+    # Features de Agregação por Prefixo
+    def precisa(nome: str, tipo: str) -> bool:
+        if necessarias is None or nome in necessarias:
+            return True
+        puladas[tipo] += 1
+        return False
+
+    derivadas = {}
+    for prefix, cols in plano.prefixos.items():
+        if len(cols) >= 3:
+            calcula = {sufixo: precisa(f'{prefix}{sufixo}', 'agregação') for sufixo in SUFIXOS_AGREGACAO}
+            if not any(calcula.values()):
+                continue
+            bloco = pd.DataFrame({c: fonte[c] for c in cols})
+            if calcula['_mean']:
+                derivadas[f'{prefix}_mean'] = bloco.mean(axis=1).to_numpy()
+            if calcula['_std']:
+                derivadas[f'{prefix}_std'] = bloco.std(axis=1).to_numpy()
+            if calcula['_range']:
+                derivadas[f'{prefix}_range'] = (bloco.max(axis=1) - bloco.min(axis=1)).to_numpy()
+    fonte.update(derivadas)
+
+    # Features Polinomiais (baseadas nas top10 de cada target)
+    for target, chave in TOP10_POR_TARGET:
+        for col in coluns_json.get(chave, []):
+            if col in fonte:
+                valores = fonte[col]
+                for nome, calcular in ((f'{target}_{col}_sq', lambda v: v**2),
+                                       (f'{target}_{col}_sqrt', lambda v: np.sqrt(np.abs(v) + epsilon))):
+                    if precisa(nome, 'polinomial'):
+                        derivada = calcular(valores)
+                        derivadas[nome] = derivada
+                        fonte[nome] = derivada
+
+    # Limpeza final pós-engenharia (apenas nas colunas derivadas; as demais já estão limpas)
+    interacoes[~np.isfinite(interacoes)] = 0
+    extras = {}
+    for nome, valores in derivadas.items():
+        extras[nome] = _limpar_float(valores, mediana=False) if valores.dtype.kind in 'fc' else valores
+
+    # Montagem única: as partes já estão na ordem final de colunas
+    if len(fonte) == len(colunas) + len(nomes_dummies) + len(nomes_interacoes) + len(extras):
+        partes.append(pd.DataFrame(extras, index=df.index))
+        df_out = pd.concat(partes, axis=1, copy=False)
+    else:
+        # Colunas derivadas que sobrescrevem colunas existentes mantêm a posição original
+        fonte.update(extras)
+        df_out = pd.DataFrame(fonte, index=df.index)
+    logger.info("      ✅ Features baseadas em Cluster criadas.")
+    if necessarias is not None:
+        logger.info(f"      ✂️ Features não usadas puladas: {', '.join(f'{n} {tipo}' for tipo, n in puladas.items())}.")
+    logger.info("   ✅ Engenharia Final concluída.")
+    return df_out
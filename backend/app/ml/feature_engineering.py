@@ -1,17 +1,21 @@
 # backend/app/ml/feature_engineering.py
 
+import logging
+
 import pandas as pd
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 epsilon = 1e-10
 
 def criar_features_desempenho_jogo1(df: pd.DataFrame) -> pd.DataFrame:
     """Implementa a lógica do Bloco 7 do notebook."""
-    print("   -> Criando features de desempenho Jogo 1...")
+    logger.info("   -> Criando features de desempenho Jogo 1...")
     df_out = df.copy()
     colunas_jogo1 = ['Q0401', 'Q0402', 'Q0403', 'T0404', 'Q0405', 'Q0406', 'Q0407', 'T0408', 'Q0409', 'Q0410', 'Q0411', 'T0412', 'Q0413', 'Q0414', 'Q0415', 'T0498']
     if not all(col in df_out.columns for col in colunas_jogo1):
-        print("      ⚠️ Colunas do Jogo 1 ausentes. Pulando features.")
+        logger.warning("      ⚠️ Colunas do Jogo 1 ausentes. Pulando features.")
         return df_out
 
     total_r1 = df_out['Q0401'] + df_out['Q0402'] + df_out['Q0403'] + epsilon
@@ -44,16 +48,16 @@ def criar_features_desempenho_jogo1(df: pd.DataFrame) -> pd.DataFrame:
     df_out['tempo_investido_acertos'] = df_out['T0498'] * df_out['taxa_acerto_total']
     df_out['tempo_desperdicado'] = df_out['T0498'] * df_out['taxa_erro_total']
     df_out['aceleracao'] = df_out['T0412'] / (df_out['T0404'] + epsilon)
-    print("      ✅ Features Jogo 1 criadas.")
+    logger.info("      ✅ Features Jogo 1 criadas.")
     return df_out
 
 def criar_features_tempo_contexto(df: pd.DataFrame) -> pd.DataFrame:
     """Implementa a lógica do Bloco 8 do notebook."""
-    print("   -> Criando features de Tempo e Contexto...")
+    logger.info("   -> Criando features de Tempo e Contexto...")
     df_out = df.copy()
     colunas_contexto = ['TempoTotalExpl', 'TempoTotal', 'tempo_medio_questao', 'QtdHorasDormi', 'QtdHorasSono', 'Acordar', 'QtdPessoas', 'QtdSom', 'QtdComida', 'F0705', 'F0706', 'F0707', 'F0708', 'F0709', 'F0710', 'F0711', 'F0712', 'F0713', 'F1101', 'F1103', 'F1105', 'F1107', 'F1109', 'F1111', 'TempoTotal11']
     if not all(col in df_out.columns for col in colunas_contexto):
-        print("      ⚠️ Colunas de Tempo/Contexto ausentes. Pulando features.")
+        logger.warning("      ⚠️ Colunas de Tempo/Contexto ausentes. Pulando features.")
         return df_out
 
     df_out['proporcao_tempo_extra'] = df_out['TempoTotalExpl'] / (df_out['TempoTotal'] + epsilon)
@@ -75,12 +79,12 @@ def criar_features_tempo_contexto(df: pd.DataFrame) -> pd.DataFrame:
     colunas_satisfacao = ['F1101', 'F1103', 'F1105', 'F1107', 'F1109', 'F1111']
     df_out['satisfacao_jogo'] = df_out[colunas_satisfacao].mean(axis=1)
     df_out['engajamento'] = df_out['satisfacao_jogo'] * df_out['TempoTotal11']
-    print("      ✅ Features Tempo/Contexto criadas.")
+    logger.info("      ✅ Features Tempo/Contexto criadas.")
     return df_out
 
 def criar_features_interacao(df: pd.DataFrame) -> pd.DataFrame:
     """Implementa a lógica do Bloco 9 do notebook."""
-    print("   -> Criando features de Interação...")
+    logger.info("   -> Criando features de Interação...")
     df_out = df.copy()
     features_criadas = 0
 
@@ -122,14 +126,14 @@ def criar_features_interacao(df: pd.DataFrame) -> pd.DataFrame:
         features_criadas += 2
 
     if features_criadas > 0:
-      print(f"      ✅ {features_criadas} Features de Interação criadas.")
+      logger.info(f"      ✅ {features_criadas} Features de Interação criadas.")
     else:
-      print("      ⚠️ Nenhuma Feature de Interação criada (colunas ausentes).")
+      logger.warning("      ⚠️ Nenhuma Feature de Interação criada (colunas ausentes).")
     return df_out
 
 def engenharia_final(df: pd.DataFrame, coluns_json: dict) -> pd.DataFrame:
     """Implementa a lógica do Bloco 11 do notebook."""
-    print("   -> Iniciando Engenharia Final...")
+    logger.info("   -> Iniciando Engenharia Final...")
     df_out = df.copy()
 
     # --- 1. LIMPEZA CONTROLADA PELO JSON ---
@@ -137,7 +141,7 @@ def engenharia_final(df: pd.DataFrame, coluns_json: dict) -> pd.DataFrame:
     colunas_removidas = [col for col in colunas_deletar if col in df_out.columns]
     if colunas_removidas:
         df_out.drop(columns=colunas_removidas, inplace=True)
-        print(f"      🗑️ {len(colunas_removidas)} colunas removidas via 'colunas_deletar'.")
+        logger.info(f"      🗑️ {len(colunas_removidas)} colunas removidas via 'colunas_deletar'.")
 
     # --- 2. PRÉ-PROCESSAMENTO FINAL DE ROBUSTEZ ---
     for col in df_out.select_dtypes(include='object').columns:
@@ -146,15 +150,15 @@ def engenharia_final(df: pd.DataFrame, coluns_json: dict) -> pd.DataFrame:
 
     for col in df_out.columns:
         if df_out[col].isna().sum() > 0:
-            df_out[col].fillna(df_out[col].median(), inplace=True) # Fallback com mediana
+            df_out[col] = df_out[col].fillna(df_out[col].median()) # Fallback com mediana
 
     df_out.fillna(0, inplace=True) # Fallback final com 0
     df_out.replace([np.inf, -np.inf], 0, inplace=True)
-    print("      ✅ Codificação 'object', tratamento NaN/Inf finalizados.")
+    logger.info("      ✅ Codificação 'object', tratamento NaN/Inf finalizados.")
 
     # --- 3. CRIAÇÃO DE FEATURES AVANÇADAS (BASEADO EM CLUSTER) ---
     if 'Cluster' in df_out.columns:
-        print("      -> Criando features baseadas em Cluster...")
+        logger.info("      -> Criando features baseadas em Cluster...")
         CLUSTER_COL = 'Cluster'
         # One-Hot Encoding
         cluster_dummies = pd.get_dummies(df_out[CLUSTER_COL], prefix=CLUSTER_COL, dtype=int)
@@ -194,9 +198,9 @@ def engenharia_final(df: pd.DataFrame, coluns_json: dict) -> pd.DataFrame:
         # Limpeza final pós-engenharia
         df_out.replace([np.inf, -np.inf], 0, inplace=True)
         df_out.fillna(0, inplace=True)
-        print("      ✅ Features baseadas em Cluster criadas.")
+        logger.info("      ✅ Features baseadas em Cluster criadas.")
     else:
-        print("      ⚠️ Coluna 'Cluster' não encontrada, engenharia avançada ignorada.")
+        logger.warning("      ⚠️ Coluna 'Cluster' não encontrada, engenharia avançada ignorada.")
 
-    print("   ✅ Engenharia Final concluída.")
+    logger.info("   ✅ Engenharia Final concluída.")
     return df_out
\ No newline at end of file
@@ -1,8 +1,12 @@
 # backend/app/ml/preprocessing.py
 
+import logging
+
 import pandas as pd
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 # --- Funções de Limpeza e Transformação ---
 
 def remover_colunas_indesejadas(df: pd.DataFrame, colunas: list) -> pd.DataFrame:
@@ -10,7 +14,7 @@ def remover_colunas_indesejadas(df: pd.DataFrame, colunas: list) -> pd.DataFrame
     colunas_existentes = [col for col in colunas if col in df.columns]
     df_limpo = df.drop(columns=colunas_existentes, errors='ignore')
     if colunas_existentes:
-        print(f"   🗑️ Colunas removidas (se existiam): {colunas_existentes}")
+        logger.info(f"   🗑️ Colunas removidas (se existiam): {colunas_existentes}")
     return df_limpo
 
 def hex_para_rgb(hex_color):
@@ -37,22 +41,24 @@ def hex_para_rgb(hex_color):
     except (ValueError, TypeError):
         return 255, 255, 255 # Branco em caso de erro na conversão
 
-# --- FUNÇÃO CORRIGIDA ---
-def engenharia_features_cor(df: pd.DataFrame, colunas_hex_config: list) -> pd.DataFrame:
+# --- Versão linha a linha (referência para o kernel vetorizado abaixo) ---
+def engenharia_features_cor_linha_a_linha(df: pd.DataFrame, colunas_hex_config: list) -> pd.DataFrame:
     """
     Cria features RGB e derivadas (brilho, saturação, etc.) a partir de colunas HEX,
     replicando a lógica do Bloco 5 do notebook NewPipelineV2.
     Remove a coluna HEX original após o processamento.
+    Implementação original (`hex_para_rgb` via `apply` por célula), mantida como
+    referência de paridade para `engenharia_features_cor`.
     """
     df_eng = df.copy()
     # Identifica colunas de cor no DataFrame que estão na lista de configuração
     colunas_para_processar = [col for col in colunas_hex_config if col in df_eng.columns]
 
     if not colunas_para_processar:
-        print("   ⚠️ Nenhuma coluna de cor configurada ('colunas_cor' no JSON) encontrada no DataFrame. Pulando Bloco 5.")
+        logger.warning("   ⚠️ Nenhuma coluna de cor configurada ('colunas_cor' no JSON) encontrada no DataFrame. Pulando Bloco 5.")
         return df_eng
 
-    print(f"   -> Processando {len(colunas_para_processar)} colunas de cor: {colunas_para_processar}")
+    logger.info(f"   -> Processando {len(colunas_para_processar)} colunas de cor: {colunas_para_processar}")
     for coluna_hex in colunas_para_processar:
         # Aplica a conversão HEX -> RGB (com tratamento de erro robusto)
         rgb_tuples = df_eng[coluna_hex].apply(hex_para_rgb)
@@ -85,8 +91,139 @@ def engenharia_features_cor(df: pd.DataFrame, colunas_hex_config: list) -> pd.Da
 
         # Remove a coluna HEX original
         df_eng.drop(columns=[coluna_hex], inplace=True)
-        print(f"      ✅ Coluna '{coluna_hex}' processada (RGB + Derivadas).")
+        logger.info(f"      ✅ Coluna '{coluna_hex}' processada (RGB + Derivadas).")
+
+    return df_eng
+
+# --- Kernel vetorizado de cores ---
+
+_VALORES_INVALIDOS = ['DESCONHECIDO', 'NAN', 'NONE', '']
+_DIGITOS_HEX = np.full(0x80, -1, dtype=np.int16)
+_DIGITOS_HEX[ord('0'):ord('9') + 1] = np.arange(10)
+_DIGITOS_HEX[ord('A'):ord('F') + 1] = np.arange(10, 16)
+_DIGITOS_HEX[ord('a'):ord('f') + 1] = np.arange(10, 16)
+
+def _digitos_hex(codigos: np.ndarray) -> np.ndarray:
+    """Converte code points (uint32) em dígitos hexadecimais; -1 para qualquer outro caractere."""
+    digitos = _DIGITOS_HEX[np.minimum(codigos, 0x7F)]
+    digitos[codigos > 0x7F] = -1
+    return digitos
+
+def _rgb_de_digitos(digitos: np.ndarray) -> np.ndarray:
+    pares = digitos.reshape(-1, 3, 2).astype(np.int64)
+    return pares[:, :, 0] * 16 + pares[:, :, 1]
+
+def hex_para_rgb_vetorizado(textos: pd.Series) -> np.ndarray:
+    """
+    Versão vetorizada de `hex_para_rgb` para uma Series já normalizada
+    (`astype(str).str.strip().str.upper()`). Retorna uma matriz (n, 3) int64.
+    Os raros valores de 6 caracteres que não são hexadecimais puros passam por
+    `hex_para_rgb`, preservando exatamente o comportamento de `int(..., 16)`.
+    """
+    rgb = np.full((len(textos), 3), 255, dtype=np.int64) # Branco como padrão para inválidos/ausentes
+    invalido = textos.isin(_VALORES_INVALIDOS).to_numpy()
+    sem_prefixo = textos.str.removeprefix('#')
+    candidatos = np.flatnonzero(~invalido & (sem_prefixo.str.len() == 6).to_numpy())
+    if len(candidatos) == 0:
+        return rgb
+
+    digitos = _digitos_hex(sem_prefixo.to_numpy()[candidatos].astype('U6').view(np.uint32).reshape(-1, 6))
+    hex_puro = (digitos >= 0).all(axis=1)
+    rgb[candidatos[hex_puro]] = _rgb_de_digitos(digitos[hex_puro])
+    for posicao in candidatos[~hex_puro]:
+        rgb[posicao] = hex_para_rgb(textos.iat[posicao])
+    return rgb
+
+def decodificar_cores(valores: pd.Series) -> tuple:
+    """
+    Decodifica uma Series de cores HEX brutas de uma só vez.
+    Retorna (rgb (n, 3) int64, eh_branco, eh_preto) com a mesma semântica de
+    `hex_para_rgb` e das flags do Bloco 5.
+    Caminho rápido: valores exatamente no formato 'RRGGBB' ou '#RRGGBB' são lidos
+    direto dos code points e ausentes viram branco; o restante ('Desconhecido',
+    espaços, lixo) passa pela normalização com `.str` e por `hex_para_rgb_vetorizado`.
+    """
+    textos = valores.astype(str).to_numpy()
+    n = len(textos)
+    rgb = np.empty((n, 3), dtype=np.int64)
+    eh_branco = np.zeros(n, dtype=bool)
+    eh_preto = np.zeros(n, dtype=bool)
+
+    tamanhos = np.fromiter(map(len, textos), dtype=np.int64, count=n)
+    rapido = np.zeros(n, dtype=bool)
+    candidatos = np.flatnonzero((tamanhos == 6) | (tamanhos == 7))
+    if len(candidatos):
+        codigos = textos[candidatos].astype('U7').view(np.uint32).reshape(-1, 7)
+        com_hash = tamanhos[candidatos] == 7
+        digitos = _digitos_hex(np.where(com_hash[:, None], codigos[:, 1:], codigos[:, :6]))
+        formato_ok = (digitos >= 0).all(axis=1) & (~com_hash | (codigos[:, 0] == ord('#')))
+        posicoes = candidatos[formato_ok]
+        digitos = digitos[formato_ok]
+        rgb[posicoes] = _rgb_de_digitos(digitos)
+        eh_branco[posicoes] = (digitos == 15).all(axis=1)
+        eh_preto[posicoes] = (digitos == 0).all(axis=1)
+        rapido[posicoes] = True
+
+    ausentes = valores.isna().to_numpy() # NaN/None: branco, sem flags
+    rgb[ausentes] = 255
+    restantes = np.flatnonzero(~rapido & ~ausentes)
+    if len(restantes):
+        normalizados = pd.Series(textos[restantes]).str.strip().str.upper()
+        rgb[restantes] = hex_para_rgb_vetorizado(normalizados)
+        sem_hash = normalizados.str.replace('#', '', regex=False)
+        eh_branco[restantes] = (sem_hash == 'FFFFFF').to_numpy()
+        eh_preto[restantes] = (sem_hash == '000000').to_numpy()
+    return rgb, eh_branco, eh_preto
+
+def engenharia_features_cor(df: pd.DataFrame, colunas_hex_config: list) -> pd.DataFrame:
+    """
+    Cria features RGB e derivadas (brilho, saturação, etc.) a partir de colunas HEX,
+    replicando a lógica do Bloco 5 do notebook NewPipelineV2.
+    Remove a coluna HEX original após o processamento.
+    Todas as colunas de cor são decodificadas de uma só vez e as features são
+    montadas em um único passo (mesma saída de `engenharia_features_cor_linha_a_linha`).
+    """
+    # Identifica colunas de cor no DataFrame que estão na lista de configuração
+    colunas_para_processar = [col for col in colunas_hex_config if col in df.columns]
+
+    if not colunas_para_processar:
+        logger.warning("   ⚠️ Nenhuma coluna de cor configurada ('colunas_cor' no JSON) encontrada no DataFrame. Pulando Bloco 5.")
+        return df.copy()
+
+    logger.info(f"   -> Processando {len(colunas_para_processar)} colunas de cor: {colunas_para_processar}")
+    n = len(df)
+    # Empilha todas as colunas de cor em uma única Series para normalizar e decodificar juntas
+    empilhadas = pd.concat([df[col] for col in colunas_para_processar], ignore_index=True)
+    rgb, eh_branco, eh_preto = decodificar_cores(empilhadas)
+    rgb = rgb.reshape(len(colunas_para_processar), n, 3)
+    eh_branco = eh_branco.reshape(len(colunas_para_processar), n)
+    eh_preto = eh_preto.reshape(len(colunas_para_processar), n)
+
+    novas = {}
+    for i, coluna_hex in enumerate(colunas_para_processar):
+        r, g, b = rgb[i, :, 0], rgb[i, :, 1], rgb[i, :, 2]
+        saturacao = np.maximum(np.maximum(r, g), b) - np.minimum(np.minimum(r, g), b) # Saturação (simplificada como range)
+        r_max = (r >= g) & (r >= b)
+        g_max = (g > r) & (g >= b) # > R para desempate
+        novas[f'{coluna_hex}_R'] = r
+        novas[f'{coluna_hex}_G'] = g
+        novas[f'{coluna_hex}_B'] = b
+        novas[f'{coluna_hex}_brilho'] = (r + g + b) / 3
+        novas[f'{coluna_hex}_saturacao'] = saturacao
+        novas[f'{coluna_hex}_eh_branco'] = eh_branco[i].astype(int)
+        novas[f'{coluna_hex}_eh_preto'] = eh_preto[i].astype(int)
+        novas[f'{coluna_hex}_eh_cinza'] = (saturacao < 20).astype(int) # Limiar de 20 como no notebook
+        novas[f'{coluna_hex}_dominio_R'] = r_max.astype(int)
+        novas[f'{coluna_hex}_dominio_G'] = g_max.astype(int)
+        novas[f'{coluna_hex}_dominio_B'] = (~r_max & ~g_max).astype(int) # B domina se R e G não dominam
 
+    # Remove as colunas HEX originais e anexa todas as features de uma vez
+    df_eng = df.drop(columns=colunas_para_processar)
+    sobrescritas = [nome for nome in novas if nome in df_eng.columns]
+    for nome in sobrescritas:
+        df_eng[nome] = novas.pop(nome)
+    df_eng = pd.concat([df_eng, pd.DataFrame(novas, index=df.index)], axis=1, copy=False)
+    logger.info(f"      ✅ {len(colunas_para_processar)} colunas de cor processadas (RGB + Derivadas).")
     return df_eng
 
 # --- Outras Funções (Mantidas como estavam) ---
@@ -99,7 +236,7 @@ def converter_data_para_timestamp(df: pd.DataFrame, coluna_data: str) -> pd.Data
     if coluna_data in df_ts.columns:
         datetimes = pd.to_datetime(df_ts[coluna_data], format='%d/%m/%Y %H:%M:%S', errors='coerce')
         df_ts[coluna_data] = datetimes.astype('int64') // 10**9
-        print(f"      (Info: Coluna '{coluna_data}' convertida para timestamp, mas V2 usa features derivadas)")
+        logger.info(f"      (Info: Coluna '{coluna_data}' convertida para timestamp, mas V2 usa features derivadas)")
     return df_ts
 
 def converter_colunas_numericas_texto(df: pd.DataFrame) -> pd.DataFrame:
@@ -107,7 +244,7 @@ def converter_colunas_numericas_texto(df: pd.DataFrame) -> pd.DataFrame:
     # ESTA FUNÇÃO NÃO É MAIS USADA NA PIPELINE V2, que trata tipos de forma mais robusta
     # no Bloco 11. Mas mantemos por segurança.
     df_convertido = df.copy()
-    print("   -> Tentando converter colunas 'object' para numérico (se aplicável)...")
+    logger.info("   -> Tentando converter colunas 'object' para numérico (se aplicável)...")
     converted_cols = []
     for coluna in df_convertido.select_dtypes(include=['object']).columns:
         # Tenta a conversão, mas só aplica se for bem-sucedida para a maioria não-nula
@@ -116,5 +253,5 @@ def converter_colunas_numericas_texto(df: pd.DataFrame) -> pd.DataFrame:
              df_convertido[coluna] = converted_series
              converted_cols.append(coluna)
     if converted_cols:
-        print(f"      ✅ Colunas 'object' convertidas para numérico: {converted_cols}")
+        logger.info(f"      ✅ Colunas 'object' convertidas para numérico: {converted_cols}")
     return df_convertido
\ No newline at end of file
@@ -0,0 +1,54 @@
+# backend/app/ml/reference_stats.py
+
+import pickle
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+@dataclass
+class EstatisticasReferencia:
+    """
+    Estatísticas de lote usadas pela pipeline, fixadas de fora em vez de calculadas
+    sobre o DataFrame atual. Qualquer campo None (ou dicionário vazio) mantém o
+    comportamento original: a estatística é calculada sobre o lote recebido.
+    Permite que a execução em blocos reproduza o resultado do arquivo inteiro e,
+    gravadas como artefato (`salvar_estatisticas`), que cada linha seja pontuada
+    sem depender do arquivo em que chegou.
+    """
+    # Bloco 8: mediana de 'tempo_medio_questao' (velocidade_relativa)
+    mediana_tempo: Optional[float] = None
+    # Features de data: mínimo usado em 'dias_desde_inicio' (quando não há 'date_min' no artefato)
+    data_minima: Optional[pd.Timestamp] = None
+    # Features de data são criadas se houver ao menos uma data válida
+    tem_datas_validas: Optional[bool] = None
+    # Clustering: medianas usadas para preencher NaN nas features do cluster
+    medianas_cluster: Optional[Dict[str, float]] = None
+    # Bloco 11: categorias (ordenadas) de cada coluna 'object' codificada
+    categorias: Dict[str, List] = field(default_factory=dict)
+    # Bloco 11: mediana de preenchimento das colunas que têm NaN
+    medianas_finais: Dict[str, float] = field(default_factory=dict)
+    # Bloco 11: valores de cluster existentes (define as colunas Cluster_*)
+    clusters: Optional[List] = None
+    # Bloco 11: média de cada coluna numérica por cluster (índice = cluster)
+    medias_cluster: Optional[pd.DataFrame] = None
+
+# Arquivo opcional do conjunto de artefatos com as estatísticas de referência
+ARQUIVO_ESTATISTICAS = "estatisticas_referencia.pkl"
+
+def salvar_estatisticas(estatisticas: EstatisticasReferencia, caminho: Path) -> None:
+    """
+    Grava as estatísticas como um dicionário de tipos básicos (e um DataFrame),
+    para que o arquivo não dependa do caminho de importação desta classe.
+    """
+    with open(caminho, 'wb') as f:
+        pickle.dump({'versao_formato': 1, **asdict(estatisticas)}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+def carregar_estatisticas(caminho: Path) -> EstatisticasReferencia:
+    """ Lê um arquivo gravado por `salvar_estatisticas`. """
+    with open(caminho, 'rb') as f:
+        dados = pickle.load(f)
+    dados.pop('versao_formato', None)
+    campos = {f.name for f in fields(EstatisticasReferencia)}
+    return EstatisticasReferencia(**{k: v for k, v in dados.items() if k in campos})
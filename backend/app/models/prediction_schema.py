@@ -18,7 +18,7 @@ class PredictionRow(BaseModel):
     PREDICAO_Target2: Optional[float] = Field(None, description="Valor previsto para o Target 2.")
     PREDICAO_Target3: Optional[float] = Field(None, description="Valor previsto para o Target 3.")
     codigo_acesso: Optional[str] = Field(None, description="Código de acesso original do jogador.")
-    original_data: Dict[str, Any] = Field(..., description="Dados originais e features geradas para a linha.")
+    original_data: Dict[str, Any] = Field(..., description="Dados originais e features geradas para a linha (só as colunas pedidas em `fields`).")
 
 class AnalysisResult(BaseModel):
     """
@@ -32,4 +32,78 @@ class AnalysisResult(BaseModel):
     r2_score_target2: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 2, se disponível.")
     r2_score_target3: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 3, se disponível.")
     
-    correlation_heatmap_data: Optional[List[HeatmapDataRow]] = Field(None, description="Dados de correlação para o Heatmap (Features vs Predições).")
\ No newline at end of file
+    correlation_heatmap_data: Optional[List[HeatmapDataRow]] = Field(None, description="Dados de correlação para o Heatmap (Features vs Predições).")
+    model_version: Optional[str] = Field(None, description="Versão do conjunto de modelos (registro de modelos) que gerou o resultado.")
+
+class ColumnarAnalysisResult(BaseModel):
+    """
+    Schema da resposta colunar (`?format=columnar`): uma lista de valores por coluna
+    em vez de um objeto por linha. Documenta o payload serializado diretamente do NumPy
+    (NaN/Inf viram null); não é instanciado pelo serviço.
+    """
+    total_rows: int = Field(..., description="Número total de linhas no arquivo enviado.")
+    processed_rows: int = Field(..., description="Número de linhas processadas com sucesso.")
+    row_count: int = Field(..., description="Número de linhas em cada lista de 'columns'.")
+    columns: Dict[str, List[Any]] = Field(..., description="PREDICAO_Target*, codigo_acesso e as colunas de original_data, cada uma como lista de valores.")
+
+    r2_score_target1: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 1, se disponível.")
+    r2_score_target2: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 2, se disponível.")
+    r2_score_target3: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 3, se disponível.")
+
+    correlation_heatmap_data: Optional[List[HeatmapDataRow]] = Field(None, description="Dados de correlação para o Heatmap (Features vs Predições).")
+    model_version: Optional[str] = Field(None, description="Versão do conjunto de modelos (registro de modelos) que gerou o resultado.")
+
+
+class RowScoringRequest(BaseModel):
+    """
+    Corpo de `/predict/rows`: linhas no mesmo formato das colunas do arquivo de upload.
+    """
+    records: List[Dict[str, Any]] = Field(..., min_length=1, description="Uma linha por jogador, com as colunas do arquivo de upload (chave = nome da coluna).")
+
+class RowScoringResult(BaseModel):
+    """
+    Resposta de `/predict/rows`: as predições das linhas enviadas, na mesma ordem.
+    Sem R² nem heatmap (não fazem sentido para poucas linhas).
+    """
+    processed_rows: int = Field(..., description="Número de linhas processadas.")
+    predictions: List[PredictionRow] = Field(..., description="Lista com os resultados da predição para cada linha enviada.")
+    model_version: Optional[str] = Field(None, description="Versão do conjunto de modelos (registro de modelos) que gerou o resultado.")
+
+
+class AnalysisSummary(BaseModel):
+    """
+    Registro final da resposta em streaming (`/predict/upload-csv/stream`), enviado
+    como `{"summary": ...}` depois de todas as linhas de predição.
+    """
+    total_rows: int = Field(..., description="Número total de linhas no arquivo enviado.")
+    processed_rows: int = Field(..., description="Número de linhas processadas com sucesso.")
+
+    r2_score_target1: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 1, se disponível.")
+    r2_score_target2: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 2, se disponível.")
+    r2_score_target3: Optional[float] = Field(None, description="Score R² da Predição vs Real para Target 3, se disponível.")
+
+    correlation_heatmap_data: Optional[List[HeatmapDataRow]] = Field(None, description="Dados de correlação para o Heatmap (Features vs Predições).")
+    model_version: Optional[str] = Field(None, description="Versão do conjunto de modelos (registro de modelos) que gerou o resultado.")
+
+
+class JobStage(BaseModel):
+    """
+    Etapa da pipeline dentro de um job assíncrono.
+    """
+    name: str = Field(..., description="Nome da etapa (ex.: 'prepare_features', 'predict_targets').")
+    status: str = Field(..., description="'pending', 'running', 'done' ou 'failed'.")
+    duration_seconds: Optional[float] = Field(None, description="Duração da etapa, quando finalizada.")
+
+class JobStatus(BaseModel):
+    """
+    Status de um job de análise (`/predict/jobs`).
+    """
+    job_id: str = Field(..., description="Identificador do job.")
+    status: str = Field(..., description="'queued', 'running', 'succeeded' ou 'failed'.")
+    filename: str = Field(..., description="Nome do arquivo enviado.")
+    created_at: float = Field(..., description="Criação do job (epoch, segundos).")
+    updated_at: float = Field(..., description="Última atualização do job (epoch, segundos).")
+    finished_at: Optional[float] = Field(None, description="Fim do job (epoch, segundos); a limpeza por TTL conta a partir daqui.")
+    progress: float = Field(..., description="Fração de etapas concluídas (0 a 1).")
+    stages: List[JobStage] = Field(..., description="Progresso de cada etapa da pipeline.")
+    error: Optional[str] = Field(None, description="Mensagem de erro, se o job falhou.")
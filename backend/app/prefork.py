@@ -0,0 +1,199 @@
+# backend/app/prefork.py
+#
+# Servidor com vários workers que compartilham os artefatos de ML. O master carrega
+# (e aquece) a versão ativa uma única vez, cria a aplicação e o socket e só então
+# faz o fork dos workers: cada worker herda os modelos já desserializados e as
+# páginas de memória ficam compartilhadas (copy-on-write) enquanto ninguém as
+# altera. Com `uvicorn --workers N`, cada worker é um processo novo que
+# desserializa todos os artefatos de novo e a memória cresce com N.
+#
+# Ao subir, cada worker informa ao master o tempo do fork até aceitar conexões e a
+# memória (rss, pss, private, shared); o master registra o resumo no log. Depois,
+# cada worker expõe os mesmos números em /health/ready e /metrics. Workers que
+# morrem são recriados a partir do master, sem recarregar os artefatos.
+#
+# Só Linux/Unix (os.fork). A troca de versão por POST /models/{version}/activate é
+# recusada (409): valeria só para o worker que recebeu a requisição, e os workers
+# recriados voltariam à versão do master. Para trocar, defina settings.ML_MODEL_VERSION
+# (ou versions/ACTIVE) e reinicie.
+# Uso (a partir de backend/):
+#   python -m app.prefork [--workers 4] [--host 0.0.0.0] [--port 8000]
+
+import argparse
+import gc
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.services.instrumentation import memory_usage, process_info
+
+logging.basicConfig(level=settings.LOG_LEVEL)
+logger = logging.getLogger("app.prefork")
+
+class _WorkerServer(uvicorn.Server):
+    """ Servidor uvicorn de um worker: avisa o master quando passa a aceitar conexões. """
+
+    def __init__(self, config: uvicorn.Config, report_fd: int, forked_at: float):
+        super().__init__(config)
+        self.report_fd = report_fd
+        self.forked_at = forked_at
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        process_info.startup_seconds = round(time.monotonic() - self.forked_at, 4)
+        report = {"worker": process_info.worker, "pid": os.getpid(),
+                  "startup_seconds": process_info.startup_seconds, "memory_bytes": memory_usage()}
+        # Uma linha curta (< PIPE_BUF): a escrita no pipe é atômica entre os workers
+        os.write(self.report_fd, (json.dumps(report) + "\n").encode("utf-8"))
+
+def _run_worker(index: int, app, sock: socket.socket, report_fd: int, forked_at: float) -> None:
+    """ Corpo do processo filho: roda o uvicorn no socket herdado e termina com os._exit. """
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    process_info.mode, process_info.worker = "prefork", index
+    status = 0
+    try:
+        config = uvicorn.Config(app, log_level=settings.LOG_LEVEL.lower(), lifespan="on")
+        _WorkerServer(config, report_fd, forked_at).run(sockets=[sock])
+    except BaseException:
+        logger.exception(f"❌ Worker {index} terminou com erro.")
+        status = 1
+    finally:
+        os._exit(status)
+
+def _format_memory(memory: Optional[Dict[str, int]]) -> str:
+    if not memory:
+        return "memória indisponível"
+    return " ".join(f"{kind} {value / 1e6:7.1f} MB" for kind, value in memory.items())
+
+class PreforkMaster:
+    """ Carrega os artefatos, faz o fork dos workers e os mantém vivos até SIGINT/SIGTERM. """
+
+    def __init__(self, workers: int, host: str, port: int):
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.children: Dict[int, int] = {} # pid -> índice do worker
+        self.reports: Dict[int, dict] = {} # índice do worker -> relatório de subida
+        self.stopping = False
+
+    def preload(self) -> None:
+        """ Carrega e aquece a versão ativa e cria a aplicação, antes de qualquer fork. """
+        from app.services.model_registry import model_registry
+        from app.main import create_app
+
+        start = time.perf_counter()
+        service = model_registry.active
+        service.start_loading(warm_up=settings.WARM_UP_ON_STARTUP)
+        service.ensure_loaded()
+        self.app = create_app()
+        self.preload_seconds = time.perf_counter() - start
+        # Objetos vivos vão para a geração permanente do GC: as coletas dos workers não
+        # escrevem nos cabeçalhos deles, o que copiaria as páginas compartilhadas
+        gc.collect()
+        gc.freeze()
+        self.master_memory = memory_usage()
+        logger.info(f"✅ Artefatos da versão '{service.version}' carregados no master em {self.preload_seconds:.2f}s "
+                    f"({_format_memory(self.master_memory)}).")
+
+    def bind(self) -> None:
+        self.sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.listen(2048)
+        self.sock.set_inheritable(True)
+        self.report_read, self.report_write = os.pipe()
+
+    def spawn(self, index: int) -> None:
+        forked_at = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            os.close(self.report_read)
+            _run_worker(index, self.app, self.sock, self.report_write, forked_at)
+        self.children[pid] = index
+
+    def _stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _read_reports(self, buffer: bytes) -> bytes:
+        buffer += os.read(self.report_read, 65536)
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            report = json.loads(line)
+            self.reports[report["worker"]] = report
+            logger.info(f"   worker {report['worker']} (pid {report['pid']}): pronto em {report['startup_seconds']:.2f}s, "
+                        f"{_format_memory(report['memory_bytes'])}")
+            if len(self.reports) == self.workers:
+                self._log_summary()
+        return buffer
+
+    def _log_summary(self) -> None:
+        memories = [r["memory_bytes"] for r in self.reports.values() if r["memory_bytes"]]
+        startups = [r["startup_seconds"] for r in self.reports.values()]
+        summary = f"🚀 {self.workers} worker(s) em http://{self.host}:{self.port}; subida de {min(startups):.2f}s a {max(startups):.2f}s"
+        master = memory_usage() # Agora compartilhado com os workers: o pss do master também caiu
+        if memories and master:
+            pss = master["pss"] + sum(m["pss"] for m in memories)
+            rss = sum(m["rss"] for m in memories)
+            shared = sum(m["shared"] for m in memories) / len(memories)
+            summary += (f"; memória total (pss, master + workers) {pss / 1e6:.1f} MB contra {rss / 1e6:.1f} MB "
+                        f"somando o rss dos workers ({shared / 1e6:.1f} MB compartilhados por worker)")
+        logger.info(summary + ".")
+
+    def run(self) -> None:
+        self.preload()
+        self.bind()
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        buffer = b""
+        while not self.stopping:
+            readable, _, _ = select.select([self.report_read], [], [], 0.5)
+            if readable:
+                buffer = self._read_reports(buffer)
+            while self.children:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+                if pid == 0:
+                    break
+                index = self.children.pop(pid, None)
+                if index is not None and not self.stopping:
+                    logger.warning(f"⚠️ Worker {index} (pid {pid}) terminou (status {status}); criando outro.")
+                    self.reports.pop(index, None)
+                    self.spawn(index)
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        logger.info(f"Encerrando {len(self.children)} worker(s)...")
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.children.clear()
+        self.sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor prefork: artefatos carregados uma vez e compartilhados entre os workers.")
+    parser.add_argument('--workers', type=int, default=2, help="Processos que atendem requisições. Padrão: 2.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    PreforkMaster(args.workers, args.host, args.port).run()
+
+if __name__ == '__main__':
+    main()
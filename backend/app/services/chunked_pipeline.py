@@ -0,0 +1,353 @@
+# backend/app/services/chunked_pipeline.py
+
+import logging
+import itertools
+from collections import deque
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.ml import feature_builder
+from app.ml.reference_stats import EstatisticasReferencia
+from app.services.pipeline_output import PipelineOutput
+from app.services.streaming_metrics import CorrelationAccumulator, R2Accumulator
+
+logger = logging.getLogger(__name__)
+
+DATE_COLUMN = 'Data/Hora Último'
+DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+
+def common_dtype(dtypes: List[np.dtype]) -> np.dtype:
+    """
+    Tipo da coluna do arquivo inteiro a partir dos tipos inferidos em cada bloco,
+    como o pandas faz ao juntar os blocos internos do leitor de CSV:
+    numéricos são promovidos, qualquer outra mistura vira 'object'.
+    """
+    unique = list(dict.fromkeys(dtypes))
+    if len(unique) == 1:
+        return unique[0]
+    if all(dtype.kind in 'iuf' for dtype in unique):
+        return np.result_type(*unique)
+    return np.dtype(object)
+
+def apply_dtypes(df: pd.DataFrame, dtypes: Dict[str, np.dtype]) -> pd.DataFrame:
+    """
+    Converte as colunas cujo tipo no bloco difere do tipo do arquivo inteiro. Uma
+    coluna numérica no bloco e de texto no arquivo volta a ser texto (como no
+    arquivo inteiro), não uma mistura de números e strings.
+    """
+    for col, dtype in dtypes.items():
+        if col in df.columns and df[col].dtype != dtype:
+            if dtype == object and df[col].dtype.kind in 'iuf':
+                df[col] = df[col].astype(object).where(df[col].isna(), df[col].astype(str))
+            else:
+                df[col] = df[col].astype(dtype)
+    return df
+
+def _record_dtypes(seen: Dict[str, List[np.dtype]], df: pd.DataFrame) -> None:
+    for col, dtype in df.dtypes.items():
+        seen.setdefault(col, []).append(dtype)
+
+def _ordered_categories(values: Dict) -> list:
+    """ Mesma ordem de `pd.Categorical`: ordenada, ou de aparição quando não ordenável. """
+    try:
+        return sorted(values)
+    except TypeError:
+        return list(values)
+
+
+class ChunkedPipelineRun:
+    """
+    Executa a pipeline de predição sobre os blocos de linhas de `chunks`.
+
+    Cada etapa da pipeline roda bloco a bloco, mas as estatísticas que dependem
+    do lote (mediana de tempo, data mínima, medianas do clustering, categorias,
+    medianas e médias por cluster da engenharia final) são calculadas sobre o
+    arquivo inteiro em passadas sobre blocos gravados em disco. Assim o resultado
+    é o mesmo do arquivo inteiro, com memória limitada a um bloco mais as poucas
+    colunas necessárias para essas estatísticas.
+
+    `prepare()` executa as passadas de estatística; iterar sobre a instância gera
+    um PipelineOutput por bloco. Ao final da iteração, `r2_scores` e
+    `heatmap_data` valem para o arquivo inteiro.
+
+    Se o serviço tem estatísticas de referência (`service.reference_stats`), elas
+    substituem as do arquivo: não há passadas nem blocos em disco, e cada bloco é
+    pontuado assim que é lido.
+
+    Com `complete_statistics=True` (gerador do artefato de referência), as
+    medianas de preenchimento e as médias por cluster cobrem todas as colunas,
+    não só as que têm NaN neste arquivo ou que algum modelo usa.
+
+    Com estatísticas de referência, um arquivo também pode ser dividido em shards
+    (faixas de linhas) executados em processos diferentes: `start_row` é a posição
+    da primeira linha do shard no arquivo, e `r2_accumulator`/`heatmap_accumulator`
+    de cada shard, combinados em ordem com `merge`, dão o mesmo R² e heatmap do
+    arquivo inteiro.
+    """
+
+    def __init__(self, service, chunks: Iterable[pd.DataFrame], spill_dir: Optional[Path] = None,
+                 complete_statistics: bool = False, start_row: int = 0):
+        self.service = service
+        self.chunks = chunks
+        self.spill_dir = spill_dir or settings.PIPELINE_SPILL_DIR
+        self.complete_statistics = complete_statistics
+        self.reference_stats: Optional[EstatisticasReferencia] = None if complete_statistics else service.reference_stats
+        if start_row and self.reference_stats is None:
+            raise ValueError("Shards (start_row > 0) exigem estatísticas de referência (settings.USE_REFERENCE_STATS).")
+        self.start_row = start_row
+        self.total_rows = 0
+        self.r2_scores: Dict[str, Optional[float]] = {'Target1': None, 'Target2': None, 'Target3': None}
+        self.heatmap_data: Optional[List[dict]] = None
+        # Estatísticas acumuladas do R² e do heatmap (disponíveis ao fim da iteração; None se o heatmap falhou)
+        self.r2_accumulator: Optional[R2Accumulator] = None
+        self.heatmap_accumulator: Optional[CorrelationAccumulator] = None
+        self.model_version: Optional[str] = service.version
+        self._workdir: Optional[Path] = None
+        self._n_chunks = 0
+        # Targets reais de cada bloco lido, consumidos na ordem em que os blocos são preditos
+        self._y_true: Deque[Dict[str, np.ndarray]] = deque()
+        self._estatisticas: Optional[EstatisticasReferencia] = None
+        self._prepared_dtypes: Dict[str, np.dtype] = {}
+        self._pending_chunks: Optional[Iterator[pd.DataFrame]] = None
+
+    @property
+    def statistics(self) -> Optional[EstatisticasReferencia]:
+        """ Estatísticas usadas pela execução (disponíveis após `prepare()`). """
+        return self._estatisticas
+
+    # --- Arquivos temporários dos blocos ---
+
+    def _path(self, stage: str, i: int) -> Path:
+        return self._workdir / f"{stage}_{i:06d}.pkl"
+
+    def _dump(self, obj, stage: str, i: int) -> None:
+        with open(self._path(stage, i), 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load(self, stage: str, i: int, remove: bool = False):
+        path = self._path(stage, i)
+        with open(path, 'rb') as f:
+            obj = pickle.load(f)
+        if remove:
+            path.unlink()
+        return obj
+
+    def close(self) -> None:
+        """ Remove os blocos gravados em disco. """
+        if self._workdir is not None:
+            shutil.rmtree(self._workdir, ignore_errors=True)
+            self._workdir = None
+
+    # --- Passadas de estatística ---
+
+    def prepare(self) -> "ChunkedPipelineRun":
+        """ Lê todos os blocos e fixa as estatísticas do arquivo inteiro. """
+        if self._estatisticas is not None:
+            return self
+        if self.reference_stats is not None:
+            return self._prepare_reference()
+        self._workdir = Path(tempfile.mkdtemp(prefix="insightquest_chunks_", dir=self.spill_dir))
+        try:
+            logger.info("🚀 Iniciando Pipeline de Predição V2 (em blocos)...")
+            estatisticas = EstatisticasReferencia()
+            self._read_source(estatisticas)
+            self._prepare_chunks(estatisticas)
+            self._cluster_chunks(estatisticas)
+            self._estatisticas = estatisticas
+            logger.info(f"   ✅ Estatísticas do arquivo calculadas ({self.total_rows} linhas, {self._n_chunks} blocos).")
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def _prepare_reference(self) -> "ChunkedPipelineRun":
+        """
+        Modo de referência: nada a calcular. Lê só até o primeiro bloco com dados,
+        para que um arquivo vazio falhe aqui (antes do envio da resposta).
+        """
+        logger.info("🚀 Iniciando Pipeline de Predição V2 (em blocos, estatísticas de referência)...")
+        chunks = iter(self.chunks)
+        for chunk in chunks:
+            if not chunk.empty:
+                self._pending_chunks = itertools.chain([chunk], chunks)
+                break
+        else:
+            raise pd.errors.EmptyDataError("O arquivo está vazio ou não pôde ser lido.")
+        self._estatisticas = self.reference_stats
+        return self
+
+    def _read_source(self, estatisticas: EstatisticasReferencia) -> None:
+        """ Passada 1: grava os blocos brutos; tipos das colunas, datas e targets reais. """
+        raw_dtypes: Dict[str, List[np.dtype]] = {}
+        data_minima = None
+        tem_datas_validas = False
+        for chunk in self.chunks:
+            if chunk.empty:
+                continue
+            _record_dtypes(raw_dtypes, chunk)
+            if DATE_COLUMN in chunk.columns:
+                datas = pd.to_datetime(chunk[DATE_COLUMN], format=DATE_FORMAT, errors='coerce')
+                if datas.notna().any():
+                    tem_datas_validas = True
+                    minimo = datas.min()
+                    data_minima = minimo if data_minima is None else min(data_minima, minimo)
+            self._y_true.append(self._targets_of(chunk))
+            self._dump(chunk, 'raw', self._n_chunks)
+            self._n_chunks += 1
+            self.total_rows += len(chunk)
+
+        if self._n_chunks == 0:
+            raise pd.errors.EmptyDataError("O arquivo está vazio ou não pôde ser lido.")
+
+        self._raw_dtypes = {col: common_dtype(dtypes) for col, dtypes in raw_dtypes.items()}
+        estatisticas.tem_datas_validas = tem_datas_validas
+        estatisticas.data_minima = data_minima
+
+    def _prepare_chunks(self, estatisticas: EstatisticasReferencia) -> None:
+        """ Passada 2: limpeza, cores, datas e Blocos 7-9; coleta tempo e categorias. """
+        prepared_dtypes: Dict[str, List[np.dtype]] = {}
+        tempos = []
+        categorias: Dict[str, Dict] = {}
+        colunas_com_nan = set()
+        for i in range(self._n_chunks):
+            chunk = apply_dtypes(self._load('raw', i, remove=True), self._raw_dtypes)
+            df_pipeline, codigos = self.service.prepare_features(chunk, estatisticas)
+            _record_dtypes(prepared_dtypes, df_pipeline)
+            if 'velocidade_relativa' in df_pipeline.columns:
+                tempos.append(df_pipeline['tempo_medio_questao'].to_numpy())
+            for col in df_pipeline.select_dtypes(include='object').columns:
+                categorias.setdefault(col, {}).update(dict.fromkeys(df_pipeline[col].dropna().unique()))
+            colunas_com_nan.update(df_pipeline.columns if self.complete_statistics else df_pipeline.columns[df_pipeline.isna().any()])
+            self._dump((df_pipeline, codigos), 'prepared', i)
+
+        self._prepared_dtypes = {col: common_dtype(dtypes) for col, dtypes in prepared_dtypes.items()}
+        # 'velocidade_relativa' é recalculada com a mediana global: NaN onde o tempo é NaN
+        colunas_com_nan.discard('velocidade_relativa')
+        if 'tempo_medio_questao' in colunas_com_nan and 'velocidade_relativa' in self._prepared_dtypes:
+            colunas_com_nan.add('velocidade_relativa')
+        self._colunas_com_nan = colunas_com_nan
+        if tempos:
+            estatisticas.mediana_tempo = pd.Series(np.concatenate(tempos)).median()
+        estatisticas.categorias = {col: _ordered_categories(valores) for col, valores in categorias.items()}
+
+    def _load_prepared(self, i: int):
+        df_pipeline, codigos = self._load('prepared', i)
+        df_pipeline = apply_dtypes(df_pipeline, self._prepared_dtypes)
+        if 'velocidade_relativa' in df_pipeline.columns:
+            feature_builder.recalcular_velocidade_relativa(df_pipeline, self._mediana_tempo)
+        return df_pipeline, codigos
+
+    def _cluster_chunks(self, estatisticas: EstatisticasReferencia) -> None:
+        """
+        Passada 3: medianas do clustering e medianas de preenchimento da engenharia final.
+        Passada 4: clusters de cada linha e soma/contagem por cluster (médias do arquivo).
+        """
+        self._mediana_tempo = estatisticas.mediana_tempo
+        service = self.service
+        deletar = set(service.coluns_json.get('colunas_deletar', []))
+        usa_clustering = bool(service.cluster_model and service.cluster_scaler and service.cluster_features)
+
+        # Só as colunas com NaN em algum bloco precisam da mediana do arquivo inteiro
+        colunas_com_nan = [col for col in self._colunas_com_nan if col not in deletar]
+        features_cluster = []
+        valores_finais: Dict[str, List[np.ndarray]] = {col: [] for col in colunas_com_nan}
+        for i in range(self._n_chunks):
+            df_pipeline, _ = self._load_prepared(i)
+            if usa_clustering and all(f in df_pipeline.columns for f in service.cluster_features):
+                features_cluster.append(df_pipeline[service.cluster_features].to_numpy(dtype=np.float64))
+            for col in colunas_com_nan:
+                valores_finais[col].append(feature_builder.valores_base(df_pipeline[col], estatisticas.categorias.get(col)))
+
+        if features_cluster:
+            matriz = np.concatenate(features_cluster)
+            estatisticas.medianas_cluster = pd.DataFrame(matriz, columns=service.cluster_features).median().to_dict()
+        # Completas: também colunas inteiras, que podem ter NaN (ou categoria nova) em outro arquivo
+        tipos_mediana = 'iufc' if self.complete_statistics else 'fc'
+        estatisticas.medianas_finais = {
+            col: pd.Series(np.concatenate(valores)).median()
+            for col, valores in valores_finais.items()
+            if np.concatenate(valores).dtype.kind in tipos_mediana
+        }
+        del features_cluster, valores_finais
+
+        somas = None
+        contagens = None
+        necessarias = None if self.complete_statistics else service.pipeline_features
+        for i in range(self._n_chunks):
+            df_pipeline, codigos = self._load_prepared(i)
+            df_pipeline = service.assign_clusters(df_pipeline, estatisticas)
+            somas_bloco, contagens_bloco = feature_builder.somar_por_cluster(
+                df_pipeline, service.coluns_json, estatisticas, necessarias, service.final_features_plan(df_pipeline))
+            somas = somas_bloco if somas is None else somas.add(somas_bloco, fill_value=0)
+            contagens = contagens_bloco if contagens is None else contagens.add(contagens_bloco, fill_value=0)
+            self._dump((df_pipeline, codigos), 'prepared', i)
+
+        estatisticas.clusters = somas.index.tolist()
+        estatisticas.medias_cluster = somas.div(contagens, axis=0)
+
+    # --- Passada final: engenharia, predição e saída por bloco ---
+
+    def _prepared_chunks(self) -> Iterator[tuple]:
+        """ (df_pipeline com Cluster, códigos) de cada bloco, na ordem do arquivo. """
+        if self._pending_chunks is None:
+            for i in range(self._n_chunks):
+                yield self._load('prepared', i, remove=True)
+            return
+        # Modo de referência: cada bloco passa direto pela pipeline, sem disco
+        service = self.service
+        chunks, self._pending_chunks = self._pending_chunks, None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            self._n_chunks += 1
+            self.total_rows += len(chunk)
+            self._y_true.append(self._targets_of(chunk))
+            df_pipeline, codigos = service.prepare_features(chunk, self._estatisticas)
+            yield service.assign_clusters(df_pipeline, self._estatisticas), codigos
+
+    def _targets_of(self, chunk: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """ Valores reais dos targets presentes no bloco, já numéricos (texto inválido vira NaN). """
+        return {
+            target: pd.to_numeric(chunk[target], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            for target in self.service.targets if target in chunk.columns
+        }
+
+    def __iter__(self) -> Iterator[PipelineOutput]:
+        self.prepare()
+        service = self.service
+        # R² e heatmap acumulados bloco a bloco (ver `streaming_metrics`): mesmo resultado do arquivo inteiro
+        r2 = service.r2_accumulator(self.start_row)
+        heatmap = service.heatmap_accumulator(self.start_row)
+        heatmap_failed = False
+        try:
+            for df_pipeline, codigos in self._prepared_chunks():
+                df_pipeline = service.build_final_features(df_pipeline, self._estatisticas)
+                predictions = service.predict_targets(df_pipeline)
+                r2.update(self._y_true.popleft(), predictions, len(df_pipeline))
+                service.attach_predictions(df_pipeline, predictions, codigos)
+                if not heatmap_failed:
+                    try:
+                        heatmap.update(df_pipeline)
+                    except Exception as e:
+                        logger.warning(f"         ⚠️ Erro ao calcular heatmap de correlação: {e}")
+                        heatmap_failed = True
+                yield PipelineOutput(
+                    df_pipeline=df_pipeline,
+                    total_rows=len(df_pipeline),
+                    r2_scores={},
+                    heatmap_data=None
+                )
+        finally:
+            self.close()
+
+        self.r2_accumulator = r2
+        self.heatmap_accumulator = None if heatmap_failed else heatmap
+        self.r2_scores = service.finish_r2_scores(r2)
+        self.heatmap_data = None if heatmap_failed else service.finish_heatmap(heatmap)
@@ -0,0 +1,89 @@
+# backend/app/services/columnar_export.py
+
+import io
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from app.services.columnar_response import CODIGO_COLUMN, PREDICTION_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pyarrow é opcional: sem ele, a exportação fica indisponível
+    pa = None
+
+# Formato -> (media type, extensão do arquivo baixado)
+EXPORT_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+# Compressões aceitas por formato ('none' = sem compressão)
+EXPORT_COMPRESSIONS = {
+    'parquet': ['none', 'snappy', 'gzip', 'zstd', 'lz4', 'brotli'],
+    'arrow': ['none', 'lz4', 'zstd'],
+}
+
+class ExportUnavailableError(RuntimeError):
+    """A exportação colunar exige o pyarrow, que não está instalado."""
+
+class UnknownFeaturesError(ValueError):
+    """Features pedidas na exportação que não existem no DataFrame da pipeline."""
+
+def check_export_options(export_format: str, compression: str) -> None:
+    """ Lança ExportUnavailableError sem pyarrow e ValueError para formato/compressão inválidos. """
+    if pa is None:
+        raise ExportUnavailableError("A exportação em Parquet/Arrow IPC requer o pacote pyarrow.")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportação inválido: '{export_format}'. Use {', '.join(EXPORT_FORMATS)}.")
+    if compression not in EXPORT_COMPRESSIONS[export_format]:
+        raise ValueError(
+            f"Compressão '{compression}' não suportada em {export_format}. "
+            f"Use {', '.join(EXPORT_COMPRESSIONS[export_format])}."
+        )
+
+def build_table(df_pipeline: pd.DataFrame, features: List[str]) -> 'pa.Table':
+    """
+    Tabela Arrow com as predições, `codigo_acesso` (texto) e as `features` pedidas,
+    convertida coluna a coluna do DataFrame (sem objetos por linha). Lança
+    UnknownFeaturesError se alguma feature não estiver em `df_pipeline`.
+    """
+    missing = [f for f in features if f not in df_pipeline.columns]
+    if missing:
+        raise UnknownFeaturesError(
+            f"Features inexistentes ou não calculadas nesta pipeline: {', '.join(missing)}."
+        )
+    arrays, names = [], []
+    for col in PREDICTION_COLUMNS:
+        if col in df_pipeline.columns:
+            arrays.append(pa.array(df_pipeline[col].to_numpy(), from_pandas=True))
+            names.append(col)
+    if CODIGO_COLUMN in df_pipeline.columns:
+        codigos = df_pipeline[CODIGO_COLUMN]
+        arrays.append(pa.array(codigos.astype(str).where(codigos.notna(), None), type=pa.string()))
+    else:
+        arrays.append(pa.nulls(len(df_pipeline), type=pa.string()))
+    names.append('codigo_acesso')
+    for col in features:
+        if col not in PREDICTION_COLUMNS and col != CODIGO_COLUMN:
+            arrays.append(pa.Array.from_pandas(df_pipeline[col]))
+            names.append(col)
+    return pa.Table.from_arrays(arrays, names=names)
+
+def write_tables(tables: Iterable['pa.Table'], export_format: str, compression: str) -> bytes:
+    """
+    Grava as tabelas (uma por bloco, na ordem) em um único arquivo Parquet ou
+    Arrow IPC (formato de arquivo). Tipos que variam entre blocos (ex.: int64 em
+    um bloco e float64 em outro, por causa de NaN) são unificados antes da gravação.
+    """
+    tables = list(tables)
+    table = tables[0] if len(tables) == 1 else pa.concat_tables(tables, promote_options='permissive')
+    codec: Optional[str] = None if compression == 'none' else compression
+    sink = io.BytesIO()
+    if export_format == 'parquet':
+        pq.write_table(table, sink, compression=codec or 'none')
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
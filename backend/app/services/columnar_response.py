@@ -0,0 +1,101 @@
+# backend/app/services/columnar_response.py
+
+import json
+from typing import Any, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+from app.services.pipeline_output import PipelineOutput
+from app.services.response_projection import ALL_COLUMNS, Projection
+
+PREDICTION_COLUMNS = ['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3']
+CODIGO_COLUMN = 'Código de Acesso (Original)'
+
+def column_to_list(values: Any) -> List[Any]:
+    """
+    Converte uma coluna (Series ou ndarray) em lista JSON-compatível direto do NumPy.
+    NaN e ±Inf viram None; inteiros e floats NumPy viram tipos nativos via `tolist()`.
+    """
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    kind = values.dtype.kind
+    if kind in 'iub':
+        return values.tolist()
+    if kind == 'f':
+        invalid = ~np.isfinite(values)
+        if not invalid.any():
+            return values.tolist()
+        as_object = values.astype(object)
+        as_object[invalid] = None
+        return as_object.tolist()
+    if kind == 'O':
+        as_object = values.copy()
+        as_object[pd.isna(values)] = None
+        return as_object.tolist()
+    # Datas e demais tipos: representação textual, ausentes como None
+    series = pd.Series(values)
+    return series.astype(str).where(series.notna(), None).tolist()
+
+def build_columns(df_pipeline: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> dict:
+    """
+    Monta o dicionário coluna -> lista de valores da resposta colunar:
+    predições, codigo_acesso e em seguida as mesmas colunas de `original_data`
+    (só as de `projection`).
+    """
+    columns = {}
+    for col in PREDICTION_COLUMNS:
+        if col in df_pipeline.columns:
+            columns[col] = column_to_list(df_pipeline[col])
+    if CODIGO_COLUMN in df_pipeline.columns:
+        codigos = df_pipeline[CODIGO_COLUMN]
+        columns['codigo_acesso'] = codigos.astype(str).where(codigos.notna(), None).tolist()
+    else:
+        columns['codigo_acesso'] = [None] * len(df_pipeline)
+    for col in projection.select(c for c in df_pipeline.columns if c not in PREDICTION_COLUMNS):
+        columns[col] = column_to_list(df_pipeline[col])
+    return columns
+
+def serialize(output: PipelineOutput, projection: Projection = ALL_COLUMNS) -> bytes:
+    """
+    Serializa o resultado da pipeline no formato colunar (`?format=columnar`),
+    sem criar objetos por linha nem passar pela validação do Pydantic.
+    As chaves seguem `ColumnarAnalysisResult`.
+    """
+    df_pipeline = output.df_pipeline
+    payload = {
+        'total_rows': output.total_rows,
+        'processed_rows': len(df_pipeline),
+        'row_count': len(df_pipeline),
+        'columns': build_columns(df_pipeline, projection),
+        'r2_score_target1': output.r2_scores.get('Target1'),
+        'r2_score_target2': output.r2_scores.get('Target2'),
+        'r2_score_target3': output.r2_scores.get('Target3'),
+        'correlation_heatmap_data': output.heatmap_data,
+        'model_version': output.model_version,
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def serialize_chunks(run: Iterable[PipelineOutput], projection: Projection = ALL_COLUMNS) -> bytes:
+    """
+    Resposta colunar de uma execução em blocos (`ChunkedPipelineRun`): as listas de
+    cada bloco são concatenadas à medida que os blocos ficam prontos. O R² e o
+    heatmap são lidos da execução depois do último bloco.
+    """
+    columns = {}
+    for output in run:
+        for col, values in build_columns(output.df_pipeline, projection).items():
+            columns.setdefault(col, []).extend(values)
+    row_count = len(columns.get('codigo_acesso', []))
+    payload = {
+        'total_rows': run.total_rows,
+        'processed_rows': row_count,
+        'row_count': row_count,
+        'columns': columns,
+        'r2_score_target1': run.r2_scores.get('Target1'),
+        'r2_score_target2': run.r2_scores.get('Target2'),
+        'r2_score_target3': run.r2_scores.get('Target3'),
+        'correlation_heatmap_data': run.heatmap_data,
+        'model_version': run.model_version,
+    }
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
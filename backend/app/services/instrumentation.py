@@ -0,0 +1,229 @@
+# backend/app/services/instrumentation.py
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+
+# Limites superiores dos buckets de cada histograma
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+MEMORY_BUCKETS = (0, 1 << 20, 10 << 20, 50 << 20, 100 << 20, 250 << 20, 500 << 20, 1 << 30, 4 << 30)
+FRAME_BUCKETS = MEMORY_BUCKETS[1:]
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def rss_bytes() -> Optional[int]:
+    """ Memória residente do processo (Linux, via /proc); None onde não estiver disponível. """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+# Campos de /proc/self/smaps_rollup somados em cada medida de `memory_usage`
+_SMAPS_FIELDS = {
+    'rss': ('Rss',),
+    'pss': ('Pss',),
+    'private': ('Private_Clean', 'Private_Dirty'),
+    'shared': ('Shared_Clean', 'Shared_Dirty'),
+}
+
+def memory_usage() -> Optional[Dict[str, int]]:
+    """
+    Memória do processo em bytes (Linux, via /proc): `rss` (residente), `pss`
+    (proporcional: cada página compartilhada dividida entre os processos que a
+    usam), `private` (só deste processo) e `shared` (residente e compartilhada,
+    ex.: artefatos herdados do master no modo prefork). None onde não estiver disponível.
+    """
+    try:
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            values = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {name: sum(values.get(field, 0) for field in fields) for name, fields in _SMAPS_FIELDS.items()}
+
+@dataclass
+class ProcessInfo:
+    """
+    Como o processo do servidor subiu: 'single' (uvicorn comum, carrega os próprios
+    artefatos) ou 'prefork' (worker de `app.prefork`, com os artefatos herdados do
+    master). `startup_seconds` é o tempo do fork até o worker aceitar conexões.
+    """
+    mode: str = 'single'
+    worker: Optional[int] = None
+    startup_seconds: Optional[float] = None
+
+    def describe(self) -> dict:
+        return {
+            "pid": os.getpid(),
+            "mode": self.mode,
+            "worker": self.worker,
+            "startup_seconds": self.startup_seconds,
+            "memory_bytes": memory_usage(),
+        }
+
+    def render(self) -> str:
+        """ Gauges de memória e de tempo de subida do processo, no formato do Prometheus. """
+        lines = ["# HELP process_memory_bytes Memória do processo por tipo (rss, pss, private, shared).",
+                 "# TYPE process_memory_bytes gauge"]
+        for kind, value in (memory_usage() or {}).items():
+            lines.append(f'process_memory_bytes{{kind="{kind}"}} {value}')
+        if self.startup_seconds is not None:
+            lines += ["# HELP process_startup_seconds Tempo do fork até o worker prefork aceitar conexões.",
+                      "# TYPE process_startup_seconds gauge",
+                      f"process_startup_seconds {self.startup_seconds}"]
+        return "\n".join(lines) + "\n"
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """ Memória ocupada pelo DataFrame, incluindo o conteúdo das colunas de texto. """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class Histogram:
+    """ Histograma com um rótulo ('stage'), no formato de exposição do Prometheus. """
+
+    def __init__(self, name: str, description: str, buckets: tuple):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        # stage -> (contagem por bucket, soma, total)
+        self._series: Dict[str, Tuple[List[int], float, int]] = {}
+
+    def observe(self, stage: str, value: float) -> None:
+        # Chamado com o lock de PipelineMetrics adquirido
+        counts, total, count = self._series.get(stage) or ([0] * len(self.buckets), 0, 0)
+        for i, limit in enumerate(self.buckets):
+            if value <= limit:
+                counts[i] += 1
+                break
+        self._series[stage] = (counts, total + value, count + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for stage in sorted(self._series):
+            counts, total, count = self._series[stage]
+            cumulative = 0
+            for limit, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{stage="{stage}",le="{limit}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{self.name}_count{{stage="{stage}"}} {count}')
+        return lines
+
+@dataclass
+class StageRecord:
+    """ Uma execução de etapa: duração, linhas processadas, variação de memória e bytes do DataFrame produzido. """
+    stage: str
+    seconds: float
+    rows: Optional[int] = None
+    memory_delta: Optional[int] = None
+    frame_bytes: Optional[int] = None
+
+class PipelineMetrics:
+    """
+    Histogramas de duração, linhas, variação de memória (RSS do processo) e tamanho
+    do DataFrame produzido por etapa da pipeline, expostos em `/metrics`. A variação
+    de memória é do processo inteiro: com execuções simultâneas, ela é aproximada.
+
+    Com o executor de processos, as etapas rodam nos workers: `capture` guarda os
+    registros feitos durante uma tarefa para que o processo do servidor os
+    incorpore com `merge` (ver `pipeline_executor`).
+    """
+
+    def __init__(self):
+        self.duration = Histogram('pipeline_stage_duration_seconds', 'Duração de cada etapa da pipeline.', DURATION_BUCKETS)
+        self.rows = Histogram('pipeline_stage_rows', 'Linhas processadas por execução de cada etapa.', ROW_BUCKETS)
+        self.memory = Histogram('pipeline_stage_memory_delta_bytes', 'Variação da memória residente do processo durante cada etapa.', MEMORY_BUCKETS)
+        self.frame = Histogram('pipeline_stage_frame_bytes', 'Memória ocupada pelo DataFrame produzido por cada etapa.', FRAME_BUCKETS)
+        self._lock = threading.Lock()
+        self._captured: Optional[List[StageRecord]] = None
+
+    def record(self, record: StageRecord) -> None:
+        with self._lock:
+            self.duration.observe(record.stage, record.seconds)
+            if record.rows is not None:
+                self.rows.observe(record.stage, record.rows)
+            if record.memory_delta is not None:
+                self.memory.observe(record.stage, record.memory_delta)
+            if record.frame_bytes is not None:
+                self.frame.observe(record.stage, record.frame_bytes)
+            if self._captured is not None:
+                self._captured.append(record)
+
+    @contextmanager
+    def capture(self) -> Iterator[List[StageRecord]]:
+        """ Guarda os registros feitos no processo enquanto o bloco executa. """
+        with self._lock:
+            self._captured = captured = []
+        try:
+            yield captured
+        finally:
+            with self._lock:
+                self._captured = None
+
+    def merge(self, records: List[StageRecord]) -> None:
+        for record in records:
+            self.record(record)
+
+    def render(self) -> str:
+        """ Texto no formato de exposição do Prometheus (version 0.0.4). """
+        with self._lock:
+            lines = self.duration.render() + self.rows.render() + self.memory.render() + self.frame.render()
+        return "\n".join(lines) + "\n"
+
+class _Stage:
+    """
+    Etapa em andamento; `rows` pode ser definido dentro do bloco (ex.: após a leitura).
+    `frame` recebe o DataFrame produzido, medido em bytes ao fim da etapa.
+    """
+    __slots__ = ('rows', 'frame')
+
+    def __init__(self, rows: Optional[int]):
+        self.rows = rows
+        self.frame: Optional[pd.DataFrame] = None
+
+def record_stage(name: str, seconds: float, rows: Optional[int] = None) -> None:
+    """ Registra uma etapa medida por quem chama (ex.: leitura de cada bloco de um gerador). """
+    if settings.METRICS_ENABLED:
+        metrics.record(StageRecord(stage=name, seconds=seconds, rows=rows))
+
+@contextmanager
+def stage(name: str, rows: Optional[int] = None) -> Iterator[_Stage]:
+    """
+    Mede a etapa `name`: duração, linhas, variação de memória e, se definido
+    `frame`, os bytes do DataFrame produzido. Só registra quando a etapa termina
+    sem erro (e se METRICS_ENABLED).
+    """
+    current = _Stage(rows)
+    if not settings.METRICS_ENABLED:
+        yield current
+        current.frame = None
+        return
+    memory_start = rss_bytes()
+    start = time.perf_counter()
+    yield current
+    seconds = time.perf_counter() - start
+    memory_end = rss_bytes() if memory_start is not None else None
+    metrics.record(StageRecord(
+        stage=name,
+        seconds=seconds,
+        rows=current.rows,
+        memory_delta=memory_end - memory_start if memory_end is not None else None,
+        frame_bytes=frame_bytes(current.frame) if current.frame is not None else None,
+    ))
+    current.frame = None # Não prende o DataFrame depois da etapa
+
+# Instâncias únicas do processo
+metrics = PipelineMetrics()
+process_info = ProcessInfo()
@@ -0,0 +1,236 @@
+# backend/app/services/job_service.py
+
+import logging
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from app.core.config import settings
+from app.services import upload_reader
+
+logger = logging.getLogger(__name__)
+
+# Etapas reportadas em GET /predict/jobs/{id}, na ordem de execução
+JOB_STAGES = [
+    'read_upload',
+    'prepare_features',
+    'assign_clusters',
+    'feature_engineering',
+    'predict_targets',
+    'metrics',
+    'build_result',
+]
+
+class JobNotFoundError(Exception):
+    """ Job inexistente ou já removido pela limpeza de TTL. """
+
+class JobStore:
+    """
+    Armazena os jobs em disco, um diretório por job:
+    `job.json` (status e progresso), `input.<ext>` (upload, removido ao final)
+    e `result.json` (AnalysisResult serializado). Jobs finalizados há mais de
+    `ttl_seconds` são apagados por `cleanup_expired`.
+    """
+
+    def __init__(self, root: Path, ttl_seconds: int):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+    def _dir(self, job_id: str) -> Path:
+        # O id vem da URL: aceita apenas o formato gerado por `create`
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            raise JobNotFoundError(job_id)
+        return self.root / job_id
+
+    def input_path(self, job_id: str, file_extension: str) -> Path:
+        return self._dir(job_id) / f"input.{file_extension}"
+
+    def result_path(self, job_id: str) -> Path:
+        return self._dir(job_id) / "result.json"
+
+    def create(self, filename: str, file_extension: str, source: BinaryIO) -> dict:
+        """ Grava o upload em disco e registra o job como 'queued'. """
+        job_id = uuid.uuid4().hex
+        job_dir = self._dir(job_id)
+        job_dir.mkdir(parents=True)
+        with open(self.input_path(job_id, file_extension), 'wb') as f:
+            shutil.copyfileobj(source, f)
+        now = time.time()
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'pid': os.getpid(), # Processo que executa o job (ver `fail_interrupted`)
+            'filename': filename,
+            'file_extension': file_extension,
+            'created_at': now,
+            'updated_at': now,
+            'finished_at': None,
+            'error': None,
+            'progress': 0.0,
+            'stages': [{'name': name, 'status': 'pending', 'duration_seconds': None} for name in JOB_STAGES],
+        }
+        self._write(job)
+        return job
+
+    def get(self, job_id: str) -> dict:
+        path = self._dir(job_id) / "job.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise JobNotFoundError(job_id)
+
+    def update(self, job_id: str, **changes) -> dict:
+        with self._lock:
+            job = self.get(job_id)
+            job.update(changes)
+            job['updated_at'] = time.time()
+            self._write(job)
+        return job
+
+    def set_stage(self, job_id: str, name: str, status: str, duration: Optional[float] = None) -> None:
+        with self._lock:
+            job = self.get(job_id)
+            for stage in job['stages']:
+                if stage['name'] == name:
+                    stage['status'] = status
+                    stage['duration_seconds'] = duration
+            done = sum(1 for stage in job['stages'] if stage['status'] == 'done')
+            job['progress'] = round(done / len(job['stages']), 3)
+            job['updated_at'] = time.time()
+            self._write(job)
+
+    def save_result(self, job_id: str, content: str) -> None:
+        tmp = self.result_path(job_id).with_suffix('.tmp')
+        tmp.write_text(content, encoding='utf-8')
+        os.replace(tmp, self.result_path(job_id))
+
+    def _write(self, job: dict) -> None:
+        # Escrita atômica: leitores nunca veem um job.json pela metade
+        path = self._dir(job['job_id']) / "job.json"
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(job, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def cleanup_expired(self) -> int:
+        """ Remove jobs finalizados há mais de `ttl_seconds`. Retorna quantos foram removidos. """
+        if not self.root.exists():
+            return 0
+        limit = time.time() - self.ttl_seconds
+        removed = 0
+        for job_dir in self.root.iterdir():
+            try:
+                job = self.get(job_dir.name)
+            except JobNotFoundError:
+                continue
+            finished_at = job.get('finished_at')
+            if finished_at is not None and finished_at < limit:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def fail_interrupted(self) -> None:
+        """
+        Jobs 'queued'/'running' cujo processo terminou (execução anterior do servidor ou
+        worker do prefork que morreu) não serão retomados. Os jobs de processos vivos,
+        como os dos outros workers do prefork, ficam como estão.
+        """
+        if not self.root.exists():
+            return
+        for job_dir in self.root.iterdir():
+            try:
+                job = self.get(job_dir.name)
+            except JobNotFoundError:
+                continue
+            if job['status'] in ('queued', 'running') and not _process_alive(job.get('pid')):
+                self.update(job['job_id'], status='failed', finished_at=time.time(),
+                            error="Job interrompido pela reinicialização do servidor.")
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    """ O processo `pid` ainda existe (jobs gravados sem pid contam como de processo morto). """
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Existe, mas é de outro usuário
+        return True
+    return True
+
+
+class JobManager:
+    """
+    Executa os jobs de análise em um pool local de workers, com a pipeline do
+    PredictionService (`run_pipeline`), registrando o progresso de cada etapa no JobStore.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int):
+        self.store = store
+        self.max_workers = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self) -> None:
+        self.store.root.mkdir(parents=True, exist_ok=True)
+        self.store.fail_interrupted()
+        self.store.cleanup_expired()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def submit(self, filename: str, file_extension: str, source: BinaryIO) -> dict:
+        """ Grava o upload, enfileira o job e retorna seu status inicial. """
+        self.store.cleanup_expired()
+        job = self.store.create(filename, file_extension, source)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._pool.submit(self._run, job['job_id'], file_extension)
+        return job
+
+    @contextmanager
+    def _stage(self, job_id: str, name: str):
+        self.store.set_stage(job_id, name, 'running')
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.store.set_stage(job_id, name, 'failed', round(time.perf_counter() - start, 3))
+            raise
+        self.store.set_stage(job_id, name, 'done', round(time.perf_counter() - start, 3))
+
+    def _run(self, job_id: str, file_extension: str) -> None:
+        from app.services.model_registry import model_registry
+        # O job inteiro usa a versão de modelos ativa quando ele começa a rodar
+        service = model_registry.active
+        input_path = self.store.input_path(job_id, file_extension)
+        self.store.update(job_id, status='running')
+        try:
+            # O job espera os artefatos terminarem de carregar, em vez de falhar
+            service.ensure_loaded()
+            with self._stage(job_id, 'read_upload'):
+                df = upload_reader.read_dataframe(input_path, file_extension)
+            # Pipeline do PredictionService, com o progresso de cada etapa registrado no job
+            output = service.run_pipeline(df, progress=lambda nome: self._stage(job_id, nome))
+            with self._stage(job_id, 'build_result'):
+                self.store.save_result(job_id, service.build_row_result(output).model_dump_json())
+            self.store.update(job_id, status='succeeded', finished_at=time.time())
+            logger.info(f"✅ Job {job_id} concluído.")
+        except Exception as e:
+            logger.error(f"❌ Job {job_id} falhou: {e}")
+            self.store.update(job_id, status='failed', finished_at=time.time(), error=str(e))
+        finally:
+            input_path.unlink(missing_ok=True)
+
+# Instância única usada pelos endpoints de jobs
+job_manager = JobManager(JobStore(settings.JOBS_PATH, settings.JOB_TTL_SECONDS), settings.JOB_WORKERS)
@@ -0,0 +1,152 @@
+# backend/app/services/model_registry.py
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from app.services.prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+BASE_VERSION = "base"
+
+class ModelRegistry:
+    """
+    Registro de conjuntos versionados de artefatos sobre `settings.ML_ARTIFACTS_PATH`.
+
+    Layout:
+      <root>/                      -> versão "base" (artefatos na raiz, como antes)
+      <root>/versions/<versão>/    -> mesmos arquivos (coluns.json, *.pkl, artefazos_predicao/)
+      <root>/versions/ACTIVE       -> nome da versão ativa (persistido a cada troca)
+
+    Cada versão carregada é um PredictionService próprio. `activate` carrega a
+    nova versão em segundo plano e só então troca a referência ativa (operação
+    atômica): requisições em andamento guardaram o serviço antigo e terminam nele.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.versions_path = self.root / "versions"
+        self._lock = threading.Lock()
+        self._active = PredictionService(self.path_for(self._initial_version()), self._initial_version())
+        self._pending: Optional[PredictionService] = None
+        self.last_error: Optional[str] = None
+        # Versões carregadas sob demanda por `get` (ex.: em workers de processo)
+        self._loaded: "OrderedDict[str, PredictionService]" = OrderedDict()
+
+    # --- Versões disponíveis ---
+
+    def _active_file(self) -> Path:
+        return self.versions_path / "ACTIVE"
+
+    def _initial_version(self) -> str:
+        if settings.ML_MODEL_VERSION:
+            return settings.ML_MODEL_VERSION
+        if self._active_file().exists():
+            return self._active_file().read_text(encoding='utf-8').strip()
+        return BASE_VERSION
+
+    def available_versions(self) -> List[str]:
+        versions = []
+        if (self.root / "coluns.json").exists():
+            versions.append(BASE_VERSION)
+        if self.versions_path.is_dir():
+            versions.extend(sorted(p.name for p in self.versions_path.iterdir() if p.is_dir()))
+        return versions
+
+    def path_for(self, version: str) -> Path:
+        if version == BASE_VERSION:
+            return self.root
+        path = self.versions_path / version
+        # O nome vem da API: não pode apontar para fora de versions/
+        if path.parent != self.versions_path:
+            raise KeyError(version)
+        return path
+
+    # --- Versão ativa ---
+
+    @property
+    def active(self) -> PredictionService:
+        """ Serviço da versão ativa. Guarde a referência durante toda a requisição. """
+        return self._active
+
+    @property
+    def pending_version(self) -> Optional[str]:
+        pending = self._pending
+        return pending.version if pending is not None else None
+
+    def start(self, warm_up: bool = False) -> None:
+        """ Inicia o carregamento da versão ativa em segundo plano (startup da aplicação). """
+        self._active.start_loading(warm_up=warm_up)
+
+    def activate(self, version: str, warm_up: bool = True) -> None:
+        """
+        Carrega `version` em segundo plano e a torna ativa quando estiver pronta.
+        Lança KeyError se a versão não existe e RuntimeError se já há uma troca em andamento.
+        """
+        if version not in self.available_versions():
+            raise KeyError(version)
+        with self._lock:
+            if self._pending is not None:
+                raise RuntimeError(f"A versão '{self._pending.version}' ainda está sendo carregada.")
+            candidate = PredictionService(self.path_for(version), version)
+            self._pending = candidate
+            self.last_error = None
+        threading.Thread(target=self._load_and_swap, args=(candidate, warm_up), name="model-swap", daemon=True).start()
+
+    def _load_and_swap(self, candidate: PredictionService, warm_up: bool) -> None:
+        try:
+            candidate.start_loading(warm_up=warm_up)
+            candidate.ensure_loaded()
+        except Exception as e:
+            logger.error(f"❌ Falha ao carregar a versão '{candidate.version}'; a versão '{self._active.version}' continua ativa: {e}")
+            with self._lock:
+                self.last_error = str(e)
+                self._pending = None
+            return
+        with self._lock:
+            previous = self._active
+            self._active = candidate
+            self._pending = None
+        if self.versions_path.is_dir():
+            self._active_file().write_text(candidate.version, encoding='utf-8')
+        logger.info(f"✅ Versão de modelos ativa: '{candidate.version}' (anterior: '{previous.version}').")
+
+    def get(self, version: str) -> PredictionService:
+        """
+        Serviço de uma versão específica, carregado sob demanda. Usado pelos workers
+        de processo, que recebem o nome da versão capturada pela requisição.
+        """
+        active = self._active
+        if active.version == version:
+            active.ensure_loaded()
+            return active
+        with self._lock:
+            service = self._loaded.get(version)
+            if service is None:
+                service = PredictionService(self.path_for(version), version)
+                self._loaded[version] = service
+                # Mantém só as duas versões mais recentes além da ativa
+                while len(self._loaded) > 2:
+                    self._loaded.popitem(last=False)
+            self._loaded.move_to_end(version)
+        service.ensure_loaded()
+        return service
+
+    def describe(self) -> dict:
+        active = self._active
+        return {
+            "active_version": active.version,
+            "active_status": active.status,
+            "active_fingerprint": active.fingerprint,
+            "active_plan_cache": active.plan_cache.stats(),
+            "pending_version": self.pending_version,
+            "last_error": self.last_error,
+            "available_versions": self.available_versions(),
+        }
+
+# Instância única usada pela API
+model_registry = ModelRegistry(settings.ML_ARTIFACTS_PATH)
@@ -0,0 +1,75 @@
+# backend/app/services/ndjson_stream.py
+
+import json
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from app.services.columnar_response import column_to_list, PREDICTION_COLUMNS, CODIGO_COLUMN
+from app.services.pipeline_output import PipelineOutput
+from app.services.response_projection import ALL_COLUMNS, Projection
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Linhas serializadas por vez: limita a memória do servidor a um lote, não ao arquivo inteiro
+DEFAULT_BATCH_SIZE = 1000
+
+def _dumps(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def iter_records(output: PipelineOutput, batch_size: int = DEFAULT_BATCH_SIZE, projection: Projection = ALL_COLUMNS) -> Iterator[bytes]:
+    """
+    Gera a resposta NDJSON: um objeto por linha de predição, com o mesmo formato
+    de `PredictionRow`, seguido de um registro final `{"summary": AnalysisSummary}`.
+    As colunas são convertidas direto do NumPy em lotes de `batch_size` linhas.
+    """
+    yield from iter_rows(output.df_pipeline, batch_size, projection)
+    yield summary_record(output.total_rows, len(output.df_pipeline), output.r2_scores, output.heatmap_data, output.model_version)
+
+def iter_chunked_records(run, batch_size: int = DEFAULT_BATCH_SIZE, projection: Projection = ALL_COLUMNS) -> Iterator[bytes]:
+    """
+    Resposta NDJSON de uma execução em blocos (`ChunkedPipelineRun`): as linhas de
+    cada bloco são enviadas assim que ele é predito; o resumo vem ao final.
+    """
+    processed_rows = 0
+    for output in run:
+        processed_rows += len(output.df_pipeline)
+        yield from iter_rows(output.df_pipeline, batch_size, projection)
+    yield summary_record(run.total_rows, processed_rows, run.r2_scores, run.heatmap_data, run.model_version)
+
+def iter_rows(df_pipeline: pd.DataFrame, batch_size: int = DEFAULT_BATCH_SIZE, projection: Projection = ALL_COLUMNS) -> Iterator[bytes]:
+    """ Linhas NDJSON (formato `PredictionRow`) de `df_pipeline`, em lotes de `batch_size`; `original_data` só com as colunas de `projection`. """
+    original_columns = projection.select(col for col in df_pipeline.columns if col not in PREDICTION_COLUMNS)
+
+    for start in range(0, len(df_pipeline), batch_size):
+        batch = df_pipeline.iloc[start:start + batch_size]
+        predictions = {
+            col: column_to_list(batch[col]) if col in batch.columns else [None] * len(batch)
+            for col in PREDICTION_COLUMNS
+        }
+        originals = [column_to_list(batch[col]) for col in original_columns]
+        if CODIGO_COLUMN in original_columns:
+            codigos = originals[original_columns.index(CODIGO_COLUMN)]
+        else:
+            codigos = column_to_list(batch[CODIGO_COLUMN]) if CODIGO_COLUMN in batch.columns else [None] * len(batch)
+        codigos = [None if v is None else str(v) for v in codigos]
+
+        chunk = []
+        for i in range(len(batch)):
+            record = {col: predictions[col][i] for col in PREDICTION_COLUMNS}
+            record['codigo_acesso'] = codigos[i]
+            record['original_data'] = {col: values[i] for col, values in zip(original_columns, originals)}
+            chunk.append(_dumps(record))
+        yield b''.join(chunk)
+
+def summary_record(total_rows: int, processed_rows: int, r2_scores: Dict[str, Optional[float]], heatmap_data: Optional[List[dict]], model_version: Optional[str] = None) -> bytes:
+    """ Registro final `{"summary": AnalysisSummary}`. """
+    return _dumps({'summary': {
+        'total_rows': total_rows,
+        'processed_rows': processed_rows,
+        'r2_score_target1': r2_scores.get('Target1'),
+        'r2_score_target2': r2_scores.get('Target2'),
+        'r2_score_target3': r2_scores.get('Target3'),
+        'correlation_heatmap_data': heatmap_data,
+        'model_version': model_version,
+    }})
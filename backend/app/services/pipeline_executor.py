@@ -0,0 +1,175 @@
+# backend/app/services/pipeline_executor.py
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+from app.services.instrumentation import metrics
+
+class ExecutorBusyError(Exception):
+    """ A fila do executor está cheia; a requisição deve ser recusada com 503. """
+    def __init__(self, retry_after: int):
+        super().__init__("Fila de processamento cheia.")
+        self.retry_after = retry_after
+
+@dataclass
+class ExecutionTiming:
+    """ Tempo de espera na fila e tempo de execução de uma tarefa, em segundos. """
+    queue_wait: float
+    execution: float
+
+    def server_timing(self) -> str:
+        """ Valor do cabeçalho `Server-Timing` (durações em milissegundos). """
+        return f"queue;dur={self.queue_wait * 1000:.1f}, exec;dur={self.execution * 1000:.1f}"
+
+def _timed_call(func: Callable, args: tuple, capture_metrics: bool = False) -> Tuple[Any, float, float, Optional[list]]:
+    """
+    Executa `func` no worker e devolve (resultado, início em epoch, duração, etapas).
+    Com `capture_metrics` (worker em outro processo), devolve também as etapas
+    registradas pela instrumentação, para o servidor incorporá-las em /metrics.
+    """
+    started_at = time.time()
+    start = time.perf_counter()
+    if not capture_metrics:
+        return func(*args), started_at, time.perf_counter() - start, None
+    with metrics.capture() as records:
+        value = func(*args)
+    return value, started_at, time.perf_counter() - start, records
+
+def call_service(version: str, method_name: str, *args):
+    """
+    Chama um método do PredictionService da versão `version` no worker. Por ser
+    uma função de módulo, pode ser enviada a um processo: o worker usa o serviço
+    herdado no fork ou carrega a versão pedida na primeira chamada.
+    """
+    from app.services.model_registry import model_registry
+    return getattr(model_registry.get(version), method_name)(*args)
+
+# Marca o fim do iterador consumido por `iter_local`
+_END = object()
+
+class PipelineExecutor:
+    """
+    Executa a pipeline fora do event loop, em um pool de threads ou de processos.
+
+    No máximo `max_workers` execuções rodam ao mesmo tempo e até `max_queue`
+    aguardam na fila; além disso, `run` lança ExecutorBusyError imediatamente.
+    Com `kind="process"`, as tarefas enviadas por `run` precisam ser picklable
+    (ex.: `call_service`, usado por `run_service`); `run_local` sempre usa
+    threads, para tarefas que leem o upload sob demanda no processo do servidor. As duas dividem a mesma fila.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 2, max_queue: int = 8, retry_after: int = 5):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Tipo de executor inválido: {kind!r} (use 'thread' ou 'process').")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._pending = 0
+        self._pool: Optional[Executor] = None
+        self._local_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def capacity(self) -> int:
+        """ Execuções aceitas ao mesmo tempo (rodando + na fila). """
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def check_capacity(self) -> None:
+        """ Recusa cedo (antes de ler o upload) quando a fila já está cheia. """
+        if self._pending >= self.capacity:
+            raise ExecutorBusyError(self.retry_after)
+
+    def _get_local_pool(self) -> ThreadPoolExecutor:
+        if self._local_pool is None:
+            self._local_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        return self._local_pool
+
+    def _get_pool(self) -> Executor:
+        if self.kind == "thread":
+            return self._get_local_pool()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def run(self, func: Callable, *args) -> Tuple[Any, ExecutionTiming]:
+        """ Executa `func(*args)` no pool configurado e devolve (resultado, tempos). """
+        return await self._submit(self._get_pool(), func, args)
+
+    async def run_service(self, service, method_name: str, *args) -> Tuple[Any, ExecutionTiming]:
+        """
+        Executa `service.<method_name>(*args)` no pool configurado. Com threads, usa
+        a própria instância (a versão capturada pela requisição); com processos,
+        envia o nome da versão para `call_service`.
+        """
+        if self.kind == "thread":
+            return await self.run(getattr(service, method_name), *args)
+        return await self.run(call_service, service.version, method_name, *args)
+
+    async def run_local(self, func: Callable, *args) -> Tuple[Any, ExecutionTiming]:
+        """ Igual a `run`, mas sempre em uma thread do processo do servidor. """
+        return await self._submit(self._get_local_pool(), func, args)
+
+    async def iter_local(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Consome `iterator` (ex.: a resposta NDJSON de uma execução em blocos, que
+        prediz cada bloco ao avançar) nas threads do pool local, um item por tarefa.
+        Ocupa uma vaga do início ao fim do envio, então as requisições novas recebem
+        503 enquanto os envios em andamento lotam o executor. A vaga não é verificada:
+        a requisição já foi aceita e o envio continua mesmo com a fila cheia.
+        """
+        self._pending += 1
+        pool = self._get_local_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await loop.run_in_executor(pool, next, iterator, _END)
+                if item is _END:
+                    return
+                yield item
+        finally:
+            self._pending -= 1
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                try:
+                    close() # Envio cancelado: libera os recursos do gerador (ex.: blocos em disco)
+                except ValueError:
+                    pass # Ainda executando na thread (cancelado durante um item)
+
+    async def _submit(self, pool: Executor, func: Callable, args: tuple) -> Tuple[Any, ExecutionTiming]:
+        # O contador só é alterado no event loop, então não precisa de lock
+        self.check_capacity()
+        self._pending += 1
+        submitted_at = time.time()
+        try:
+            loop = asyncio.get_running_loop()
+            capture_metrics = isinstance(pool, ProcessPoolExecutor)
+            value, started_at, execution, records = await loop.run_in_executor(pool, _timed_call, func, args, capture_metrics)
+        finally:
+            self._pending -= 1
+        if records:
+            metrics.merge(records)
+        return value, ExecutionTiming(queue_wait=max(0.0, started_at - submitted_at), execution=execution)
+
+    def shutdown(self) -> None:
+        """ Encerra os pools (chamado no shutdown da aplicação). """
+        for pool in (self._pool, self._local_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._local_pool = None
+
+# Instância única usada pelos endpoints
+pipeline_executor = PipelineExecutor(
+    kind=settings.PIPELINE_EXECUTOR,
+    max_workers=settings.PIPELINE_WORKERS,
+    max_queue=settings.PIPELINE_MAX_QUEUE,
+    retry_after=settings.PIPELINE_RETRY_AFTER_SECONDS,
+)
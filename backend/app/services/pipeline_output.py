@@ -0,0 +1,20 @@
+# backend/app/services/pipeline_output.py
+
+from dataclasses import dataclass
+from typing import Dict, Optional, List, Any
+
+import pandas as pd
+
+@dataclass
+class PipelineOutput:
+    """
+    Resultado bruto da pipeline, antes de ser convertido em resposta da API.
+    `df_pipeline` contém as features, as colunas PREDICAO_Target* e o
+    'Código de Acesso (Original)' (quando existir).
+    """
+    df_pipeline: pd.DataFrame
+    total_rows: int
+    r2_scores: Dict[str, Optional[float]]
+    heatmap_data: Optional[List[Dict[str, Any]]]
+    # Versão do conjunto de artefatos (registro de modelos) que gerou o resultado
+    model_version: Optional[str] = None
@@ -0,0 +1,185 @@
+# backend/app/services/pipeline_plan.py
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Planos de execução da pipeline: as decisões que dependem só do esquema do
+# DataFrame (nomes e dtypes das colunas) e dos artefatos, compiladas uma vez e
+# reaproveitadas por todos os uploads com o mesmo layout. A execução continua
+# olhando os dados (quais colunas têm negativos ou NaN), mas não refaz os
+# `select_dtypes`, as listas do coluns.json, as varreduras por prefixo nem os
+# testes de presença de colunas.
+
+# Colunas removidas logo no início da limpeza
+COLUMNS_TO_DROP = ['Código de Acesso', 'F0299 - Explicação Tempo', 'T1199Expl', 'T1205Expl']
+# Colunas convertidas para numérico (texto inválido vira NaN)
+COLUMNS_TO_CONVERT = ['T01', 'P03', 'T05', 'P12', 'T15']
+
+T = TypeVar('T')
+
+def schema_key(columns: Iterable, dtypes: Optional[Iterable] = None) -> str:
+    """ Hash do cabeçalho (e, se informados, dos dtypes) que identifica um esquema. """
+    parts = [str(col) for col in columns]
+    if dtypes is not None:
+        parts = [f"{col}\x1e{dtype}" for col, dtype in zip(parts, dtypes)]
+    return hashlib.blake2b("\x1f".join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+@dataclass(frozen=True)
+class CleaningPlan:
+    """
+    Limpeza de `prepare_features` para um esquema de upload. Cada lista guarda as
+    colunas que existem no esquema, na ordem em que a limpeza original as visitava:
+    - `negative_numeric`: (coluna numérica, valor que substitui negativos, flag '_nao_respondeu' ou None);
+    - `negative_text`: (coluna de texto, moda que substitui '-N', flag ou None);
+    - `missing_flags` / `present_flags`: flags a criar com 0 / já existentes (NaN vira 0);
+    - `imputable`: (coluna, flag '_tinha_missing' ou None, valor de preenchimento);
+    - `text_columns`: colunas de texto (NaN restante vira 'Desconhecido').
+    """
+    key: str
+    drop: Tuple[str, ...]
+    convert: Tuple[str, ...]
+    negative_numeric: Tuple[Tuple[str, object, Optional[str]], ...]
+    negative_text: Tuple[Tuple[str, object, Optional[str]], ...]
+    missing_flags: Tuple[str, ...]
+    present_flags: Tuple[str, ...]
+    imputable: Tuple[Tuple[str, Optional[str], object], ...]
+    text_columns: Tuple[str, ...]
+
+def compile_cleaning_plan(df: pd.DataFrame, coluns_json: dict, numeric_medians: dict, categorical_modes: dict,
+                          key: Optional[str] = None) -> CleaningPlan:
+    """
+    Compila a limpeza a partir do esquema de `df` (só cabeçalho e dtypes: os tipos
+    após a conversão são obtidos em um DataFrame vazio com os mesmos dtypes).
+    """
+    drop = [col for col in COLUMNS_TO_DROP if col in df.columns]
+    esquema = df.iloc[:0].drop(columns=drop)
+    convert = [col for col in COLUMNS_TO_CONVERT if col in esquema.columns]
+    for col in convert:
+        esquema[col] = pd.to_numeric(esquema[col], errors='coerce')
+    colunas = set(esquema.columns)
+
+    colunas_com_negativos = set(coluns_json.get('colunas_com_negativos', []))
+    colunas_nao_respondeu = coluns_json.get('colunas_nao_respondeu', [])
+    colunas_missing_flags = coluns_json.get('colunas_missing', [])
+    nao_respondeu = set(colunas_nao_respondeu)
+    missing = set(colunas_missing_flags)
+
+    def flag_nao_respondeu(col: str) -> Optional[str]:
+        flag_col = f'{col}_nao_respondeu'
+        return flag_col if col in colunas_com_negativos and flag_col in nao_respondeu else None
+
+    negative_numeric = tuple(
+        (col, numeric_medians.get(col, 0), flag_nao_respondeu(col))
+        for col in esquema.select_dtypes(include=np.number).columns
+        if '_nao_respondeu' not in col and '_tinha_missing' not in col
+    )
+    text_columns = tuple(esquema.select_dtypes(include='object').columns)
+    negative_text = tuple(
+        (col, categorical_modes.get(col, 'Desconhecido'), flag_nao_respondeu(col))
+        for col in text_columns if col in colunas_com_negativos
+    )
+    flags = list(dict.fromkeys(colunas_nao_respondeu + colunas_missing_flags))
+    # Depois da etapa das flags, todas existem: as imputáveis são as do esquema mais as flags
+    presentes = colunas | set(flags)
+    imputable = []
+    for col in dict.fromkeys(list(numeric_medians) + list(categorical_modes)):
+        if col in presentes:
+            fill = numeric_medians[col] if col in numeric_medians else categorical_modes[col]
+            flag_col = f'{col}_tinha_missing'
+            imputable.append((col, flag_col if flag_col in missing else None, fill))
+
+    plan = CleaningPlan(
+        key=key or schema_key(df.columns, df.dtypes),
+        drop=tuple(drop),
+        convert=tuple(convert),
+        negative_numeric=negative_numeric,
+        negative_text=negative_text,
+        missing_flags=tuple(f for f in flags if f not in colunas),
+        present_flags=tuple(f for f in flags if f in colunas),
+        imputable=tuple(imputable),
+        text_columns=text_columns,
+    )
+    logger.info(f"   📐 Plano de limpeza compilado para o esquema {plan.key[:12]} ({len(df.columns)} colunas).")
+    return plan
+
+@dataclass(frozen=True)
+class ModelInputsPlan:
+    """
+    Entrada dos modelos para um cabeçalho de `df_pipeline`: features ausentes de
+    cada target, targets que rodam, colunas da matriz única de features e, por
+    target, a fatia (colunas contíguas) ou os índices das suas colunas na matriz.
+    """
+    missing: Dict[str, List[str]]
+    runnable: Tuple[str, ...]
+    columns: Tuple[str, ...]
+    selectors: Dict[str, object]
+
+def compile_model_inputs_plan(columns: Iterable[str], target_features: Dict[str, List[str]], targets: List[str]) -> ModelInputsPlan:
+    existentes = set(columns)
+    missing: Dict[str, List[str]] = {}
+    indices: Dict[str, int] = {}
+    runnable = []
+    for target in targets:
+        features_to_use = target_features[target]
+        ausentes = [f for f in features_to_use if f not in existentes]
+        if ausentes:
+            missing[target] = ausentes
+            continue
+        for feature in features_to_use:
+            indices.setdefault(feature, len(indices))
+        runnable.append(target)
+    selectors: Dict[str, object] = {}
+    for target in runnable:
+        idx = [indices[f] for f in target_features[target]]
+        if idx == list(range(idx[0], idx[0] + len(idx))):
+            selectors[target] = slice(idx[0], idx[0] + len(idx)) # Colunas contíguas: view, sem cópia
+        else:
+            selectors[target] = idx
+    return ModelInputsPlan(missing=missing, runnable=tuple(runnable), columns=tuple(indices), selectors=selectors)
+
+class PlanCache:
+    """
+    Planos compilados de um PredictionService (os planos dependem dos artefatos da
+    versão), por etapa e chave de esquema, com descarte LRU acima de `max_entries`.
+    Com `max_entries=0`, compila a cada chamada.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, stage: str, key: str, compile_plan: Callable[[], T]) -> T:
+        """ Plano da etapa `stage` para o esquema `key`, compilado com `compile_plan` na primeira vez. """
+        if self.max_entries <= 0:
+            return compile_plan()
+        with self._lock:
+            plan = self._plans.get((stage, key))
+            if plan is not None:
+                self._plans.move_to_end((stage, key))
+                self.counters['hits'] += 1
+                return plan
+            self.counters['misses'] += 1
+        # Compilado fora do lock: duas execuções simultâneas podem compilar o mesmo plano
+        plan = compile_plan()
+        with self._lock:
+            self._plans[(stage, key)] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+                self.counters['evictions'] += 1
+        return plan
+
+    def stats(self) -> dict:
+        """ Contadores de acerto/compilação/descarte e planos guardados. """
+        with self._lock:
+            return {'entries': len(self._plans), 'max_entries': self.max_entries, **self.counters}
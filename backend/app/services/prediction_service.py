@@ -1,17 +1,35 @@
 # backend/app/services/prediction_service.py
 
 import pandas as pd
+import logging
 import joblib
 import pickle
 import json
+import hashlib
+import importlib
+import threading
+import time
 import numpy as np
+import sklearn.base # Import do scikit-learn junto com o módulo, antes das threads de carregamento (ver `import_model_libraries`)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
 from pydantic import BaseModel
-from typing import Dict, Optional, List
-from sklearn.metrics import r2_score
+from typing import Callable, ContextManager, Dict, Iterable, Optional, List, Set, Tuple
 
 from app.core.config import settings
 from app.models.prediction_schema import AnalysisResult, PredictionRow, HeatmapDataRow, HeatmapDataItem
-from app.ml import preprocessing, feature_engineering
+from app.ml import preprocessing, feature_builder, compactacao
+from app.ml.reference_stats import EstatisticasReferencia, ARQUIVO_ESTATISTICAS, carregar_estatisticas
+from app.services import columnar_export, columnar_response
+from app.services.instrumentation import stage
+from app.services.pipeline_output import PipelineOutput
+from app.services.pipeline_plan import CleaningPlan, ModelInputsPlan, PlanCache, compile_cleaning_plan, compile_model_inputs_plan, schema_key
+from app.services.response_projection import ALL_COLUMNS, Projection
+from app.services.streaming_metrics import CorrelationAccumulator, R2Accumulator
+from app.services.chunked_pipeline import ChunkedPipelineRun
+
+logger = logging.getLogger(__name__)
 
 class HeatmapDataItem(BaseModel):
     x: str
@@ -21,277 +39,738 @@ class HeatmapDataRow(BaseModel):
     id: str
     data: List[HeatmapDataItem]
 
+# Bibliotecas dos modelos serializados. São importadas antes das threads de
+# carregamento: o primeiro import de um mesmo pacote em várias threads ao mesmo
+# tempo pode falhar (_DeadlockError / módulo parcialmente inicializado).
+MODEL_LIBRARIES = ('sklearn.base', 'sklearn.preprocessing', 'sklearn.cluster', 'sklearn.linear_model', 'sklearn.ensemble')
+OPTIONAL_MODEL_LIBRARIES = ('xgboost', 'lightgbm')
+
+def import_model_libraries() -> None:
+    """ Importa (uma vez, na thread atual) as bibliotecas usadas pelos modelos; as opcionais só se instaladas. """
+    for module in MODEL_LIBRARIES:
+        importlib.import_module(module)
+    for module in OPTIONAL_MODEL_LIBRARIES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+def _timed_load(name: str, loader, path):
+    """ Carrega um artefato e registra o tempo gasto. """
+    start = time.perf_counter()
+    obj = loader(path)
+    logger.info(f"✅ '{name}' carregado em {time.perf_counter() - start:.2f}s.")
+    return obj
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _load_json(path):
+    with open(path, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+def artifacts_fingerprint(paths: List[Path]) -> str:
+    """
+    Identificador do conteúdo de um conjunto de artefatos: hash do nome, tamanho
+    e data de modificação de cada arquivo. Muda sempre que algum modelo é trocado.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
 class PredictionService:
-    def __init__(self):
-        """ Carrega todos os novos artefatos de ML (V2) """
+    def __init__(self, artifacts_path: Optional[Path] = None, version: str = "base"):
+        """
+        Cria o serviço para o conjunto de artefatos em `artifacts_path` (versão
+        `version` do registro de modelos) sem carregá-lo: o carregamento roda em
+        segundo plano (`start_loading`) ou sob demanda (`ensure_loaded`), para que
+        a API suba sem esperar pelos modelos.
+        """
+        self.artifacts_path = Path(artifacts_path or settings.ML_ARTIFACTS_PATH)
+        self.version = version
+        self.fingerprint: Optional[str] = None
+        self.targets = ['Target1', 'Target2', 'Target3']
+        self.ready = False
+        self.load_error: Optional[Exception] = None
+        self.load_seconds: Optional[float] = None
+        self.warm_up_seconds: Optional[float] = None
+        self._load_lock = threading.Lock()
+        self._loading_thread: Optional[threading.Thread] = None
+        self._loaded = threading.Event()
+        # Planos de execução compilados por esquema de upload (ver `pipeline_plan`)
+        self.plan_cache = PlanCache(settings.PIPELINE_PLAN_CACHE_SIZE)
+
+    @property
+    def status(self) -> str:
+        """ 'not_started', 'loading', 'ready' ou 'failed'. """
+        if self.ready:
+            return "ready"
+        if self.load_error is not None:
+            return "failed"
+        return "loading" if self._loading_thread is not None else "not_started"
+
+    @property
+    def output_fingerprint(self) -> str:
+        """
+        `fingerprint` dos artefatos mais as configurações que mudam o conteúdo das
+        respostas: estatísticas de referência e poda de features (fixadas no
+        carregamento) e compactação de tipos (lida a cada execução). É a versão
+        usada na chave do cache de resultados.
+        """
+        return (f"{self.fingerprint}:ref={int(self.reference_stats is not None)}"
+                f":prune={int(self.pipeline_features is not None)}"
+                f":compact={int(settings.COMPACT_DTYPES)}{int(settings.COMPACT_MODEL_FEATURES)}")
+
+    def start_loading(self, warm_up: bool = False) -> None:
+        """ Inicia o carregamento dos artefatos em uma thread de fundo (uma única vez). """
+        with self._load_lock:
+            if self._loading_thread is not None or self.ready:
+                return
+            self._loading_thread = threading.Thread(target=self._load, args=(warm_up,), name="artifact-loader", daemon=True)
+            self._loading_thread.start()
+
+    def ensure_loaded(self) -> None:
+        """ Bloqueia até os artefatos estarem carregados (iniciando o carregamento, se preciso). """
+        if self.ready:
+            return
+        self.start_loading()
+        self._loaded.wait()
+        if self.load_error is not None:
+            raise self.load_error
+
+    def _load(self, warm_up: bool) -> None:
+        try:
+            self.load_artifacts()
+            if warm_up:
+                self.warm_up()
+            self.ready = True
+        except Exception as e:
+            self.load_error = e
+        finally:
+            self._loaded.set()
+
+    def load_artifacts(self) -> None:
+        """ Carrega todos os novos artefatos de ML (V2), em paralelo. """
         try:
-            print("Carregando artefatos de Machine Learning (V2) para o serviço...")
-            artifacts_path = settings.ML_ARTIFACTS_PATH
+            logger.info(f"Carregando artefatos de Machine Learning (V2) para o serviço (versão '{self.version}')...")
+            start = time.perf_counter()
+            artifacts_path = self.artifacts_path
             prediction_artifacts_path = artifacts_path / "artefazos_predicao"
 
-            with open(artifacts_path / "generic_preprocessing_artifacts.pkl", "rb") as f:
-                generic_artifacts = pickle.load(f)
+            tasks = {
+                'generic_preprocessing_artifacts.pkl': (_load_pickle, artifacts_path / "generic_preprocessing_artifacts.pkl"),
+                'coluns.json': (_load_json, artifacts_path / "coluns.json"),
+                'clustering_artifacts_v2.pkl': (_load_pickle, artifacts_path / "clustering_artifacts_v2.pkl"),
+            }
+            for target in self.targets:
+                for prefix in ('lista_features', 'scaler', 'modelo_final'):
+                    name = f'{prefix}_{target}.joblib'
+                    tasks[name] = (joblib.load, prediction_artifacts_path / name)
+            if settings.USE_REFERENCE_STATS:
+                tasks[ARQUIVO_ESTATISTICAS] = (carregar_estatisticas, artifacts_path / ARQUIVO_ESTATISTICAS)
+
+            # Leitura e desserialização em threads de I/O; o erro de qualquer arquivo é propagado
+            import_model_libraries()
+            with ThreadPoolExecutor(max_workers=settings.ARTIFACT_LOAD_THREADS, thread_name_prefix="artifact") as pool:
+                futures = {name: pool.submit(_timed_load, name, loader, path) for name, (loader, path) in tasks.items()}
+                loaded = {name: future.result() for name, future in futures.items()}
+
+            self.fingerprint = artifacts_fingerprint([path for _, path in tasks.values()])
+
+            generic_artifacts = loaded['generic_preprocessing_artifacts.pkl']
             self.numeric_medians = generic_artifacts.get('numeric_medians', {})
             self.categorical_modes = generic_artifacts.get('categorical_modes', {})
             self.date_min = generic_artifacts.get('date_min')
-            print("✅ 'generic_preprocessing_artifacts.pkl' carregado.")
 
-            with open(artifacts_path / "coluns.json", "r", encoding='utf-8') as f:
-                self.coluns_json = json.load(f)
-            print("✅ 'coluns.json' carregado.")
+            self.coluns_json = loaded['coluns.json']
 
-            with open(artifacts_path / "clustering_artifacts_v2.pkl", "rb") as f:
-                cluster_artifacts = pickle.load(f)
+            cluster_artifacts = loaded['clustering_artifacts_v2.pkl']
             self.cluster_scaler = cluster_artifacts.get('scaler')
             self.cluster_model = cluster_artifacts.get('model')
             self.cluster_features = cluster_artifacts.get('features', [])
-            print("✅ 'clustering_artifacts_v2.pkl' carregado.")
 
-            self.targets = ['Target1', 'Target2', 'Target3']
             self.target_features = {}
             self.target_scalers = {}
             self.target_models = {}
             for target in self.targets:
-                features_path = prediction_artifacts_path / f'lista_features_{target}.joblib'
-                self.target_features[target] = joblib.load(features_path)
-                scaler_path = prediction_artifacts_path / f'scaler_{target}.joblib'
-                self.target_scalers[target] = joblib.load(scaler_path)
-                model_path = prediction_artifacts_path / f'modelo_final_{target}.joblib'
-                self.target_models[target] = joblib.load(model_path)
-            print(f"✅ Artefatos de predição para {len(self.targets)} targets carregados.")
-            print("-" * 50)
-            print("Artefatos (V2) carregados com sucesso!")
-            print("-" * 50)
+                self.target_features[target] = loaded[f'lista_features_{target}.joblib']
+                self.target_scalers[target] = loaded[f'scaler_{target}.joblib']
+                self.target_models[target] = loaded[f'modelo_final_{target}.joblib']
+            self.pipeline_features = self.required_features() if settings.PRUNE_UNUSED_FEATURES else None
+            # Estatísticas de referência: com elas, a pontuação de cada linha não depende do lote
+            self.reference_stats: Optional[EstatisticasReferencia] = loaded.get(ARQUIVO_ESTATISTICAS)
+            self.load_seconds = time.perf_counter() - start
+            logger.info(f"✅ Artefatos de predição para {len(self.targets)} targets carregados.")
+            logger.info(f"Artefatos (V2) carregados com sucesso em {self.load_seconds:.2f}s!")
         except FileNotFoundError as e:
-            print(f"❌ Erro crítico: Arquivo de modelo não encontrado: {e}")
+            logger.error(f"❌ Erro crítico: Arquivo de modelo não encontrado: {e}")
             raise e
         except Exception as e:
-            print(f"❌ Erro inesperado ao carregar os artefatos: {e}")
+            logger.error(f"❌ Erro inesperado ao carregar os artefatos: {e}")
             raise e
 
-    def execute_prediction_pipeline(self, df: pd.DataFrame) -> AnalysisResult:
-        print("\n🚀 Iniciando Pipeline de Predição V2...")
-        df_pipeline = df.copy()
-        total_rows = len(df_pipeline)
+    def warm_up(self) -> None:
+        """
+        Passa uma linha sintética (zeros) por cada scaler/modelo, para que a
+        primeira requisição real não pague a inicialização preguiçosa das bibliotecas.
+        """
+        start = time.perf_counter()
+        if self.cluster_model and self.cluster_scaler and self.cluster_features:
+            X = pd.DataFrame(np.zeros((1, len(self.cluster_features))), columns=self.cluster_features)
+            self.cluster_model.predict(self.cluster_scaler.transform(X))
+        for target in self.targets:
+            features = self.target_features[target]
+            X = pd.DataFrame(np.zeros((1, len(features))), columns=features)
+            target_start = time.perf_counter()
+            self.target_models[target].predict(self.target_scalers[target].transform(X))
+            logger.info(f"🔥 Warm-up de {target} em {time.perf_counter() - target_start:.3f}s.")
+        self.warm_up_seconds = time.perf_counter() - start
+        logger.info(f"🔥 Warm-up dos modelos concluído em {self.warm_up_seconds:.2f}s.")
+
+    def execute_prediction_pipeline(self, df: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> AnalysisResult:
+        """ Executa a pipeline e monta a resposta orientada a linhas (uma PredictionRow por jogador). """
+        return self.build_row_result(self.run_pipeline(df), projection)
+
+    def execute_prediction_pipeline_json(self, df: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> bytes:
+        """ Igual a `execute_prediction_pipeline`, já serializado em JSON (para cache e envio direto). """
+        result = self.execute_prediction_pipeline(df, projection)
+        with stage('serialize_json', result.processed_rows):
+            return result.model_dump_json().encode('utf-8')
+
+    def execute_prediction_pipeline_columnar(self, df: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> bytes:
+        """ Executa a pipeline e devolve a resposta colunar já serializada em JSON. """
+        output = self.run_pipeline(df)
+        with stage('serialize_columnar', len(output.df_pipeline)):
+            return columnar_response.serialize(output, projection)
+
+    def execute_prediction_export(self, df: pd.DataFrame, export_format: str, compression: str, features: Optional[List[str]] = None) -> bytes:
+        """
+        Executa a pipeline e devolve predições, codigo_acesso e `features` (padrão:
+        `export_features`) em um arquivo Parquet ou Arrow IPC (ver `columnar_export`).
+        """
+        columnar_export.check_export_options(export_format, compression)
+        output = self.run_pipeline(df)
+        with stage('serialize_export', len(output.df_pipeline)):
+            table = columnar_export.build_table(output.df_pipeline, self.export_features(output.df_pipeline, features))
+            return columnar_export.write_tables([table], export_format, compression)
+
+    def export_features(self, df_pipeline: pd.DataFrame, features: Optional[List[str]] = None) -> List[str]:
+        """ Features pedidas na exportação ou, sem pedido, as dos modelos de target presentes em `df_pipeline`. """
+        if features:
+            return list(dict.fromkeys(features))
+        model_features = dict.fromkeys(f for target in self.targets for f in self.target_features[target])
+        return [f for f in model_features if f in df_pipeline.columns]
+
+    def run_pipeline(self, df: pd.DataFrame, progress: Optional[Callable[[str], ContextManager]] = None) -> PipelineOutput:
+        """
+        Limpeza, features, clustering, predição, R² e heatmap, sem montar a resposta.
+        `progress(etapa)`, se informado, envolve cada etapa (ex.: o progresso dos jobs).
+        """
+        self.ensure_loaded()
+        logger.info("🚀 Iniciando Pipeline de Predição V2...")
+        total_rows = len(df)
+        etapa = progress or (lambda nome: nullcontext())
+
+        estatisticas = self.reference_stats
+        with etapa('prepare_features'):
+            df_pipeline, codigos_de_acesso = self.prepare_features(df, estatisticas)
+        with etapa('assign_clusters'):
+            df_pipeline = self.assign_clusters(df_pipeline, estatisticas)
+        with etapa('feature_engineering'):
+            df_pipeline = self.build_final_features(df_pipeline, estatisticas)
+        with etapa('predict_targets'):
+            predictions = self.predict_targets(df_pipeline)
+        with etapa('metrics'):
+            r2_scores = self.compute_r2_scores({t: df[t] for t in self.targets if t in df.columns}, predictions)
+            self.attach_predictions(df_pipeline, predictions, codigos_de_acesso)
+            heatmap_data = self.compute_heatmap(df_pipeline)
+
+        return PipelineOutput(
+            df_pipeline=df_pipeline,
+            total_rows=total_rows,
+            r2_scores=r2_scores,
+            heatmap_data=heatmap_data,
+            model_version=self.version
+        )
 
+    def score_rows(self, df: pd.DataFrame, parts: Optional[List[Tuple[int, Projection]]] = None) -> List[List[PredictionRow]]:
+        """
+        Só as predições (sem R² nem heatmap) das linhas de `df`, separadas em `parts`:
+        (número de linhas, projeção) de cada requisição do micro-batching de
+        `/predict/rows`, na ordem. Cada parte recebe as suas PredictionRows, com a
+        projeção aplicada antes da conversão por linha. Sem `parts`, uma parte só.
+        """
+        self.ensure_loaded()
+        estatisticas = self.reference_stats
+        df_pipeline, codigos_de_acesso = self.prepare_features(df, estatisticas)
+        df_pipeline = self.assign_clusters(df_pipeline, estatisticas)
+        df_pipeline = self.build_final_features(df_pipeline, estatisticas)
+        self.attach_predictions(df_pipeline, self.predict_targets(df_pipeline), codigos_de_acesso)
+        results, start = [], 0
+        for rows, projection in parts or [(len(df_pipeline), ALL_COLUMNS)]:
+            results.append(self.build_prediction_rows(df_pipeline.iloc[start:start + rows], projection))
+            start += rows
+        return results
+
+    def cleaning_plan(self, df: pd.DataFrame) -> CleaningPlan:
+        """ Plano de limpeza do esquema de `df` (cabeçalho + dtypes), compilado uma vez por esquema. """
+        key = schema_key(df.columns, df.dtypes)
+        return self.plan_cache.get('cleaning', key, lambda: compile_cleaning_plan(
+            df, self.coluns_json, self.numeric_medians, self.categorical_modes, key))
+
+    def final_features_plan(self, df_pipeline: pd.DataFrame) -> feature_builder.PlanoEngenhariaFinal:
+        """ Colunas mantidas e grupos de agregação do Bloco 11 para o cabeçalho de `df_pipeline`. """
+        return self.plan_cache.get('final_features', schema_key(df_pipeline.columns), lambda: feature_builder.planejar_engenharia_final(
+            df_pipeline.columns, self.coluns_json))
+
+    def model_inputs_plan(self, df_pipeline: pd.DataFrame) -> ModelInputsPlan:
+        """ Features de cada modelo presentes no cabeçalho de `df_pipeline` e suas posições na matriz única. """
+        return self.plan_cache.get('model_inputs', schema_key(df_pipeline.columns), lambda: compile_model_inputs_plan(
+            df_pipeline.columns, self.target_features, self.targets))
+
+    @staticmethod
+    def _columns_where(df_pipeline: pd.DataFrame, entries, test) -> list:
+        """
+        Entradas do plano (a coluna é o primeiro item) cuja coluna satisfaz `test`,
+        avaliado uma única vez sobre o bloco de colunas (em vez de coluna a coluna).
+        """
+        if not entries:
+            return []
+        result = test(df_pipeline[[entry[0] for entry in entries]]).to_numpy()
+        return [entry for entry, selected in zip(entries, result) if selected]
+
+    # As etapas abaixo recebem `estatisticas` opcionais: sem elas, as medianas,
+    # mínimos e categorias são calculados sobre o próprio lote (comportamento original).
+    # `run_pipeline` passa as estatísticas de referência, quando carregadas.
+
+    def prepare_features(self, df: pd.DataFrame, estatisticas: Optional[EstatisticasReferencia] = None):
+        """ Limpeza, cores, datas e Blocos 7-9. Retorna (df_pipeline, códigos de acesso). """
+        estatisticas = estatisticas or EstatisticasReferencia()
         # CORREÇÃO 1: Preserva o 'Código de Acesso'
-        codigos_de_acesso = df_pipeline['Código de Acesso'].copy() if 'Código de Acesso' in df_pipeline.columns else None
-        if 'Código de Acesso' in df_pipeline.columns:
-            df_pipeline.drop(columns=['Código de Acesso'], inplace=True)
-        
-        colunas_para_converter = ['T01', 'P03', 'T05', 'P12', 'T15']
-        for col in colunas_para_converter:
-            if col in df_pipeline.columns:
-                df_pipeline[col] = pd.to_numeric(df_pipeline[col], errors='coerce')
+        codigos_de_acesso = df['Código de Acesso'].copy() if 'Código de Acesso' in df.columns else None
 
-        colunas_a_remover = ['F0299 - Explicação Tempo', 'T1199Expl', 'T1205Expl']
-        df_pipeline.drop(columns=[col for col in colunas_a_remover if col in df_pipeline.columns], inplace=True)
-
-        colunas_com_negativos = self.coluns_json.get('colunas_com_negativos', [])
-        colunas_nao_respondeu = self.coluns_json.get('colunas_nao_respondeu', [])
-        colunas_missing_flags = self.coluns_json.get('colunas_missing', [])
-
-        for col in df_pipeline.select_dtypes(include=np.number).columns:
-            if '_nao_respondeu' in col or '_tinha_missing' in col: continue
-            mascara_negativos = (df_pipeline[col] < 0).fillna(False)
-            if mascara_negativos.sum() > 0:
-                df_pipeline.loc[mascara_negativos, col] = self.numeric_medians.get(col, 0)
-                if col in colunas_com_negativos:
-                    flag_col = f'{col}_nao_respondeu'
-                    if flag_col in colunas_nao_respondeu:
-                        if flag_col not in df_pipeline: df_pipeline[flag_col] = 0
-                        df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
-                        df_pipeline.loc[mascara_negativos, flag_col] = 1
+        with stage('cleaning', len(df)):
+            plan = self.cleaning_plan(df)
+            # A remoção das colunas já gera a cópia de trabalho (sem um df.copy() extra)
+            df_pipeline = df.drop(columns=list(plan.drop))
+
+            # Já numéricas quando o DataFrame vem do `upload_reader` (conversão sem custo)
+            for col in plan.convert:
+                df_pipeline[col] = pd.to_numeric(df_pipeline[col], errors='coerce')
 
-        for col in df_pipeline.select_dtypes(include='object').columns:
-             if col in colunas_com_negativos:
+            # Flags ausentes criadas de uma vez (com 0), antes do tratamento dos negativos:
+            # a posição delas não depende de quais colunas têm negativos (nem em qual bloco)
+            if plan.missing_flags:
+                zeros = pd.DataFrame(np.zeros((len(df_pipeline), len(plan.missing_flags)), dtype=np.int64),
+                                     columns=list(plan.missing_flags), index=df_pipeline.index)
+                df_pipeline = pd.concat([df_pipeline, zeros], axis=1)
+
+            # Uma comparação para todas as colunas numéricas; só as que têm negativos são tratadas
+            com_negativos = self._columns_where(df_pipeline, plan.negative_numeric, lambda bloco: (bloco < 0).any())
+            for col, mediana, flag_col in com_negativos:
+                mascara_negativos = (df_pipeline[col] < 0).fillna(False)
+                df_pipeline.loc[mascara_negativos, col] = mediana
+                if flag_col is not None:
+                    df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
+                    df_pipeline.loc[mascara_negativos, flag_col] = 1
+
+            for col, moda, flag_col in plan.negative_text:
                 mascara_negativos_str = df_pipeline[col].astype(str).str.contains(r'^-\\d+$', na=False)
                 if mascara_negativos_str.sum() > 0:
-                    flag_col = f'{col}_nao_respondeu'
-                    if flag_col in colunas_nao_respondeu:
-                         if flag_col not in df_pipeline: df_pipeline[flag_col] = 0
-                         df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
-                         df_pipeline.loc[mascara_negativos_str, flag_col] = 1
-                    df_pipeline.loc[mascara_negativos_str, col] = self.categorical_modes.get(col, 'Desconhecido')
-
-        for flag_col in colunas_nao_respondeu + colunas_missing_flags:
-            if flag_col not in df_pipeline.columns: df_pipeline[flag_col] = 0
-            df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
-
-        all_imputable_cols = list(self.numeric_medians.keys()) + list(self.categorical_modes.keys())
-        for col in all_imputable_cols:
-            if col in df_pipeline.columns and df_pipeline[col].isna().any():
-                mascara_nan = df_pipeline[col].isna()
-                flag_col = f'{col}_tinha_missing'
-                if flag_col in colunas_missing_flags:
-                     df_pipeline.loc[mascara_nan, flag_col] = 1
-                if col in self.numeric_medians: df_pipeline[col].fillna(self.numeric_medians[col], inplace=True)
-                elif col in self.categorical_modes: df_pipeline[col].fillna(self.categorical_modes[col], inplace=True)
-
-        for col in df_pipeline.select_dtypes(include='object').columns:
-            if df_pipeline[col].isna().any(): df_pipeline[col].fillna('Desconhecido', inplace=True)
+                    if flag_col is not None:
+                        df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
+                        df_pipeline.loc[mascara_negativos_str, flag_col] = 1
+                    df_pipeline.loc[mascara_negativos_str, col] = moda
+
+            # Nas flags que já vieram no arquivo, NaN vira 0
+            for flag_col, in self._columns_where(df_pipeline, [(f,) for f in plan.present_flags], lambda bloco: bloco.isna().any()):
+                df_pipeline[flag_col] = df_pipeline[flag_col].fillna(0)
+
+            # Imputação em um único fillna no próprio DataFrame (o fillna encadeado em
+            # df_pipeline[col] não altera o DataFrame com Copy-on-Write)
+            com_nan = self._columns_where(df_pipeline, plan.imputable, lambda bloco: bloco.isna().any())
+            for col, flag_col, _ in com_nan:
+                if flag_col is not None:
+                    df_pipeline.loc[df_pipeline[col].isna(), flag_col] = 1
+            if com_nan:
+                df_pipeline.fillna({col: valor for col, _, valor in com_nan}, inplace=True)
+
+            textos_com_nan = self._columns_where(df_pipeline, [(c,) for c in plan.text_columns], lambda bloco: bloco.isna().any())
+            if textos_com_nan:
+                df_pipeline.fillna({col: 'Desconhecido' for col, in textos_com_nan}, inplace=True)
         
-        colunas_cor = self.coluns_json.get('colunas_cor', [])
-        df_pipeline = preprocessing.engenharia_features_cor(df_pipeline, colunas_cor)
-
-        if 'Data/Hora Último' in df_pipeline.columns:
-            df_pipeline['Data/Hora Último'] = pd.to_datetime(df_pipeline['Data/Hora Último'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
-            if not df_pipeline['Data/Hora Último'].isna().all():
-                df_pipeline['dia_semana'] = df_pipeline['Data/Hora Último'].dt.dayofweek
-                df_pipeline['hora_dia'] = df_pipeline['Data/Hora Último'].dt.hour
-                df_pipeline['mes'] = df_pipeline['Data/Hora Último'].dt.month
-                # --- INÍCIO DA CORREÇÃO 2 ---
-                # Adiciona a criação da feature 'dia_mes' que estava faltando
-                df_pipeline['dia_mes'] = df_pipeline['Data/Hora Último'].dt.day
-                # --- FIM DA CORREÇÃO 2 ---
-                df_pipeline['eh_fim_semana'] = (df_pipeline['dia_semana'] >= 5).astype(int)
-                date_min_artifact = pd.to_datetime(self.date_min) if self.date_min else df_pipeline['Data/Hora Último'].min()
-                df_pipeline['dias_desde_inicio'] = (df_pipeline['Data/Hora Último'] - date_min_artifact).dt.days
-                df_pipeline.drop(columns=['Data/Hora Último'], inplace=True)
+        with stage('colour_features', len(df_pipeline)):
+            colunas_cor = self.coluns_json.get('colunas_cor', [])
+            df_pipeline = preprocessing.engenharia_features_cor(df_pipeline, colunas_cor)
+
+        with stage('date_features', len(df_pipeline)):
+            if 'Data/Hora Último' in df_pipeline.columns:
+                df_pipeline['Data/Hora Último'] = pd.to_datetime(df_pipeline['Data/Hora Último'], format='%d/%m/%Y %H:%M:%S', errors='coerce')
+                datas = df_pipeline['Data/Hora Último']
+                tem_datas_validas = estatisticas.tem_datas_validas if estatisticas.tem_datas_validas is not None else not datas.isna().all()
+                if tem_datas_validas:
+                    df_pipeline['dia_semana'] = df_pipeline['Data/Hora Último'].dt.dayofweek
+                    df_pipeline['hora_dia'] = df_pipeline['Data/Hora Último'].dt.hour
+                    df_pipeline['mes'] = df_pipeline['Data/Hora Último'].dt.month
+                    # --- INÍCIO DA CORREÇÃO 2 ---
+                    # Adiciona a criação da feature 'dia_mes' que estava faltando
+                    df_pipeline['dia_mes'] = df_pipeline['Data/Hora Último'].dt.day
+                    # --- FIM DA CORREÇÃO 2 ---
+                    df_pipeline['eh_fim_semana'] = (df_pipeline['dia_semana'] >= 5).astype(int)
+                    if self.date_min:
+                        date_min_artifact = pd.to_datetime(self.date_min)
+                    elif estatisticas.data_minima is not None:
+                        date_min_artifact = estatisticas.data_minima
+                    else:
+                        date_min_artifact = df_pipeline['Data/Hora Último'].min()
+                    df_pipeline['dias_desde_inicio'] = (df_pipeline['Data/Hora Último'] - date_min_artifact).dt.days
+                    df_pipeline.drop(columns=['Data/Hora Último'], inplace=True)
 
         colunas_a_remover2 = ['Q1202', 'Q1203', 'Q1207', 'Cor0206_eh_preto']
         df_pipeline.drop(columns=[col for col in colunas_a_remover2 if col in df_pipeline.columns], inplace=True)
 
-        df_pipeline = feature_engineering.criar_features_desempenho_jogo1(df_pipeline)
-        df_pipeline = feature_engineering.criar_features_tempo_contexto(df_pipeline)
-        df_pipeline = feature_engineering.criar_features_interacao(df_pipeline)
-
-        if self.cluster_model and self.cluster_scaler and self.cluster_features:
-            missing_cluster_features = [f for f in self.cluster_features if f not in df_pipeline.columns]
-            if not missing_cluster_features:
-                df_for_clustering = df_pipeline[self.cluster_features].copy()
-                df_for_clustering.fillna(df_for_clustering.median(), inplace=True)
-                X_scaled = self.cluster_scaler.transform(df_for_clustering)
-                df_pipeline['Cluster'] = self.cluster_model.predict(X_scaled)
+        # Blocos 7, 8 e 9 em passada única (mesma saída de feature_engineering)
+        with stage('player_features', len(df_pipeline)) as etapa:
+            plano = self.plan_cache.get('player_features', schema_key(df_pipeline.columns),
+                                        lambda: feature_builder.planejar_features_jogador(df_pipeline.columns))
+            df_pipeline = feature_builder.construir_features_jogador(df_pipeline, estatisticas.mediana_tempo, plano)
+            etapa.frame = df_pipeline
+
+        return df_pipeline, codigos_de_acesso
+
+    def assign_clusters(self, df_pipeline: pd.DataFrame, estatisticas: Optional[EstatisticasReferencia] = None) -> pd.DataFrame:
+        """ Adiciona a coluna 'Cluster' (-1 quando o modelo de clustering não se aplica). """
+        estatisticas = estatisticas or EstatisticasReferencia()
+        with stage('clustering', len(df_pipeline)):
+            if self.cluster_model and self.cluster_scaler and self.cluster_features:
+                missing_cluster_features = [f for f in self.cluster_features if f not in df_pipeline.columns]
+                if not missing_cluster_features:
+                    df_for_clustering = df_pipeline[self.cluster_features].copy()
+                    if estatisticas.medianas_cluster is not None:
+                        df_for_clustering.fillna(pd.Series(estatisticas.medianas_cluster), inplace=True)
+                    else:
+                        df_for_clustering.fillna(df_for_clustering.median(), inplace=True)
+                    X_scaled = self.cluster_scaler.transform(df_for_clustering)
+                    df_pipeline['Cluster'] = self.cluster_model.predict(X_scaled)
+                else:
+                    df_pipeline['Cluster'] = -1
             else:
                 df_pipeline['Cluster'] = -1
-        else:
-            df_pipeline['Cluster'] = -1
-
-        df_pipeline = feature_engineering.engenharia_final(df_pipeline, self.coluns_json)
-
-        predictions = {}
-        for target in self.targets:
-            print(f"   -> Predizendo {target}...")
-            features_to_use = self.target_features[target]
-            scaler = self.target_scalers[target]
-            model = self.target_models[target]
-
-            missing_model_features = [f for f in features_to_use if f not in df_pipeline.columns]
-            if missing_model_features:
-                 print(f"      ❌ ERRO: Features para {target} não encontradas: {missing_model_features}")
-                 predictions[target] = np.full(len(df_pipeline), np.nan)
-                 continue
-
-            X_predict = df_pipeline[features_to_use].copy()
-            
-            invalid_cols = X_predict.columns[X_predict.isna().any() | np.isinf(X_predict).any()].tolist()
-            if invalid_cols:
-                print(f"      ⚠️ AVISO: Encontrados valores NaN/Inf nas colunas para {target}: {invalid_cols}")
-                for col in invalid_cols:
-                    median_val = X_predict[col].median()
-                    X_predict[col].fillna(median_val, inplace=True)
-                X_predict.replace([np.inf, -np.inf], 0, inplace=True)
-                print("         -> Valores inválidos corrigidos.")
-
-            try:
-                X_predict_scaled = scaler.transform(X_predict)
-                prediction = model.predict(X_predict_scaled)
-                predictions[target] = prediction
-                print(f"      ✅ Predição para {target} concluída.")
-            except Exception as e:
-                print(f"      ❌ ERRO ao prever {target}: {e}")
-                predictions[target] = np.full(len(df_pipeline), np.nan)
-
-        # --- SEÇÃO ADICIONAL: CÁLCULO DO R² ---
-        print("    -> Calculando R² (se houver dados reais)...")
-        r2_scores: Dict[str, Optional[float]] = {
-            'Target1': None,
-            'Target2': None,
-            'Target3': None
-        }
-        
+        return df_pipeline
+
+    def build_final_features(self, df_pipeline: pd.DataFrame, estatisticas: Optional[EstatisticasReferencia] = None) -> pd.DataFrame:
+        """
+        Engenharia final (Bloco 11), só com as features derivadas usadas (`pipeline_features`).
+        Com `settings.COMPACT_DTYPES`, o resultado passa pela compactação de tipos.
+        """
+        with stage('final_features', len(df_pipeline)) as etapa:
+            df_final = feature_builder.construir_engenharia_final(df_pipeline, self.coluns_json, estatisticas, self.pipeline_features,
+                                                                  self.final_features_plan(df_pipeline))
+            etapa.frame = df_final
+        if settings.COMPACT_DTYPES:
+            with stage('compact_dtypes', len(df_final)) as etapa:
+                df_final = compactacao.compactar_tipos(df_final, self.full_precision_features())
+                etapa.frame = df_final
+        return df_final
+
+    def full_precision_features(self) -> Set[str]:
+        """
+        Colunas que a compactação de tipos mantém em float64: as features dos modelos
+        e do heatmap (nenhuma com `settings.COMPACT_MODEL_FEATURES`).
+        """
+        if settings.COMPACT_MODEL_FEATURES:
+            return set()
+        features = set(self.heatmap_features())
         for target in self.targets:
-            if target in df.columns:
-                y_true_series = pd.to_numeric(df[target], errors='coerce')
-                y_pred_series = pd.Series(predictions.get(target))
-                
-                valid_mask = y_true_series.notna() & y_pred_series.notna()
-                
-                if valid_mask.sum() > 1: # Precisa de pelo menos 2 pontos
-                    y_true_valid = y_true_series[valid_mask]
-                    y_pred_valid = y_pred_series[valid_mask]
-                    try:
-                        score = r2_score(y_true_valid, y_pred_valid)
-                        r2_scores[target] = float(score)
-                        print(f"         ✅ R² para {target}: {score:.4f}")
-                    except Exception as r2_e:
-                        print(f"         ⚠️ Não foi possível calcular R² para {target}: {r2_e}")
+            features.update(self.target_features[target])
+        return features
+
+    def feature_matrix(self, df_pipeline: pd.DataFrame, features: List[str]) -> np.ndarray:
+        """
+        Matriz float64 (n_linhas x len(features), ordem de colunas) montada uma vez
+        para todos os targets. NaN vira a mediana da coluna e ±Inf vira 0 — a mesma
+        correção que antes era feita para cada target, e que só depende da coluna.
+        """
+        matrix = np.empty((len(df_pipeline), len(features)), dtype=np.float64, order='F')
+        invalid_cols = []
+        for j, col in enumerate(features):
+            column = matrix[:, j]
+            column[:] = df_pipeline[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            nan_mask = np.isnan(column)
+            if not (nan_mask.any() or np.isinf(column).any()):
+                continue
+            invalid_cols.append(col)
+            if nan_mask.any() and not nan_mask.all():
+                # Mediana calculada antes de corrigir os ±Inf, como no pandas
+                column[nan_mask] = np.median(column[~nan_mask])
+            column[np.isinf(column)] = 0
+        if invalid_cols:
+            logger.warning(f"      ⚠️ AVISO: Encontrados valores NaN/Inf nas colunas: {invalid_cols}")
+            logger.info("         -> Valores inválidos corrigidos.")
+        return matrix
+
+    def _predict_target(self, target: str, X_predict: pd.DataFrame) -> Tuple[np.ndarray, float]:
+        """ Escala e prediz um target; devolve (predição, segundos gastos). """
+        start = time.perf_counter()
+        with stage(f'predict_{target}', len(X_predict)):
+            X_predict_scaled = self.target_scalers[target].transform(X_predict)
+            prediction = self.target_models[target].predict(X_predict_scaled)
+        return prediction, time.perf_counter() - start
+
+    def predict_targets(self, df_pipeline: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Predição dos três targets (NaN quando faltam features ou o modelo falha).
+
+        As features de todos os targets viram uma única matriz (`feature_matrix`);
+        cada target recebe as suas colunas dela e os pares scaler+modelo rodam em
+        paralelo (`settings.TARGET_INFERENCE_THREADS`), já que o NumPy/scikit-learn
+        liberam o GIL. O tempo de cada target é informado no log.
+        """
+        predictions = {}
+        plan = self.model_inputs_plan(df_pipeline)
+        for target, missing_model_features in plan.missing.items():
+            logger.error(f"      ❌ ERRO: Features para {target} não encontradas: {missing_model_features}")
+            predictions[target] = np.full(len(df_pipeline), np.nan)
+        runnable = list(plan.runnable)
+        if not runnable:
+            return predictions
+
+        with stage('feature_matrix', len(df_pipeline)):
+            matrix = self.feature_matrix(df_pipeline, list(plan.columns))
+        inputs = {}
+        for target in runnable:
+            # DataFrame sobre a mesma memória, para o scaler validar os nomes das features
+            inputs[target] = pd.DataFrame(matrix[:, plan.selectors[target]], columns=self.target_features[target],
+                                          index=df_pipeline.index, copy=False)
+
+        logger.info(f"   -> Predizendo {', '.join(runnable)}...")
+        workers = max(1, min(settings.TARGET_INFERENCE_THREADS, len(runnable)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference") as pool:
+            futures = {target: pool.submit(self._predict_target, target, inputs[target]) for target in runnable}
+            for target in runnable:
+                try:
+                    predictions[target], seconds = futures[target].result()
+                    logger.info(f"      ✅ Predição para {target} concluída em {seconds * 1000:.1f} ms.")
+                except Exception as e:
+                    logger.error(f"      ❌ ERRO ao prever {target}: {e}")
+                    predictions[target] = np.full(len(df_pipeline), np.nan)
+        return {target: predictions[target] for target in self.targets}
+
+    def compute_r2_scores(self, y_true: Dict[str, pd.Series], predictions: Dict[str, np.ndarray]) -> Dict[str, Optional[float]]:
+        """ R² de cada target com valores reais em `y_true` (target -> coluna real). """
+        accumulator = self.r2_accumulator()
+        rows = len(next(iter(predictions.values()))) if predictions else 0
+        accumulator.update(y_true, predictions, rows)
+        return self.finish_r2_scores(accumulator)
+
+    def r2_accumulator(self, start_row: int = 0) -> R2Accumulator:
+        """ Acumulador do R² dos targets (ver `streaming_metrics`), para execuções em blocos ou shards. """
+        return R2Accumulator(self.targets, start_row)
+
+    def finish_r2_scores(self, accumulator: R2Accumulator) -> Dict[str, Optional[float]]:
+        """ R² final de cada target a partir do acumulador, com o mesmo log do cálculo direto. """
+        with stage('r2_scores'):
+            # --- SEÇÃO ADICIONAL: CÁLCULO DO R² ---
+            logger.info("    -> Calculando R² (se houver dados reais)...")
+            r2_scores = accumulator.scores()
+            valid_rows = accumulator.valid_rows()
+            for target in self.targets:
+                if target not in accumulator.seen:
+                    logger.info(f"         ℹ️ Coluna {target} real não encontrada no CSV. Pulando R².")
+                elif r2_scores[target] is None:
+                    logger.info(f"         ℹ️ Coluna {target} real encontrada, mas sem dados válidos suficientes para R² ({valid_rows[target]} linhas).")
                 else:
-                    print(f"         ℹ️ Coluna {target} real encontrada, mas sem dados válidos suficientes para R².")
-            else:
-                print(f"         ℹ️ Coluna {target} real não encontrada no CSV. Pulando R².")
-        # --- FIM DA SEÇÃO R² ---
+                    logger.info(f"         ✅ R² para {target}: {r2_scores[target]:.4f}")
+            # --- FIM DA SEÇÃO R² ---
+        return r2_scores
 
+    def attach_predictions(self, df_pipeline: pd.DataFrame, predictions: Dict[str, np.ndarray], codigos_de_acesso: Optional[pd.Series]) -> None:
+        """ Adiciona as colunas PREDICAO_Target* e o 'Código de Acesso (Original)'. """
         df_pipeline['PREDICAO_Target1'] = predictions.get('Target1', np.nan)
         df_pipeline['PREDICAO_Target2'] = predictions.get('Target2', np.nan)
         df_pipeline['PREDICAO_Target3'] = predictions.get('Target3', np.nan)
 
-        heatmap_data: Optional[List[HeatmapDataRow]] = None
-        try:
-            print("    -> Calculando Heatmap de Correlação...")
-            pred_cols = ['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3']
-            
-            # Pega as features mais importantes do seu coluns.json
-            top_features = list(set(
-                self.coluns_json.get('target1_top10', []) +
-                self.coluns_json.get('target2_top10', []) +
-                self.coluns_json.get('target3_top10', [])
-            ))
-            # Adiciona outras features-chave que criamos
-            key_features = [
-                'taxa_acerto_total', 'tempo_medio_questao', 'media_emocional', 
-                'qualidade_sono', 'satisfacao_jogo', 'Cluster_0', 'Cluster_1'
-            ]
-            features_to_corr = sorted(list(set(top_features + key_features)))
-            # Garante que as colunas realmente existem no DF processado
-            features_to_corr = [f for f in features_to_corr if f in df_pipeline.columns]
-
-            if features_to_corr:
-                # Calcula a matriz de correlação completa
-                corr_matrix = df_pipeline[features_to_corr + pred_cols].corr()
-                
-                # Filtra apenas a correlação das features contra as predições
-                corr_data = corr_matrix[pred_cols].loc[features_to_corr]
-                
-                # Formata para o Nivo
-                heatmap_dict_list = [] # <-- MUDANÇA: Agora é _dict_list
-                for feature, row in corr_data.iterrows():
-                    # Cria um dicionário para a linha
-                    nivo_row_dict = {"id": feature, "data": []} # <-- MUDANÇA: É um dict
-                    for target_name, value in row.items():
-                        if pd.notna(value):
-                            clean_target_name = target_name.replace('PREDICAO_', '')
-                            # Cria um dicionário para o ponto de dado
-                            data_item_dict = {"x": clean_target_name, "y": round(value, 3)} # <-- MUDANÇA: É um dict
-                            nivo_row_dict["data"].append(data_item_dict) # <-- Adiciona o dict
-                    heatmap_dict_list.append(nivo_row_dict) # <-- Adiciona o dict da linha
-                
-                heatmap_data = heatmap_dict_list
-                print(f"         ✅ Heatmap de correlação calculado para {len(heatmap_data)} features.")
-            else:
-                print("         ℹ️ Nenhuma feature de correlação encontrada para o heatmap.")
-        except Exception as e:
-            print(f"         ⚠️ Erro ao calcular heatmap de correlação: {e}")
-
         # CORREÇÃO 1: Adiciona o 'Código de Acesso' de volta
         if codigos_de_acesso is not None:
             codigos_de_acesso.index = df_pipeline.index
             df_pipeline['Código de Acesso (Original)'] = codigos_de_acesso
-            
+
+    def required_features(self) -> Set[str]:
+        """
+        Features que algum modelo de target, o modelo de clustering ou o heatmap
+        usam, mais as colunas de que elas dependem (grafo do Bloco 11). As features
+        derivadas fora deste conjunto não são calculadas (`settings.PRUNE_UNUSED_FEATURES`).
+        """
+        usadas = set(self.cluster_features) | set(self.heatmap_features())
+        for target in self.targets:
+            usadas.update(self.target_features[target])
+        return feature_builder.fechar_dependencias(usadas, self.coluns_json)
+
+    def feature_report(self) -> dict:
+        """
+        Quais features derivadas do Bloco 11 são calculadas e quais são puladas.
+        Das '_vs_cluster_mean', só as calculadas são listadas: as demais dependem das colunas do upload.
+        """
+        self.ensure_loaded()
+        necessarias = self.pipeline_features
+        polinomiais = list(feature_builder.nomes_polinomiais(self.coluns_json))
+        agregacoes = feature_builder.nomes_agregacoes()
+        if necessarias is None:
+            return {"pruning_enabled": False, "skipped_aggregates": [], "skipped_polynomials": []}
+        return {
+            "pruning_enabled": True,
+            "required_features": len(necessarias),
+            "computed_cluster_interactions": sorted(f for f in necessarias if f.endswith('_vs_cluster_mean')),
+            "computed_aggregates": [f for f in agregacoes if f in necessarias],
+            "skipped_aggregates": [f for f in agregacoes if f not in necessarias],
+            "computed_polynomials": [f for f in polinomiais if f in necessarias],
+            "skipped_polynomials": [f for f in polinomiais if f not in necessarias],
+        }
+
+    def heatmap_features(self) -> List[str]:
+        """ Features candidatas do heatmap (top10 de cada target e features-chave), ordenadas. """
+        # Pega as features mais importantes do seu coluns.json
+        top_features = list(set(
+            self.coluns_json.get('target1_top10', []) +
+            self.coluns_json.get('target2_top10', []) +
+            self.coluns_json.get('target3_top10', [])
+        ))
+        # Adiciona outras features-chave que criamos
+        key_features = [
+            'taxa_acerto_total', 'tempo_medio_questao', 'media_emocional', 
+            'qualidade_sono', 'satisfacao_jogo', 'Cluster_0', 'Cluster_1'
+        ]
+        return sorted(list(set(top_features + key_features)))
+
+    def compute_heatmap(self, df_pipeline: pd.DataFrame) -> Optional[List[dict]]:
+        """ Correlação das features principais com as predições, no formato do Nivo. """
+        accumulator = self.heatmap_accumulator()
+        with stage('heatmap', len(df_pipeline)):
+            try:
+                accumulator.update(df_pipeline)
+            except Exception as e:
+                logger.warning(f"         ⚠️ Erro ao calcular heatmap de correlação: {e}")
+                return None
+        return self.finish_heatmap(accumulator)
+
+    def heatmap_accumulator(self, start_row: int = 0) -> CorrelationAccumulator:
+        """
+        Acumulador das correlações do heatmap (candidatas de `heatmap_features` x
+        predições), para execuções em blocos ou shards.
+        """
+        return CorrelationAccumulator(self.heatmap_features(), ['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3'], start_row)
+
+    def finish_heatmap(self, accumulator: CorrelationAccumulator) -> Optional[List[dict]]:
+        """ Heatmap no formato do Nivo a partir do acumulador (features vistas em algum lote). """
+        heatmap_data: Optional[List[dict]] = None
+        with stage('heatmap'):
+            try:
+                logger.info("    -> Calculando Heatmap de Correlação...")
+                correlations = accumulator.correlations()
+
+                if correlations:
+                    # Formata para o Nivo: uma linha por feature, um ponto por target
+                    heatmap_data = [
+                        {"id": feature, "data": [
+                            {"x": pred_col.replace('PREDICAO_', ''), "y": round(value, 3)}
+                            for pred_col, value in row.items() if pd.notna(value)
+                        ]}
+                        for feature, row in correlations.items()
+                    ]
+                    logger.info(f"         ✅ Heatmap de correlação calculado para {len(heatmap_data)} features.")
+                else:
+                    logger.info("         ℹ️ Nenhuma feature de correlação encontrada para o heatmap.")
+            except Exception as e:
+                logger.warning(f"         ⚠️ Erro ao calcular heatmap de correlação: {e}")
+        return heatmap_data
+
+    def run_pipeline_chunked(self, chunks: Iterable[pd.DataFrame]) -> ChunkedPipelineRun:
+        """ Pipeline em blocos de linhas: itere o resultado para obter um PipelineOutput por bloco. """
+        self.ensure_loaded()
+        return ChunkedPipelineRun(self, chunks)
+
+    def execute_prediction_pipeline_chunked(self, chunks: Iterable[pd.DataFrame], projection: Projection = ALL_COLUMNS) -> AnalysisResult:
+        """ Igual a `execute_prediction_pipeline`, processando o arquivo bloco a bloco. """
+        run = self.run_pipeline_chunked(chunks)
+        prediction_rows = []
+        for output in run:
+            prediction_rows.extend(self.build_prediction_rows(output.df_pipeline, projection))
+
+        logger.info("✅ Pipeline concluída com sucesso!")
+        return AnalysisResult(
+            total_rows=run.total_rows,
+            processed_rows=len(prediction_rows),
+            predictions=prediction_rows,
+            r2_score_target1=run.r2_scores['Target1'],
+            r2_score_target2=run.r2_scores['Target2'],
+            r2_score_target3=run.r2_scores['Target3'],
+            correlation_heatmap_data=run.heatmap_data,
+            model_version=self.version
+        )
+
+    def execute_prediction_pipeline_chunked_json(self, chunks: Iterable[pd.DataFrame], projection: Projection = ALL_COLUMNS) -> bytes:
+        """ Igual a `execute_prediction_pipeline_chunked`, já serializado em JSON. """
+        result = self.execute_prediction_pipeline_chunked(chunks, projection)
+        with stage('serialize_json', result.processed_rows):
+            return result.model_dump_json().encode('utf-8')
+
+    def execute_prediction_pipeline_columnar_chunked(self, chunks: Iterable[pd.DataFrame], projection: Projection = ALL_COLUMNS) -> bytes:
+        """ Igual a `execute_prediction_pipeline_columnar`, processando o arquivo bloco a bloco. """
+        return columnar_response.serialize_chunks(self.run_pipeline_chunked(chunks), projection)
+
+    def execute_prediction_export_chunked(self, chunks: Iterable[pd.DataFrame], export_format: str, compression: str, features: Optional[List[str]] = None) -> bytes:
+        """ Igual a `execute_prediction_export`, processando o arquivo bloco a bloco (uma tabela Arrow por bloco). """
+        columnar_export.check_export_options(export_format, compression)
+        tables = []
+        for output in self.run_pipeline_chunked(chunks):
+            with stage('serialize_export', len(output.df_pipeline)):
+                tables.append(columnar_export.build_table(output.df_pipeline, self.export_features(output.df_pipeline, features)))
+        with stage('serialize_export'):
+            return columnar_export.write_tables(tables, export_format, compression)
+
+    def build_row_result(self, output: PipelineOutput, projection: Projection = ALL_COLUMNS) -> AnalysisResult:
+        """ Monta o AnalysisResult linha a linha (formato consumido pelo dashboard). """
+        df_pipeline = output.df_pipeline
+        r2_scores = output.r2_scores
+        prediction_rows = self.build_prediction_rows(df_pipeline, projection)
+
+        logger.info("✅ Pipeline concluída com sucesso!")
+        return AnalysisResult(
+            total_rows=output.total_rows,
+            processed_rows=len(df_pipeline),
+            predictions=prediction_rows,
+            r2_score_target1=r2_scores['Target1'],
+            r2_score_target2=r2_scores['Target2'],
+            r2_score_target3=r2_scores['Target3'],
+            correlation_heatmap_data=output.heatmap_data,
+            model_version=output.model_version
+        )
+
+    def build_prediction_rows(self, df_pipeline: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> List[PredictionRow]:
+        """ Uma PredictionRow por linha de `df_pipeline`; `original_data` só com as colunas de `projection`. """
+        with stage('build_rows', len(df_pipeline)):
+            return self._build_prediction_rows(df_pipeline, projection)
+
+    def _build_prediction_rows(self, df_pipeline: pd.DataFrame, projection: Projection = ALL_COLUMNS) -> List[PredictionRow]:
         prediction_rows = []
-        for index, row in df_pipeline.iterrows():
-            original_dict = row.drop(['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3'], errors='ignore').to_dict()
+        pred_cols = ['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3']
+        predictions = {col: df_pipeline[col].to_numpy() for col in pred_cols}
+        codigos = df_pipeline['Código de Acesso (Original)'].to_numpy() if 'Código de Acesso (Original)' in df_pipeline.columns else None
+
+        # A projeção é aplicada antes do iterrows: colunas fora dela nem são convertidas
+        if projection.is_all:
+            originals = (row.drop(pred_cols, errors='ignore').to_dict() for _, row in df_pipeline.iterrows())
+        else:
+            original_columns = projection.select(col for col in df_pipeline.columns if col not in pred_cols)
+            if original_columns:
+                originals = (row.to_dict() for _, row in df_pipeline[original_columns].iterrows())
+            else:
+                originals = ({} for _ in range(len(df_pipeline)))
+
+        for i, original_dict in enumerate(originals):
             for key, value in original_dict.items():
                 if isinstance(value, (np.integer, np.floating)) and (pd.isna(value) or np.isinf(value)):
                     original_dict[key] = None
@@ -301,29 +780,17 @@ class PredictionService:
                     original_dict[key] = float(value)
 
             codigo_acesso = None
-            if 'Código de Acesso (Original)' in row.index and pd.notna(row['Código de Acesso (Original)']):
-                codigo_acesso = str(row['Código de Acesso (Original)'])
+            if codigos is not None and pd.notna(codigos[i]):
+                codigo_acesso = str(codigos[i])
 
             prediction_rows.append(
                 PredictionRow(
-                    PREDICAO_Target1=row['PREDICAO_Target1'] if pd.notna(row['PREDICAO_Target1']) else None,
-                    PREDICAO_Target2=row['PREDICAO_Target2'] if pd.notna(row['PREDICAO_Target2']) else None,
-                    PREDICAO_Target3=row['PREDICAO_Target3'] if pd.notna(row['PREDICAO_Target3']) else None,
+                    PREDICAO_Target1=predictions['PREDICAO_Target1'][i] if pd.notna(predictions['PREDICAO_Target1'][i]) else None,
+                    PREDICAO_Target2=predictions['PREDICAO_Target2'][i] if pd.notna(predictions['PREDICAO_Target2'][i]) else None,
+                    PREDICAO_Target3=predictions['PREDICAO_Target3'][i] if pd.notna(predictions['PREDICAO_Target3'][i]) else None,
                     codigo_acesso=codigo_acesso,
                     original_data=original_dict
                 )
             )
-
-        print("✅ Pipeline concluída com sucesso!")
-        return AnalysisResult(
-            total_rows=total_rows,
-            processed_rows=len(df_pipeline),
-            predictions=prediction_rows,
-            r2_score_target1=r2_scores['Target1'],
-            r2_score_target2=r2_scores['Target2'],
-            r2_score_target3=r2_scores['Target3'],
-            correlation_heatmap_data=heatmap_data
-        )
-        
-
-prediction_service = PredictionService()
\ No newline at end of file
+        return prediction_rows
+        
\ No newline at end of file
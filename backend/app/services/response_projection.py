@@ -0,0 +1,70 @@
+# backend/app/services/response_projection.py
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+# Colunas de `original_data` lidas pelo dashboard (frontend/src/pages/Dashboard.tsx)
+DASHBOARD_COLUMNS = (
+    'Target1', 'Target2', 'Target3', 'Código de Acesso',
+    'TempoTotal', 'T0498',
+    'Q0401', 'Q0402', 'Q0403', 'Q0405', 'Q0406', 'Q0407',
+    'Q0409', 'Q0410', 'Q0411', 'Q0413', 'Q0414', 'Q0415',
+    'F0705', 'F0706', 'F0707', 'F0708', 'F0709', 'F0710', 'F0711', 'F0712', 'F0713',
+    'Cluster', 'Cluster_0', 'Cluster_1',
+)
+# Componentes RGB das cores (o dashboard procura as chaves 'Cor*_R' e lê _R, _G e _B):
+# Cor0202_R, Cor0209Outro_G etc., sem as flags Cor*_dominio_[RGB]
+DASHBOARD_PATTERNS = (r'^Cor[^_]+_[RGB]$',)
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    Colunas de `df_pipeline` que entram em `original_data` (e nas colunas extras do
+    formato colunar). `columns=None` mantém todas; senão entram as colunas listadas
+    e as que casam com algum regex de `patterns`, na ordem do DataFrame. Colunas
+    pedidas que não existem no resultado são ignoradas.
+    """
+    name: str
+    columns: Optional[Tuple[str, ...]] = None
+    patterns: Tuple[str, ...] = ()
+
+    @property
+    def is_all(self) -> bool:
+        return self.columns is None
+
+    def select(self, available: Iterable[str]) -> List[str]:
+        available = list(available)
+        if self.columns is None:
+            return available
+        wanted = set(self.columns)
+        regexes = [re.compile(p) for p in self.patterns]
+        return [col for col in available if col in wanted or any(r.match(col) for r in regexes)]
+
+ALL_COLUMNS = Projection('all')
+NO_COLUMNS = Projection('none', columns=())
+PRESETS = {
+    'all': ALL_COLUMNS,
+    'none': NO_COLUMNS,
+    'dashboard': Projection('dashboard', columns=DASHBOARD_COLUMNS, patterns=DASHBOARD_PATTERNS),
+}
+
+def parse_projection(value: Optional[str]) -> Projection:
+    """
+    Interpreta o parâmetro `fields`: vazio ou 'all' (todas as colunas), 'none'
+    (`original_data` vazio), o nome de um preset ('dashboard') ou uma lista de
+    colunas separadas por vírgula. Lança ValueError se a lista estiver vazia.
+    """
+    if value is None or not value.strip():
+        return ALL_COLUMNS
+    value = value.strip()
+    if value in PRESETS:
+        return PRESETS[value]
+    columns = tuple(dict.fromkeys(col.strip() for col in value.split(',') if col.strip()))
+    if not columns:
+        raise ValueError("Informe ao menos uma coluna em 'fields' (ou all, none, dashboard).")
+    return Projection('fields:' + ','.join(columns), columns=columns)
+
+def cache_variant(response_format: str, projection: Projection) -> str:
+    """ Variante da chave do cache de resultados: o formato e, se houver, a projeção. """
+    return response_format if projection.is_all else f"{response_format}:{projection.name}"
@@ -0,0 +1,156 @@
+# backend/app/services/result_cache.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.config import settings
+
+class ResultCache:
+    """
+    Cache de respostas JSON já serializadas, endereçado pelo conteúdo do upload.
+
+    A chave é o SHA-256 dos bytes enviados mais a versão dos artefatos (com as
+    configurações que mudam a saída) e o formato da resposta (com o tamanho de
+    bloco); trocar a versão ativa dos modelos não reaproveita resultados.
+    Há um nível em memória (LRU limitado a `memory_bytes`) e um nível opcional
+    em disco (`disk_path`, limitado a `disk_bytes`, removendo os
+    arquivos usados há mais tempo). Um acerto no disco é promovido à memória.
+    """
+
+    def __init__(self, memory_bytes: int, disk_path: Optional[Path] = None, disk_bytes: int = 0):
+        self.memory_bytes = memory_bytes
+        self.disk_path = Path(disk_path) if disk_path else None
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_used = 0
+        self._disk_used: Optional[int] = None
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'stores': 0, 'memory_evictions': 0, 'disk_evictions': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory_bytes > 0 or self.disk_path is not None
+
+    def make_key(self, upload_sha256: str, variant: str, artifacts_version: str) -> str:
+        """
+        Chave do resultado: upload + versão dos artefatos (`output_fingerprint`
+        do PredictionService que vai responder) + formato da resposta.
+        """
+        raw = f"{upload_sha256}:{artifacts_version}:{variant}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # --- Leitura ---
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return content
+        content = self._disk_get(key)
+        with self._lock:
+            if content is None:
+                self.counters['misses'] += 1
+                return None
+            self.counters['disk_hits'] += 1
+            self._memory_put(key, content)
+        return content
+
+    # --- Escrita ---
+
+    def put(self, key: str, content: bytes) -> None:
+        with self._lock:
+            self.counters['stores'] += 1
+            self._memory_put(key, content)
+        self._disk_put(key, content)
+
+    def _memory_put(self, key: str, content: bytes) -> None:
+        # Chamado com o lock adquirido
+        if len(content) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old)
+        self._memory[key] = content
+        self._memory_used += len(content)
+        while self._memory_used > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+            self.counters['memory_evictions'] += 1
+
+    # --- Nível em disco ---
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_path / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if self.disk_path is None:
+            return None
+        path = self._disk_file(key)
+        try:
+            content = path.read_bytes()
+            os.utime(path) # Marca como usado recentemente (ordem de remoção)
+        except FileNotFoundError:
+            return None
+        return content
+
+    def _disk_put(self, key: str, content: bytes) -> None:
+        if self.disk_path is None or len(content) > self.disk_bytes:
+            return
+        with self._lock:
+            self.disk_path.mkdir(parents=True, exist_ok=True)
+            if self._disk_used is None:
+                self._disk_used = sum(p.stat().st_size for p in self.disk_path.glob('*.json'))
+            path = self._disk_file(key)
+            if path.exists():
+                self._disk_used -= path.stat().st_size
+            tmp = path.with_suffix('.tmp')
+            tmp.write_bytes(content)
+            os.replace(tmp, path)
+            self._disk_used += len(content)
+            if self._disk_used > self.disk_bytes:
+                self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        # Remove os arquivos usados há mais tempo até caber no limite
+        files = sorted(self.disk_path.glob('*.json'), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            if self._disk_used <= self.disk_bytes:
+                break
+            size = path.stat().st_size
+            path.unlink(missing_ok=True)
+            self._disk_used -= size
+            self.counters['disk_evictions'] += 1
+
+    # --- Métricas ---
+
+    def stats(self) -> dict:
+        """ Contadores de acerto/erro e ocupação de cada nível. """
+        with self._lock:
+            lookups = self.counters['memory_hits'] + self.counters['disk_hits'] + self.counters['misses']
+            hits = lookups - self.counters['misses']
+            return {
+                **self.counters,
+                'hit_ratio': round(hits / lookups, 4) if lookups else None,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_used,
+                'memory_limit_bytes': self.memory_bytes,
+                'disk_enabled': self.disk_path is not None,
+                'disk_bytes': self._disk_used or 0,
+                'disk_limit_bytes': self.disk_bytes,
+            }
+
+# Instância única usada pelos endpoints
+result_cache = ResultCache(
+    memory_bytes=settings.RESULT_CACHE_MEMORY_BYTES,
+    disk_path=settings.RESULT_CACHE_DIR,
+    disk_bytes=settings.RESULT_CACHE_DISK_BYTES,
+)
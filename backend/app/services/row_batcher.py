@@ -0,0 +1,143 @@
+# backend/app/services/row_batcher.py
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.models.prediction_schema import PredictionRow
+from app.services import upload_reader
+from app.services.pipeline_executor import pipeline_executor, ExecutionTiming
+from app.services.response_projection import ALL_COLUMNS, Projection
+
+logger = logging.getLogger(__name__)
+
+# Erros que os próprios registros causam na pipeline (ex.: texto em coluna numérica).
+# Só eles fazem o lote ser reprocessado requisição por requisição; os demais (fila
+# cheia, falha dos artefatos etc.) vão direto para todas as requisições do lote.
+INPUT_ERRORS = (ValueError, TypeError, KeyError)
+
+@dataclass
+class BatchResult:
+    """ Linhas de uma requisição e como foi o lote que as processou. """
+    rows: List[PredictionRow]
+    timing: ExecutionTiming
+    batch_rows: int
+    batch_requests: int
+
+@dataclass
+class _Batch:
+    service: Any
+    parts: List[Tuple[List[Dict[str, Any]], Projection, asyncio.Future]] = field(default_factory=list)
+    rows: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+    def add(self, records: List[Dict[str, Any]], projection: Projection, future: asyncio.Future) -> None:
+        self.parts.append((records, projection, future))
+        self.rows += len(records)
+
+class RowBatcher:
+    """
+    Micro-batching do endpoint `/predict/rows`: requisições que chegam dentro de
+    `window_ms` milissegundos (ou até somar `max_rows` linhas) são concatenadas e
+    passam pela pipeline em uma única chamada vetorizada; cada requisição recebe
+    de volta só as suas linhas, na ordem enviada.
+
+    Só são agrupadas requisições com as mesmas colunas e a mesma versão de modelos.
+    Sem estatísticas de referência (`USE_REFERENCE_STATS`), as medianas e categorias
+    seriam calculadas sobre o lote, e o resultado de uma requisição dependeria das
+    outras do mesmo lote: nesse caso cada requisição é processada sozinha, sem espera.
+    Se o lote falhar por causa dos registros (`INPUT_ERRORS`), cada requisição é
+    reprocessada sozinha, e só a que causou o erro o recebe; outros erros (como a
+    fila cheia) vão para todas, sem novas submissões.
+    Roda inteiramente no event loop (sem locks); a pipeline roda no `pipeline_executor`.
+    """
+
+    def __init__(self, window_ms: float, max_rows: int):
+        self.window = max(0.0, window_ms) / 1000
+        self.max_rows = max_rows
+        self._pending: Dict[tuple, _Batch] = {}
+        self._running: set = set()
+
+    async def score(self, service, records: List[Dict[str, Any]], projection: Projection = ALL_COLUMNS) -> BatchResult:
+        """
+        Agenda `records` no lote aberto (ou em um novo) e aguarda as suas linhas, com
+        `original_data` já limitado a `projection` (cada requisição do lote tem a sua).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        if service.reference_stats is None or self.window == 0:
+            batch = _Batch(service)
+            batch.add(records, projection, future)
+            self._launch(batch)
+            return await future
+
+        key = (id(service), tuple(records[0].keys()) if _same_columns(records) else id(future))
+        batch = self._pending.get(key)
+        if batch is not None and batch.rows + len(records) > self.max_rows:
+            # Não cabe no lote aberto: ele sai agora e esta requisição abre outro
+            self._flush(key)
+            batch = None
+        if batch is None:
+            batch = self._pending[key] = _Batch(service)
+            batch.timer = loop.call_later(self.window, self._flush, key)
+        batch.add(records, projection, future)
+        if batch.rows >= self.max_rows:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: tuple) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        self._launch(batch)
+
+    def _launch(self, batch: _Batch) -> None:
+        # Mantém a referência da task até o fim (o event loop guarda só referências fracas)
+        task = asyncio.ensure_future(self._run(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        try:
+            records = [record for part, _, _ in batch.parts for record in part]
+            df = upload_reader.coerce_column_types(pd.DataFrame.from_records(records))
+            parts = [(len(part), projection) for part, projection, _ in batch.parts]
+            rows, timing = await pipeline_executor.run_service(batch.service, 'score_rows', df, parts)
+        except Exception as e:
+            if len(batch.parts) > 1 and isinstance(e, INPUT_ERRORS):
+                # Uma requisição inválida não pode derrubar as outras do lote: cada uma é reprocessada sozinha
+                logger.warning(f"Lote de {len(batch.parts)} requisições falhou ({e}); reprocessando cada requisição sozinha.")
+                for part, projection, future in batch.parts:
+                    if not future.done():
+                        single = _Batch(batch.service)
+                        single.add(part, projection, future)
+                        self._launch(single)
+                return
+            for _, _, future in batch.parts:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(batch.parts) > 1:
+            logger.info(f"Lote de {batch.rows} linhas ({len(batch.parts)} requisições) processado.")
+        for (_, _, future), part_rows in zip(batch.parts, rows):
+            if not future.done(): # A requisição pode ter sido cancelada (cliente desconectou)
+                future.set_result(BatchResult(part_rows, timing, batch.rows, len(batch.parts)))
+
+def _same_columns(records: List[Dict[str, Any]]) -> bool:
+    """ Todas as linhas da requisição têm as mesmas colunas, na mesma ordem. """
+    columns = list(records[0].keys())
+    return all(list(record.keys()) == columns for record in records)
+
+# Instância única usada pelo endpoint
+row_batcher = RowBatcher(
+    window_ms=settings.ROW_BATCH_WINDOW_MS,
+    max_rows=settings.ROW_BATCH_MAX_ROWS,
+)
@@ -0,0 +1,257 @@
+# backend/app/services/streaming_metrics.py
+
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+# Acumuladores de uma passada para o R² e para as correlações feature x predição do
+# heatmap. Guardam estatísticas suficientes por par de colunas (contagem, médias,
+# somas de quadrados e produtos cruzados centrados), atualizadas lote a lote, sem
+# montar a matriz de correlação nem juntar os lotes.
+#
+# Para que o resultado seja idêntico (bit a bit) no arquivo inteiro, em blocos ou em
+# shards, as linhas são agrupadas em blocos canônicos de BLOCK_ROWS linhas pela
+# posição global (0..BLOCK_ROWS-1, BLOCK_ROWS..2*BLOCK_ROWS-1, ...): cada bloco é
+# reduzido sempre com os mesmos valores e os blocos são combinados sempre da
+# esquerda para a direita, independente de onde caíram as divisas dos lotes.
+BLOCK_ROWS = 4096
+
+
+class _CoMoments:
+    """
+    Estatísticas de cada par (a_i, b_j), só com as linhas em que os dois valores
+    existem (como o `DataFrame.corr`): contagem, médias, somas dos quadrados dos
+    desvios e soma dos produtos dos desvios. Arrays de forma (A, B).
+    """
+    __slots__ = ('n', 'mean_a', 'mean_b', 'm2_a', 'm2_b', 'c')
+
+    @classmethod
+    def of_block(cls, a: np.ndarray, b: np.ndarray) -> "_CoMoments":
+        nan_a, nan_b = np.isnan(a), np.isnan(b)
+        if not nan_a.any() and not nan_b.any():
+            return cls._of_complete_block(a, b)
+        valid = ~nan_a[:, :, None] & ~nan_b[:, None, :]
+        a3 = np.where(valid, a[:, :, None], 0.0)
+        b3 = np.where(valid, b[:, None, :], 0.0)
+        moments = cls()
+        moments.n = valid.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            moments.mean_a = np.where(moments.n > 0, a3.sum(axis=0) / moments.n, 0.0)
+            moments.mean_b = np.where(moments.n > 0, b3.sum(axis=0) / moments.n, 0.0)
+        da = np.where(valid, a3 - moments.mean_a, 0.0)
+        db = np.where(valid, b3 - moments.mean_b, 0.0)
+        moments.m2_a = (da * da).sum(axis=0)
+        moments.m2_b = (db * db).sum(axis=0)
+        moments.c = (da * db).sum(axis=0)
+        return moments
+
+    @classmethod
+    def _of_complete_block(cls, a: np.ndarray, b: np.ndarray) -> "_CoMoments":
+        """ Bloco sem NaN: todos os pares usam todas as linhas, sem arrays por par e linha. """
+        shape = (a.shape[1], b.shape[1])
+        mean_a, mean_b = a.mean(axis=0), b.mean(axis=0)
+        da, db = a - mean_a, b - mean_b
+        moments = cls()
+        moments.n = np.full(shape, float(len(a)))
+        moments.mean_a = np.broadcast_to(mean_a[:, None], shape)
+        moments.mean_b = np.broadcast_to(mean_b[None, :], shape)
+        moments.m2_a = np.broadcast_to((da * da).sum(axis=0)[:, None], shape)
+        moments.m2_b = np.broadcast_to((db * db).sum(axis=0)[None, :], shape)
+        moments.c = np.einsum('ra,rb->ab', da, db)
+        return moments
+
+    def copy(self) -> "_CoMoments":
+        moments = _CoMoments()
+        for name in self.__slots__:
+            setattr(moments, name, getattr(self, name))
+        return moments
+
+    def merge(self, other: "_CoMoments") -> None:
+        """ Junta as estatísticas de linhas seguintes (fórmula de Chan et al.). """
+        n = self.n + other.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, other.n / n, 0.0)
+            cross = np.where(n > 0, self.n * other.n / n, 0.0)
+        delta_a = other.mean_a - self.mean_a
+        delta_b = other.mean_b - self.mean_b
+        self.mean_a = self.mean_a + delta_a * weight
+        self.mean_b = self.mean_b + delta_b * weight
+        self.m2_a = self.m2_a + other.m2_a + delta_a * delta_a * cross
+        self.m2_b = self.m2_b + other.m2_b + delta_b * delta_b * cross
+        self.c = self.c + other.c + delta_a * delta_b * cross
+        self.n = n
+
+
+class _PairedStream:
+    """
+    Linhas (a, b) recebidas em lotes de qualquer tamanho, reduzidas em blocos
+    canônicos (ver BLOCK_ROWS). `start_row` é a posição global da primeira linha:
+    um shard que começa no meio de um bloco guarda essas primeiras linhas (`_head`)
+    para completá-lo com o fim do shard anterior em `merge`.
+    """
+
+    def __init__(self, width_a: int, width_b: int, start_row: int = 0, block_rows: int = BLOCK_ROWS):
+        self.width_a = width_a
+        self.width_b = width_b
+        self.start_row = start_row
+        self.block_rows = block_rows
+        self.rows = 0
+        self._head: Optional[np.ndarray] = None
+        self._blocks: List[_CoMoments] = []
+        self._pending: Optional[np.ndarray] = None
+        self._pending_start = start_row
+
+    @property
+    def end_row(self) -> int:
+        return self.start_row + self.rows
+
+    def add(self, a: np.ndarray, b: np.ndarray) -> None:
+        """ Acrescenta as linhas seguintes (`a`: linhas x A, `b`: linhas x B). """
+        self._append(np.hstack([a, b]).astype(np.float64, copy=False))
+
+    def _append(self, rows: np.ndarray) -> None:
+        if not len(rows):
+            return
+        self.rows += len(rows)
+        buffer = rows if self._pending is None else np.concatenate([self._pending, rows])
+        start = self._pending_start
+        offset = start % self.block_rows
+        if offset:
+            # Primeiras linhas de um shard que não começa em um bloco canônico
+            missing = self.block_rows - offset
+            if len(buffer) < missing:
+                self._pending = buffer
+                return
+            self._head, buffer, start = buffer[:missing], buffer[missing:], start + missing
+        while len(buffer) >= self.block_rows:
+            self._blocks.append(self._reduce(buffer[:self.block_rows]))
+            buffer, start = buffer[self.block_rows:], start + self.block_rows
+        self._pending = buffer if len(buffer) else None
+        self._pending_start = start
+
+    def _reduce(self, rows: np.ndarray) -> _CoMoments:
+        rows = np.ascontiguousarray(rows)
+        return _CoMoments.of_block(rows[:, :self.width_a], rows[:, self.width_a:])
+
+    def merge(self, other: "_PairedStream") -> None:
+        """ Incorpora o stream das linhas seguintes (`other.start_row == self.end_row`). """
+        if other.start_row != self.end_row:
+            raise ValueError(f"Shard fora de ordem: começa na linha {other.start_row}, esperado {self.end_row}.")
+        if other._head is not None:
+            self._append(other._head)
+        if other._blocks:
+            # O shard anterior terminou exatamente na divisa de um bloco canônico
+            self._blocks.extend(other._blocks)
+            self.rows += len(other._blocks) * self.block_rows
+            self._pending_start = other._pending_start
+        if other._pending is not None:
+            self._append(other._pending)
+
+    def moments(self) -> Optional[_CoMoments]:
+        """ Estatísticas de todas as linhas, combinando os blocos em ordem; None sem linhas. """
+        parts = [self._reduce(self._head)] if self._head is not None else []
+        parts.extend(self._blocks)
+        if self._pending is not None:
+            parts.append(self._reduce(self._pending))
+        if not parts:
+            return None
+        total = parts[0].copy()
+        for part in parts[1:]:
+            total.merge(part)
+        return total
+
+
+def _column(values, rows: int) -> np.ndarray:
+    """ Coluna como float64 (texto inválido vira NaN); None vira uma coluna de NaN. """
+    if values is None:
+        return np.full(rows, np.nan)
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class R2Accumulator:
+    """
+    R² de cada target (valores reais x preditos, só as linhas com os dois valores),
+    acumulado lote a lote com `update`. Igual ao `sklearn.metrics.r2_score` a menos
+    de arredondamento.
+    """
+
+    def __init__(self, targets: List[str], start_row: int = 0):
+        self.targets = list(targets)
+        self.seen: set = set()
+        self._stream = _PairedStream(len(self.targets), len(self.targets), start_row)
+
+    def update(self, y_true: Mapping[str, Iterable], predictions: Mapping[str, np.ndarray], rows: int) -> None:
+        """ `y_true`: target -> valores reais (targets sem coluna real ficam de fora). """
+        self.seen.update(t for t in self.targets if t in y_true)
+        a = np.column_stack([_column(y_true.get(t), rows) for t in self.targets])
+        b = np.column_stack([_column(predictions.get(t), rows) for t in self.targets])
+        self._stream.add(a, b)
+
+    def merge(self, other: "R2Accumulator") -> None:
+        self.seen |= other.seen
+        self._stream.merge(other._stream)
+
+    def valid_rows(self) -> Dict[str, int]:
+        moments = self._stream.moments()
+        return {t: int(moments.n[i, i]) if moments is not None else 0 for i, t in enumerate(self.targets)}
+
+    def scores(self) -> Dict[str, Optional[float]]:
+        """ R² por target; None sem coluna real ou com menos de 2 linhas válidas. """
+        moments = self._stream.moments()
+        scores: Dict[str, Optional[float]] = {}
+        for i, target in enumerate(self.targets):
+            if moments is None or target not in self.seen or moments.n[i, i] < 2:
+                scores[target] = None
+                continue
+            n, delta = moments.n[i, i], moments.mean_a[i, i] - moments.mean_b[i, i]
+            ss_tot = moments.m2_a[i, i]
+            ss_res = max(moments.m2_a[i, i] + moments.m2_b[i, i] - 2 * moments.c[i, i] + n * delta * delta, 0.0)
+            if ss_tot == 0:
+                # Mesma convenção do sklearn para y constante
+                scores[target] = 1.0 if ss_res == 0 else 0.0
+            else:
+                scores[target] = float(1 - ss_res / ss_tot)
+        return scores
+
+
+class CorrelationAccumulator:
+    """
+    Correlação de Pearson de cada feature com cada coluna de predição (pares com os
+    dois valores, como o `DataFrame.corr`), acumulada lote a lote com `update`.
+    Features ausentes de um lote contam como NaN nele; só as vistas em algum lote
+    entram no resultado.
+    """
+
+    def __init__(self, features: List[str], prediction_columns: List[str], start_row: int = 0):
+        self.features = list(features)
+        self.prediction_columns = list(prediction_columns)
+        self.seen: set = set()
+        self._stream = _PairedStream(len(self.features), len(self.prediction_columns), start_row)
+
+    def update(self, df: pd.DataFrame) -> None:
+        rows = len(df)
+        self.seen.update(f for f in self.features if f in df.columns)
+        a = np.column_stack([df[f].to_numpy(dtype=np.float64, na_value=np.nan) if f in df.columns else np.full(rows, np.nan)
+                             for f in self.features])
+        b = np.column_stack([df[p].to_numpy(dtype=np.float64, na_value=np.nan) if p in df.columns else np.full(rows, np.nan)
+                             for p in self.prediction_columns])
+        self._stream.add(a, b)
+
+    def merge(self, other: "CorrelationAccumulator") -> None:
+        self.seen |= other.seen
+        self._stream.merge(other._stream)
+
+    def correlations(self) -> Dict[str, Dict[str, float]]:
+        """ feature -> {coluna de predição: correlação (NaN se indefinida)}, na ordem de `features`. """
+        moments = self._stream.moments()
+        if moments is None:
+            return {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            divisor = np.sqrt(moments.m2_a * moments.m2_b)
+            corr = np.where((moments.n > 0) & (divisor > 0), moments.c / divisor, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        return {
+            feature: dict(zip(self.prediction_columns, corr[i].tolist()))
+            for i, feature in enumerate(self.features) if feature in self.seen
+        }
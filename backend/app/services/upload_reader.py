@@ -0,0 +1,240 @@
+# backend/app/services/upload_reader.py
+
+import logging
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.services.instrumentation import record_stage, stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pyarrow é opcional: sem ele, só CSV (motor C do pandas) e XLSX
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Caminho em disco ou arquivo binário aberto (ex.: UploadFile.file, BytesIO)
+UploadSource = Union[str, Path, BinaryIO]
+
+# Formatos lidos pelo pandas e formatos colunares (exigem pyarrow)
+TABULAR_EXTENSIONS = ['csv', 'xlsx']
+PARQUET_EXTENSIONS = ['parquet']
+ARROW_IPC_EXTENSIONS = ['arrow', 'feather', 'ipc']
+
+# Colunas de tipo conhecido, convertidas uma única vez logo após a leitura
+TARGET_COLUMNS = ['Target1', 'Target2', 'Target3']
+NUMERIC_TEXT_COLUMNS = ['T01', 'P03', 'T05', 'P12', 'T15']
+DATE_COLUMN = 'Data/Hora Último'
+DATE_FORMAT = '%d/%m/%Y %H:%M:%S'
+# Colunas de texto lidas sempre como texto: com a inferência de tipo, uma cor só com
+# dígitos ('012345') viraria o número 12345, conforme os valores do bloco lido
+TEXT_COLUMNS = ['Código de Acesso', 'Cor0202', 'Cor0204', 'Cor0206', 'F0207', 'Cor0208', 'Cor0209Outro']
+
+# Linhas da planilha convertidas por vez na leitura do XLSX inteiro
+XLSX_BLOCK_ROWS = 10_000
+
+class UploadTooLargeError(ValueError):
+    """O arquivo tem mais linhas que o limite configurado."""
+
+def supported_extensions() -> List[str]:
+    """Extensões aceitas no upload; Parquet e Arrow IPC só com o pyarrow instalado."""
+    if pa is None:
+        return list(TABULAR_EXTENSIONS)
+    return TABULAR_EXTENSIONS + PARQUET_EXTENSIONS + ARROW_IPC_EXTENSIONS
+
+def _read_csv(source: UploadSource, **kwargs):
+    """
+    CSV com ';': motor multithread do pyarrow quando disponível (sem `chunksize`).
+    As `TEXT_COLUMNS` são lidas como texto, então cada bloco de `chunksize` tem os
+    mesmos valores do arquivo inteiro.
+    """
+    if pa is not None and settings.CSV_ARROW_ENGINE and 'chunksize' not in kwargs:
+        df = pd.read_csv(source, sep=';', encoding='utf-8', engine='pyarrow', **kwargs)
+        # O `dtype` do motor pyarrow só converte depois da leitura (o zero à esquerda já
+        # se perdeu): coluna de texto lida como número faz o arquivo ser relido pelo motor C
+        numericas = [col for col in TEXT_COLUMNS if col in df.columns and df[col].dtype != object]
+        if not any(df[col].notna().any() for col in numericas):
+            for col in numericas: # Só vazios: como o motor C lê a coluna de texto
+                df[col] = df[col].astype(object)
+            return df
+        logger.info(f"Colunas de texto lidas como número pelo pyarrow ({', '.join(numericas)}); relendo com o motor C.")
+        if not isinstance(source, (str, Path)):
+            source.seek(0)
+    return pd.read_csv(source, sep=';', encoding='utf-8', dtype={col: str for col in TEXT_COLUMNS}, **kwargs)
+
+def _read_arrow_ipc(source: UploadSource) -> 'pa.Table':
+    """Arrow IPC no formato de arquivo (Feather v2) ou de stream."""
+    try:
+        return pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        if not isinstance(source, (str, Path)):
+            source.seek(0)
+        return pa.ipc.open_stream(source).read_all()
+
+def read_dataframe(source: UploadSource, file_extension: str) -> pd.DataFrame:
+    """
+    Lê o arquivo enviado (CSV com ';', primeira aba do XLSX, Parquet ou Arrow IPC)
+    e converte as colunas de tipo conhecido (`coerce_column_types`).
+    Lança EmptyDataError se não houver dados.
+    """
+    df = None # Inicializa o DataFrame
+
+    with stage('parse') as etapa:
+        if file_extension == 'csv':
+            df = _read_csv(source)
+            logger.info("Arquivo CSV lido com sucesso.")
+
+        elif file_extension == 'xlsx':
+            # Primeira aba, lida em streaming (ver `iter_xlsx_chunks`)
+            blocks = list(iter_xlsx_chunks(source, XLSX_BLOCK_ROWS))
+            df = pd.concat(blocks, copy=False) if blocks else None
+            logger.info("Arquivo XLSX lido com sucesso.")
+
+        elif file_extension in PARQUET_EXTENSIONS:
+            df = pq.read_table(source).to_pandas()
+            logger.info("Arquivo Parquet lido com sucesso.")
+
+        elif file_extension in ARROW_IPC_EXTENSIONS:
+            df = _read_arrow_ipc(source).to_pandas()
+            logger.info("Arquivo Arrow IPC lido com sucesso.")
+
+        if df is None or df.empty:
+             raise pd.errors.EmptyDataError("O arquivo está vazio ou não pôde ser lido.")
+
+        logger.info(f"Dimensões do DataFrame: {df.shape}")
+        df = coerce_column_types(df)
+        etapa.rows = len(df)
+        etapa.frame = df
+    return df
+
+def iter_dataframe_chunks(source: UploadSource, file_extension: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Lê o arquivo em blocos de `chunk_rows` linhas, sem carregar o CSV, o XLSX ou
+    o Parquet inteiros em memória. O Arrow IPC é lido como tabela Arrow e
+    convertido para pandas bloco a bloco.
+    """
+    if file_extension == 'csv':
+        chunks = _read_csv(source, chunksize=chunk_rows)
+    elif file_extension in PARQUET_EXTENSIONS:
+        batches = pq.ParquetFile(source).iter_batches(batch_size=chunk_rows)
+        chunks = _numbered(batch.to_pandas() for batch in batches)
+    elif file_extension in ARROW_IPC_EXTENSIONS:
+        batches = _read_arrow_ipc(source).to_batches(max_chunksize=chunk_rows)
+        chunks = _numbered(batch.to_pandas() for batch in batches)
+    else:
+        chunks = iter_xlsx_chunks(source, chunk_rows)
+    chunks = iter(chunks)
+    while True:
+        # Só a leitura de cada bloco é medida (não o tempo em que o consumidor o processa)
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        chunk = coerce_column_types(chunk)
+        record_stage('parse', time.perf_counter() - start, len(chunk))
+        yield chunk
+
+def _numbered(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Índice contínuo entre os blocos, como o do leitor de CSV do pandas."""
+    start = 0
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+def _xlsx_value(value):
+    """Valor de uma célula como o `pd.read_excel` o entrega (número inteiro vira int, vazio vira '')."""
+    if value is None:
+        return ""
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+def _xlsx_rows(source: UploadSource) -> Iterator[list]:
+    """Linhas da primeira aba, uma a uma, com o openpyxl em modo somente leitura."""
+    workbook = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions() # Usa o tamanho real de cada linha, não o declarado no arquivo
+        for row in sheet.iter_rows(values_only=True):
+            yield [_xlsx_value(value) for value in row]
+    finally:
+        workbook.close()
+
+def iter_xlsx_chunks(source: UploadSource, chunk_rows: int, max_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Primeira aba do XLSX em DataFrames de até `chunk_rows` linhas, sem montar o
+    modelo de objetos da planilha inteira: as linhas são lidas em streaming e cada
+    bloco é convertido com o mesmo parser (e a mesma inferência de tipos) do
+    `pd.read_excel`. Como nele, linhas vazias no fim da aba são descartadas e as
+    do meio viram linhas de NaN; o índice continua entre os blocos. Células além
+    do cabeçalho viram colunas 'Unnamed: N' (lidas em blocos, elas só aparecem a
+    partir do bloco da primeira linha que as tem). Acima de `max_rows` linhas
+    (padrão: settings.XLSX_MAX_ROWS) lança UploadTooLargeError.
+    """
+    max_rows = max_rows if max_rows is not None else settings.XLSX_MAX_ROWS
+    rows = _xlsx_rows(source)
+    header = next(rows, None)
+    while header and header[-1] == "":
+        header.pop()
+    if not header:
+        return
+    text_dtypes = {col: str for col in TEXT_COLUMNS if col in header}
+
+    def chunk(data: list, start: int) -> pd.DataFrame:
+        data = [values + [""] * (len(header) - len(values)) for values in data]
+        df = pd.io.parsers.TextParser([header] + data, header=0, skip_blank_lines=False, dtype=text_dtypes).read()
+        df.index = pd.RangeIndex(start, start + len(df))
+        return df
+
+    data, total, blank = [], 0, 0
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+        if not row:
+            blank += 1 # Só entra se vier uma linha com dados depois
+            continue
+        # Linha mais larga que o cabeçalho: as células a mais ganham colunas sem nome
+        header.extend([""] * (len(row) - len(header)))
+        for values in [[]] * blank + [row]:
+            total += 1
+            if max_rows is not None and total > max_rows:
+                raise UploadTooLargeError(f"A planilha tem mais de {max_rows} linhas (limite de settings.XLSX_MAX_ROWS).")
+            data.append(values)
+            if len(data) == chunk_rows:
+                yield chunk(data, total - len(data))
+                data = []
+        blank = 0
+    if data:
+        yield chunk(data, total - len(data))
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """A coluna como texto, sem converter de novo quando ela já só tem strings."""
+    if pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        return series
+    return series.astype(str)
+
+def coerce_column_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte uma única vez, logo após a leitura, as colunas de tipo conhecido que o
+    leitor não entregou no tipo certo (colunas já numéricas ou de data ficam como estão):
+    - Target1-3: numérico, aceitando vírgula como separador decimal;
+    - T01, P03, T05, P12 e T15: numérico (texto inválido vira NaN);
+    - 'Data/Hora Último': data no formato dd/mm/aaaa hh:mm:ss (inválida vira NaT).
+    """
+    for col in TARGET_COLUMNS:
+        if col in df.columns and df[col].dtype.kind not in 'iuf':
+            df[col] = pd.to_numeric(_as_text(df[col]).str.replace(',', '.', regex=False), errors='coerce')
+    for col in NUMERIC_TEXT_COLUMNS:
+        if col in df.columns and df[col].dtype.kind not in 'iuf':
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if DATE_COLUMN in df.columns and df[DATE_COLUMN].dtype.kind != 'M':
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN], format=DATE_FORMAT, errors='coerce')
+    return df
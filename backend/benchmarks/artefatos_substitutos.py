@@ -0,0 +1,152 @@
+# backend/benchmarks/artefatos_substitutos.py
+#
+# Treina artefatos substitutos (pré-processamento, scaler + KMeans do clustering e
+# scaler + regressor por target) sobre dados sintéticos, no mesmo layout de
+# backend/app/ml/, para rodar a API e os benchmarks sem os artefatos reais.
+# Os modelos não têm valor preditivo: servem só para medir o custo da pipeline.
+# Uso (a partir de backend/):  python -m benchmarks.artefatos_substitutos --saida /tmp/artefatos_bench
+
+import argparse
+import contextlib
+import io
+import json
+import pickle
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import StandardScaler
+
+from app.core.config import settings
+from app.ml import feature_builder
+from app.services.prediction_service import PredictionService
+from benchmarks.dados_sinteticos import COLUNAS_COR, COLUNAS_COM_AUSENTES, esquema, gerar_upload
+
+TARGETS = ['Target1', 'Target2', 'Target3']
+FEATURES_CLUSTER = ['taxa_acerto_total', 'tempo_medio_questao', 'media_emocional', 'qualidade_sono']
+COLUNAS_DELETAR = ['T0499 - Explicação Tempo', 'T1210Expl', 'PTempoTotalExpl', 'TempoTotalExpl']
+
+def _gravar_pickle(objeto, caminho: Path) -> None:
+    with open(caminho, 'wb') as f:
+        pickle.dump(objeto, f)
+
+def _gravar_targets(pasta: Path, features: dict, scalers: dict, modelos: dict) -> None:
+    pasta.mkdir(parents=True, exist_ok=True)
+    for target in TARGETS:
+        joblib.dump(features[target], pasta / f'lista_features_{target}.joblib')
+        joblib.dump(scalers[target], pasta / f'scaler_{target}.joblib')
+        joblib.dump(modelos[target], pasta / f'modelo_final_{target}.joblib')
+
+def _carregar_servico(destino: Path) -> PredictionService:
+    service = PredictionService(destino, "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.ensure_loaded()
+    return service
+
+def _top_correlacionadas(df: pd.DataFrame, alvo: pd.Series, n: int) -> list:
+    numericas = df.select_dtypes(include=np.number).drop(columns=TARGETS + ['Cluster'], errors='ignore')
+    correlacoes = numericas.corrwith(alvo).abs().dropna().sort_values(ascending=False, kind='stable')
+    return list(correlacoes.index[:n])
+
+def treinar_artefatos(destino: Path, linhas: int = 2000, seed: int = 0, features_por_target: int = 25,
+                      n_clusters: int = 4, modelo: str = 'floresta') -> Path:
+    """
+    Gera em `destino` um conjunto completo de artefatos, treinado sobre `linhas`
+    linhas sintéticas. Mesmos parâmetros geram os mesmos artefatos.
+    """
+    destino = Path(destino)
+    pasta_predicao = destino / "artefazos_predicao"
+    pasta_predicao.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    df = gerar_upload(linhas, seed)
+    y = {target: df[target] for target in TARGETS}
+
+    # 1. Pré-processamento genérico e coluns.json
+    entrada = df.drop(columns=TARGETS)
+    numericas = entrada.select_dtypes(include=np.number)
+    modelo_planilha = esquema()
+    com_negativos = [c for c in modelo_planilha.select_dtypes(include=np.number).columns if modelo_planilha[c].min() < 0]
+    _gravar_pickle({
+        'numeric_medians': numericas.median().dropna().to_dict(),
+        'categorical_modes': {c: entrada[c].mode().iloc[0] for c in COLUNAS_COR},
+        'date_min': pd.to_datetime(entrada['Data/Hora Último'], format='%d/%m/%Y %H:%M:%S').min().isoformat(),
+    }, destino / "generic_preprocessing_artifacts.pkl")
+    coluns = {
+        'colunas_cor': COLUNAS_COR,
+        'colunas_com_negativos': com_negativos,
+        'colunas_nao_respondeu': [f'{c}_nao_respondeu' for c in com_negativos],
+        'colunas_missing': [f'{c}_tinha_missing' for c in COLUNAS_COM_AUSENTES + ['Cor0202']],
+        'colunas_deletar': COLUNAS_DELETAR,
+    }
+
+    # 2. Artefatos provisórios (sem clustering nem modelos), só para calcular as features
+    coluns.update({f'{t.lower()}_top10': [] for t in TARGETS})
+    with open(destino / "coluns.json", 'w', encoding='utf-8') as f:
+        json.dump(coluns, f, ensure_ascii=False, indent=2)
+    _gravar_pickle({'scaler': None, 'model': None, 'features': []}, destino / "clustering_artifacts_v2.pkl")
+    _gravar_targets(pasta_predicao, {t: [] for t in TARGETS}, {t: None for t in TARGETS}, {t: None for t in TARGETS})
+
+    settings.USE_REFERENCE_STATS = False
+    service = _carregar_servico(destino)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_pipeline, _ = service.prepare_features(df)
+
+    # 3. Clustering: scaler + KMeans sobre features do jogador
+    X_cluster = df_pipeline[FEATURES_CLUSTER].fillna(df_pipeline[FEATURES_CLUSTER].median())
+    cluster_scaler = StandardScaler().fit(X_cluster)
+    cluster_model = KMeans(n_clusters=n_clusters, n_init=3, random_state=seed).fit(cluster_scaler.transform(X_cluster))
+    _gravar_pickle({'scaler': cluster_scaler, 'model': cluster_model, 'features': FEATURES_CLUSTER},
+                   destino / "clustering_artifacts_v2.pkl")
+    df_pipeline['Cluster'] = cluster_model.predict(cluster_scaler.transform(X_cluster))
+
+    # 4. Top 10 de cada target (colunas-base das features polinomiais) e engenharia final completa
+    for target in TARGETS:
+        coluns[f'{target.lower()}_top10'] = _top_correlacionadas(df_pipeline, y[target], 10)
+    with open(destino / "coluns.json", 'w', encoding='utf-8') as f:
+        json.dump(coluns, f, ensure_ascii=False, indent=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_final = feature_builder.construir_engenharia_final(df_pipeline, coluns)
+
+    # 5. Por target: as mais correlacionadas mais um sorteio entre as derivadas (Cluster_*, _vs_cluster_mean, agregações, polinomiais)
+    # (sem as derivadas dos próprios targets, ex.: 'Target1_vs_cluster_mean')
+    derivadas_target = tuple(f'{t}_vs' for t in TARGETS)
+    candidatas = [c for c in df_final.select_dtypes(include=np.number).columns
+                  if c not in TARGETS and not c.startswith(derivadas_target)]
+    features, scalers, modelos = {}, {}, {}
+    for target in TARGETS:
+        escolhidas = _top_correlacionadas(df_final[candidatas], y[target], features_por_target // 2)
+        restantes = [c for c in candidatas if c not in escolhidas]
+        sorteadas = rng.choice(len(restantes), size=min(features_por_target - len(escolhidas), len(restantes)), replace=False)
+        features[target] = escolhidas + [restantes[i] for i in sorted(sorteadas)]
+        X = df_final[features[target]].astype(float).replace([np.inf, -np.inf], 0).fillna(0)
+        scalers[target] = StandardScaler().fit(X)
+        if modelo == 'ridge':
+            modelos[target] = Ridge().fit(scalers[target].transform(X), y[target])
+        else:
+            modelos[target] = RandomForestRegressor(n_estimators=50, max_depth=8, n_jobs=1, random_state=seed) \
+                .fit(scalers[target].transform(X), y[target])
+    _gravar_targets(pasta_predicao, features, scalers, modelos)
+    return destino
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina artefatos substitutos para benchmarks.")
+    parser.add_argument('--saida', type=Path, required=True, help="Pasta dos artefatos (mesmo layout de app/ml/).")
+    parser.add_argument('--linhas', type=int, default=2000, help="Linhas sintéticas de treino.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--features-por-target', type=int, default=25)
+    parser.add_argument('--modelo', choices=['floresta', 'ridge'], default='floresta',
+                        help="Regressor de cada target: RandomForest (padrão) ou Ridge.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    treinar_artefatos(args.saida, args.linhas, args.seed, args.features_por_target, modelo=args.modelo)
+    print(f"✅ Artefatos substitutos gravados em {args.saida} ({time.perf_counter() - inicio:.1f}s).")
+    print(f"   Use com: settings.ML_ARTIFACTS_PATH = {args.saida}")
+
+if __name__ == '__main__':
+    main()
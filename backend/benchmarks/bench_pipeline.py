@@ -0,0 +1,223 @@
+# backend/benchmarks/bench_pipeline.py
+#
+# Benchmark da pipeline de predição com dados sintéticos e artefatos substitutos:
+# tempo de cada etapa de `execute_prediction_pipeline` (e bytes do DataFrame que ela
+# produz) e do endpoint /predict/upload-csv (ponta a ponta), gravados em JSON para
+# comparar execuções.
+# Uso (a partir de backend/):
+#   python -m benchmarks.bench_pipeline [--linhas 1000 10000 100000] [--saida bench.json] [--compactar]
+#   python -m benchmarks.bench_pipeline --comparar bench_anterior.json [--tolerancia 0.15]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from app.core.config import settings
+from benchmarks.artefatos_substitutos import treinar_artefatos
+from benchmarks.dados_sinteticos import gerar_upload
+
+TAMANHOS_PADRAO = [1_000, 10_000, 100_000]
+# Diferenças abaixo disso (segundos) não contam como regressão (ruído de medição)
+MINIMO_REGRESSAO = 0.005
+
+def _commit_atual() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _metadados(args) -> dict:
+    return {
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'repeticoes': args.repeticoes,
+        'modelo': args.modelo,
+        'executor': settings.PIPELINE_EXECUTOR,
+        'prune_unused_features': settings.PRUNE_UNUSED_FEATURES,
+        'use_reference_stats': settings.USE_REFERENCE_STATS,
+        'compact_dtypes': settings.COMPACT_DTYPES,
+        'compact_model_features': settings.COMPACT_MODEL_FEATURES,
+    }
+
+def medir_etapas(service, csv: bytes) -> tuple:
+    """
+    Uma execução de `execute_prediction_pipeline`, etapa por etapa (mesma ordem de
+    `run_pipeline` + `build_row_result`), mais a leitura do CSV e a serialização.
+    Retorna (segundos por etapa, bytes do DataFrame produzido por etapa).
+    """
+    from app.services import upload_reader
+    from app.services.instrumentation import frame_bytes
+    from app.services.pipeline_output import PipelineOutput
+
+    tempos, tamanhos = {}, {}
+    def etapa(nome, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos[nome] = time.perf_counter() - inicio
+        frame = resultado[0] if isinstance(resultado, tuple) else resultado
+        if isinstance(frame, pd.DataFrame):
+            tamanhos[nome] = frame_bytes(frame)
+        return resultado
+
+    estatisticas = service.reference_stats
+    df = etapa('read_dataframe', upload_reader.read_dataframe, io.BytesIO(csv), 'csv')
+    df_pipeline, codigos = etapa('prepare_features', service.prepare_features, df, estatisticas)
+    df_pipeline = etapa('assign_clusters', service.assign_clusters, df_pipeline, estatisticas)
+    df_pipeline = etapa('build_final_features', service.build_final_features, df_pipeline, estatisticas)
+    predictions = etapa('predict_targets', service.predict_targets, df_pipeline)
+    r2_scores = etapa('compute_r2_scores', service.compute_r2_scores,
+                      {t: df[t] for t in service.targets if t in df.columns}, predictions)
+    etapa('attach_predictions', service.attach_predictions, df_pipeline, predictions, codigos)
+    heatmap = etapa('compute_heatmap', service.compute_heatmap, df_pipeline)
+    output = PipelineOutput(df_pipeline=df_pipeline, total_rows=len(df), r2_scores=r2_scores,
+                            heatmap_data=heatmap, model_version=service.version)
+    result = etapa('build_row_result', service.build_row_result, output)
+    etapa('model_dump_json', result.model_dump_json)
+    return tempos, tamanhos
+
+def medir_endpoint(client, csv: bytes) -> float:
+    inicio = time.perf_counter()
+    response = client.post('/predict/upload-csv', files={'file': ('bench.csv', csv, 'text/csv')})
+    duracao = time.perf_counter() - inicio
+    if response.status_code != 200:
+        raise RuntimeError(f"/predict/upload-csv respondeu {response.status_code}: {response.text[:200]}")
+    return duracao
+
+def executar(args) -> dict:
+    # Configura antes de importar os módulos que leem `settings` na importação
+    settings.ML_ARTIFACTS_PATH = args.artefatos
+    settings.ML_MODEL_VERSION = None
+    settings.RESULT_CACHE_MEMORY_BYTES = 0
+    settings.RESULT_CACHE_DIR = None
+    settings.PIPELINE_CHUNK_ROWS = None
+    settings.LOG_LEVEL = "WARNING"
+    settings.COMPACT_DTYPES = args.compactar
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services.model_registry import model_registry
+
+    resultados = []
+    with contextlib.redirect_stdout(io.StringIO()), TestClient(app) as client:
+        service = model_registry.active
+        service.ensure_loaded()
+        for n_linhas in args.linhas:
+            csv = gerar_upload(n_linhas, args.seed).to_csv(sep=';', index=False).encode('utf-8')
+            etapas = {}
+            for _ in range(args.repeticoes):
+                tempos, tamanhos = medir_etapas(service, csv)
+                for nome, duracao in tempos.items():
+                    etapas[nome] = min(duracao, etapas.get(nome, float('inf')))
+            resultado = {
+                'linhas': n_linhas,
+                'bytes_upload': len(csv),
+                'etapas': {nome: round(duracao, 6) for nome, duracao in etapas.items()},
+                'pipeline_total': round(sum(etapas.values()), 6),
+                'bytes_etapas': tamanhos,
+            }
+            if not args.sem_endpoint:
+                endpoint = min(medir_endpoint(client, csv) for _ in range(args.repeticoes))
+                resultado['endpoint'] = round(endpoint, 6)
+                resultado['linhas_por_segundo'] = round(n_linhas / endpoint, 1)
+            resultados.append(resultado)
+            _imprimir(resultado)
+    return {'metadados': _metadados(args), 'resultados': resultados}
+
+def _imprimir(resultado: dict) -> None:
+    saida = sys.__stdout__
+    print(f"📊 {resultado['linhas']} linhas ({resultado['bytes_upload'] / 1e6:.1f} MB):", file=saida)
+    tamanhos = resultado.get('bytes_etapas', {})
+    for nome, duracao in resultado['etapas'].items():
+        tamanho = f" {tamanhos[nome] / 1e6:9.1f} MB" if nome in tamanhos else ""
+        print(f"   {nome:<28} {duracao:9.3f}s{tamanho}", file=saida)
+    print(f"   {'pipeline_total':<28} {resultado['pipeline_total']:9.3f}s", file=saida)
+    if 'endpoint' in resultado:
+        print(f"   {'endpoint (ponta a ponta)':<28} {resultado['endpoint']:9.3f}s "
+              f"({resultado['linhas_por_segundo']:.0f} linhas/s)", file=saida)
+
+def comparar(atual: dict, anterior: dict, tolerancia: float) -> list:
+    """
+    Compara etapa a etapa (mesmo número de linhas) e devolve as regressões:
+    etapas mais lentas que a execução anterior por mais de `tolerancia` (fração).
+    """
+    regressoes = []
+    anteriores = {r['linhas']: r for r in anterior['resultados']}
+    for resultado in atual['resultados']:
+        base = anteriores.get(resultado['linhas'])
+        if base is None:
+            continue
+        medidas = {**resultado['etapas'], 'pipeline_total': resultado['pipeline_total']}
+        medidas_base = {**base['etapas'], 'pipeline_total': base['pipeline_total']}
+        if 'endpoint' in resultado and 'endpoint' in base:
+            medidas['endpoint'], medidas_base['endpoint'] = resultado['endpoint'], base['endpoint']
+        print(f"🔍 {resultado['linhas']} linhas (atual vs anterior):")
+        for nome, duracao in medidas.items():
+            antes = medidas_base.get(nome)
+            if antes is None:
+                continue
+            razao = duracao / antes if antes else float('inf')
+            regressao = razao > 1 + tolerancia and duracao - antes > MINIMO_REGRESSAO
+            marca = "❌" if regressao else "  "
+            print(f" {marca} {nome:<28} {antes:9.3f}s -> {duracao:9.3f}s ({razao:5.2f}x)")
+            if regressao:
+                regressoes.append((resultado['linhas'], nome, antes, duracao))
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da pipeline de predição (etapas e endpoint).")
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções por tamanho; vale a mais rápida de cada etapa.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--artefatos', type=Path, default=None,
+                        help="Pasta de artefatos a usar. Padrão: treina artefatos substitutos em uma pasta temporária.")
+    parser.add_argument('--modelo', choices=['floresta', 'ridge'], default='floresta', help="Regressor dos artefatos substitutos.")
+    parser.add_argument('--compactar', action='store_true', help="Liga a compactação de tipos (settings.COMPACT_DTYPES).")
+    parser.add_argument('--sem-endpoint', action='store_true', help="Mede só as etapas (sem passar pela API).")
+    parser.add_argument('--saida', type=Path, default=Path('bench_pipeline.json'))
+    parser.add_argument('--comparar', type=Path, default=None, help="JSON de uma execução anterior; sai com código 1 se houver regressão.")
+    parser.add_argument('--tolerancia', type=float, default=0.15, help="Lentidão aceita antes de acusar regressão (fração).")
+    args = parser.parse_args()
+
+    if args.artefatos is None:
+        args.artefatos = Path(tempfile.mkdtemp(prefix='artefatos_bench_'))
+        inicio = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            treinar_artefatos(args.artefatos, seed=args.seed, modelo=args.modelo)
+        print(f"🧪 Artefatos substitutos treinados em {args.artefatos} ({time.perf_counter() - inicio:.1f}s).")
+    else:
+        args.modelo = None # Artefatos informados: o regressor não é escolhido aqui
+
+    resultado = executar(args)
+    args.saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"✅ Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        regressoes = comparar(resultado, json.loads(args.comparar.read_text(encoding='utf-8')), args.tolerancia)
+        if regressoes:
+            print(f"❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}.")
+            sys.exit(1)
+        print("✅ Nenhuma regressão acima da tolerância.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# backend/benchmarks/bench_xlsx.py
+#
+# Benchmark da leitura de XLSX: `pd.read_excel` (caminho anterior) contra o leitor em
+# streaming do `upload_reader` (arquivo inteiro e em blocos), sobre Jogadores10linhas.xlsx
+# ampliada (as 10 linhas repetidas até o tamanho pedido). Mede o tempo e o pico de
+# memória de cada leitor, cada medição em um processo novo.
+# Uso (a partir de backend/):
+#   python -m benchmarks.bench_xlsx [--linhas 10000 50000] [--saida bench_xlsx.json]
+
+import argparse
+import json
+import multiprocessing
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.dados_sinteticos import esquema
+
+TAMANHOS_PADRAO = [10_000, 50_000]
+LINHAS_POR_BLOCO = 10_000
+LEITORES = ['read_excel', 'streaming', 'streaming_blocos']
+
+def planilha_ampliada(n_linhas: int, pasta: Path) -> Path:
+    """Jogadores10linhas.xlsx com as linhas repetidas até `n_linhas` (gerada uma vez por pasta)."""
+    caminho = pasta / f"jogadores_{n_linhas}.xlsx"
+    if not caminho.exists():
+        modelo = esquema()
+        repeticoes = -(-n_linhas // len(modelo))
+        pd.concat([modelo] * repeticoes, ignore_index=True).iloc[:n_linhas].to_excel(caminho, index=False, engine='openpyxl')
+    return caminho
+
+class _PicoMemoria:
+    """Amostra a memória residente do processo em segundo plano e guarda o maior valor."""
+
+    def __init__(self, intervalo: float = 0.005):
+        from app.services.instrumentation import rss_bytes
+        self._rss = rss_bytes
+        self._intervalo = intervalo
+        self._parar = threading.Event()
+        self.base = self.pico = rss_bytes() or 0
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+
+    def _amostrar(self):
+        while not self._parar.wait(self._intervalo):
+            self.pico = max(self.pico, self._rss() or 0)
+
+    def parar(self) -> int:
+        self._parar.set()
+        self._thread.join()
+        return max(self.pico, self._rss() or 0) - self.base
+
+def _medir(leitor: str, caminho: Path) -> dict:
+    """
+    Roda em um processo novo: segundos e pico de memória acima do processo já
+    carregado (RSS amostrado; o ru_maxrss herdaria o pico do processo pai).
+    """
+    from app.services import upload_reader
+
+    memoria = _PicoMemoria()
+    inicio = time.perf_counter()
+    if leitor == 'read_excel':
+        linhas = len(pd.read_excel(caminho, engine='openpyxl'))
+    elif leitor == 'streaming':
+        linhas = len(upload_reader.read_dataframe(caminho, 'xlsx'))
+    else:
+        # Cada bloco é descartado após a contagem, como faz a pipeline em blocos
+        linhas = sum(len(bloco) for bloco in upload_reader.iter_xlsx_chunks(caminho, LINHAS_POR_BLOCO))
+    segundos = time.perf_counter() - inicio
+    pico = memoria.parar()
+    return {'segundos': round(segundos, 4), 'pico_memoria_bytes': pico, 'linhas': linhas}
+
+def medir(leitor: str, caminho: Path) -> dict:
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as processo:
+        return processo.submit(_medir, leitor, caminho).result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da leitura de XLSX (read_excel x streaming).")
+    parser.add_argument('--linhas', type=int, nargs='+', default=TAMANHOS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=1, help="Execuções por leitor; vale a mais rápida.")
+    parser.add_argument('--pasta', type=Path, default=None, help="Onde gerar as planilhas. Padrão: pasta temporária.")
+    parser.add_argument('--saida', type=Path, default=Path('bench_xlsx.json'))
+    args = parser.parse_args()
+
+    pasta = args.pasta or Path(tempfile.mkdtemp(prefix='bench_xlsx_'))
+    pasta.mkdir(parents=True, exist_ok=True)
+    resultados = []
+    for n_linhas in args.linhas:
+        caminho = planilha_ampliada(n_linhas, pasta)
+        print(f"📊 {n_linhas} linhas ({caminho.stat().st_size / 1e6:.1f} MB):")
+        resultado = {'linhas': n_linhas, 'bytes_arquivo': caminho.stat().st_size, 'leitores': {}}
+        for leitor in LEITORES:
+            medidas = [medir(leitor, caminho) for _ in range(args.repeticoes)]
+            melhor = min(medidas, key=lambda m: m['segundos'])
+            resultado['leitores'][leitor] = melhor
+            print(f"   {leitor:<18} {melhor['segundos']:8.2f}s {melhor['pico_memoria_bytes'] / 1e6:9.1f} MB de pico")
+        resultados.append(resultado)
+
+    args.saida.write_text(json.dumps({'resultados': resultados}, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"✅ Resultados gravados em {args.saida}")
+
+if __name__ == '__main__':
+    main()
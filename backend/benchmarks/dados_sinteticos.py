@@ -0,0 +1,119 @@
+# backend/benchmarks/dados_sinteticos.py
+#
+# Uploads sintéticos com as mesmas colunas (e tipos) de Jogadores10linhas.xlsx.
+# Uso (a partir de backend/):  python -m benchmarks.dados_sinteticos --linhas 10000 --saida jogadores_10k.csv
+
+import argparse
+import string
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Planilha de exemplo do repositório: define a ordem, o tipo e a faixa de cada coluna
+ARQUIVO_MODELO = Path(__file__).resolve().parents[2] / "Jogadores10linhas.xlsx"
+
+COLUNAS_COR = ['Cor0202', 'Cor0204', 'Cor0206', 'F0207', 'Cor0208', 'Cor0209Outro']
+COLUNA_DATA = 'Data/Hora Último'
+COLUNA_CODIGO = 'Código de Acesso'
+# Colunas numéricas que recebem alguns NaN (geram as flags '_tinha_missing')
+COLUNAS_COM_AUSENTES = ['QtdComida', 'QtdPessoas', 'F1102', 'Tempo1106', 'P04']
+TAXA_AUSENTES = 0.02
+
+_esquema_cache = None
+
+def esquema() -> pd.DataFrame:
+    """As 10 linhas da planilha de exemplo (lidas uma vez)."""
+    global _esquema_cache
+    if _esquema_cache is None:
+        _esquema_cache = pd.read_excel(ARQUIVO_MODELO, engine='openpyxl')
+    return _esquema_cache
+
+def _cores(rng: np.random.Generator, n_linhas: int) -> np.ndarray:
+    """HEX no formato das exportações: maioria válida, com brancos, ausentes e lixo."""
+    valores = np.array([f'{v:06X}' for v in rng.integers(0, 2**24, n_linhas)], dtype=object)
+    sorteio = rng.random(n_linhas)
+    valores[sorteio < 0.30] = 'FFFFFF'
+    valores[(sorteio >= 0.30) & (sorteio < 0.34)] = np.nan
+    valores[(sorteio >= 0.34) & (sorteio < 0.35)] = 'Desconhecido'
+    return valores
+
+def _datas(rng: np.random.Generator, n_linhas: int) -> np.ndarray:
+    inicio = pd.Timestamp('2025-09-01').value // 10**9
+    segundos = rng.integers(inicio, inicio + 60 * 24 * 3600, n_linhas)
+    return pd.to_datetime(segundos, unit='s').strftime('%d/%m/%Y %H:%M:%S').to_numpy(dtype=object)
+
+def _codigos(rng: np.random.Generator, n_linhas: int) -> np.ndarray:
+    alfabeto = np.array(list(string.ascii_uppercase + string.digits))
+    letras = alfabeto[rng.integers(0, len(alfabeto), (n_linhas, 12))]
+    return np.array([''.join(linha) for linha in letras], dtype=object)
+
+def _numerica(rng: np.random.Generator, serie: pd.Series, n_linhas: int) -> np.ndarray:
+    """Valores na faixa observada na planilha; -1 ('não respondeu') onde a planilha tem negativos."""
+    validos = serie.dropna()
+    if validos.empty:
+        # Colunas de explicação: quase sempre vazias
+        valores = np.full(n_linhas, np.nan)
+        valores[rng.random(n_linhas) < 0.1] = 0.0
+        return valores
+    minimo, maximo = max(float(validos.min()), 0.0), float(validos.max())
+    maximo = max(maximo * 1.2, minimo + 1)
+    if serie.dtype.kind == 'i':
+        valores = rng.integers(int(minimo), int(maximo) + 1, n_linhas)
+    else:
+        valores = np.round(rng.uniform(minimo, maximo, n_linhas), 3)
+    if validos.min() < 0:
+        valores[rng.random(n_linhas) < 0.1] = -1
+    return valores
+
+def gerar_upload(n_linhas: int, seed: int = 0) -> pd.DataFrame:
+    """
+    DataFrame sintético com as colunas de Jogadores10linhas.xlsx (mesma ordem e tipos)
+    mais Target1-3, correlacionados com algumas colunas para que R² e heatmap tenham sinal.
+    Mesmo `seed` gera os mesmos dados.
+    """
+    rng = np.random.default_rng(seed)
+    modelo = esquema()
+    dados = {}
+    for col in modelo.columns:
+        if col in COLUNAS_COR:
+            dados[col] = _cores(rng, n_linhas)
+        elif col == COLUNA_DATA:
+            dados[col] = _datas(rng, n_linhas)
+        elif col == COLUNA_CODIGO:
+            dados[col] = _codigos(rng, n_linhas)
+        else:
+            dados[col] = _numerica(rng, modelo[col], n_linhas)
+    df = pd.DataFrame(dados, columns=modelo.columns)
+
+    for col in COLUNAS_COM_AUSENTES:
+        df[col] = df[col].astype(float)
+        df.loc[rng.random(n_linhas) < TAXA_AUSENTES, col] = np.nan
+
+    ruido = lambda escala: rng.normal(0, escala, n_linhas)
+    df['Target1'] = np.round(0.5 * df['Q0413'] + 0.2 * df['Q0409'] - 0.1 * df['Q0405'] + ruido(1.0), 2)
+    df['Target2'] = np.round(df['T0498'] / 50 + 0.3 * df['P01'] + ruido(0.5), 2)
+    df['Target3'] = np.round(df[['F0705', 'F0706', 'F0707', 'F0708', 'F0709']].mean(axis=1) + ruido(0.5), 2)
+    return df
+
+def salvar_upload(df: pd.DataFrame, caminho: Path) -> None:
+    """Grava como o usuário enviaria: CSV com ';' ou XLSX (pela extensão)."""
+    caminho = Path(caminho)
+    if caminho.suffix.lower() == '.xlsx':
+        df.to_excel(caminho, index=False, engine='openpyxl')
+    else:
+        df.to_csv(caminho, sep=';', index=False, encoding='utf-8')
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um upload sintético no esquema de Jogadores10linhas.xlsx.")
+    parser.add_argument('--linhas', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--saida', type=Path, required=True, help="Arquivo .csv ou .xlsx de saída.")
+    args = parser.parse_args()
+
+    df = gerar_upload(args.linhas, args.seed)
+    salvar_upload(df, args.saida)
+    print(f"📝 {len(df)} linhas x {df.shape[1]} colunas gravadas em {args.saida}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# backend/tests/conftest.py
+
+import contextlib
+import io
+import logging
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.services.prediction_service import PredictionService
+from benchmarks.artefatos_substitutos import treinar_artefatos
+
+logging.getLogger('app').setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope='session')
+def artefatos(tmp_path_factory) -> Path:
+    """ Artefatos substitutos (ver benchmarks/artefatos_substitutos.py), treinados uma vez por sessão. """
+    usa_referencia = settings.USE_REFERENCE_STATS
+    with contextlib.redirect_stdout(io.StringIO()):
+        destino = treinar_artefatos(tmp_path_factory.mktemp('artefatos'), linhas=600, modelo='ridge')
+    settings.USE_REFERENCE_STATS = usa_referencia
+    return destino
+
+
+@pytest.fixture
+def service(artefatos) -> PredictionService:
+    service = PredictionService(artefatos, 'teste')
+    service.ensure_loaded()
+    return service
+
+
+@pytest.fixture
+def cliente(service, monkeypatch):
+    """ API com `service` como versão ativa (sem os eventos de startup, que carregariam os artefatos de settings). """
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+    from app.services.model_registry import model_registry
+
+    monkeypatch.setattr(model_registry, '_active', service)
+    return TestClient(create_app())
@@ -0,0 +1,74 @@
+# backend/tests/test_chunked_pipeline.py
+#
+# Pipeline em blocos (ChunkedPipelineRun) contra a pipeline sobre o arquivo
+# inteiro: mesmas linhas, colunas, valores, R² e heatmap, inclusive com blocos
+# pequenos, em que a inferência de tipo de cada bloco vê poucos valores.
+
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import upload_reader
+from benchmarks.dados_sinteticos import gerar_upload, salvar_upload
+
+
+@pytest.fixture(scope='module')
+def arquivo_csv(tmp_path_factory):
+    df = gerar_upload(120, seed=5)
+    # Cores só com dígitos (zero à esquerda) em sequência: com blocos pequenos,
+    # há blocos em que a coluna inteira parece numérica
+    df.loc[10:24, 'Cor0204'] = ['012345', '000000', '098765'] * 5
+    df.loc[30:33, 'F0207'] = '001122'
+    caminho = tmp_path_factory.mktemp('upload') / 'upload.csv'
+    salvar_upload(df, caminho)
+    return caminho
+
+
+def test_leitura_em_blocos_mantem_texto_das_cores():
+    dados = b"a;Cor0202\n1;0A0B0C\n2;012345\n"
+    inteiro = upload_reader.read_dataframe(io.BytesIO(dados), 'csv')
+    blocos = pd.concat(list(upload_reader.iter_dataframe_chunks(io.BytesIO(dados), 'csv', 1)))
+    assert inteiro['Cor0202'].tolist() == blocos['Cor0202'].tolist() == ['0A0B0C', '012345']
+    # Mesmo só com dígitos no arquivo inteiro a cor continua texto
+    so_digitos = upload_reader.read_dataframe(io.BytesIO(b"a;Cor0202\n1;112233\n2;012345\n"), 'csv')
+    assert so_digitos['Cor0202'].tolist() == ['112233', '012345']
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 7, 64])
+def test_pipeline_em_blocos_igual_ao_arquivo_inteiro(service, arquivo_csv, chunk_rows):
+    esperado = service.run_pipeline(upload_reader.read_dataframe(arquivo_csv, 'csv'))
+
+    run = service.run_pipeline_chunked(upload_reader.iter_dataframe_chunks(arquivo_csv, 'csv', chunk_rows))
+    obtido = pd.concat([output.df_pipeline for output in run])
+
+    pd.testing.assert_frame_equal(obtido, esperado.df_pipeline, check_exact=False, rtol=1e-12, atol=1e-12)
+    for coluna in ['Cor0204_R', 'Cor0204_G', 'Cor0204_B', 'F0207_R']:
+        np.testing.assert_array_equal(obtido[coluna].to_numpy(), esperado.df_pipeline[coluna].to_numpy())
+    assert run.r2_scores == pytest.approx(esperado.r2_scores, rel=1e-12)
+    assert run.heatmap_data == esperado.heatmap_data
+
+
+def test_stream_sem_chunk_rows_processa_em_blocos(cliente, service, arquivo_csv, monkeypatch):
+    from app.api import prediction_endpoint
+    from app.core.config import settings
+
+    blocos = []
+    ler_em_blocos = prediction_endpoint.iter_upload_chunks
+    def ler_espiado(file, file_extension, chunk_rows):
+        blocos.append(chunk_rows)
+        return ler_em_blocos(file, file_extension, chunk_rows)
+    def arquivo_inteiro(*args):
+        raise AssertionError("O stream não deve rodar a pipeline sobre o arquivo inteiro.")
+    monkeypatch.setattr(prediction_endpoint, 'iter_upload_chunks', ler_espiado)
+    monkeypatch.setattr(service, 'run_pipeline', arquivo_inteiro)
+    monkeypatch.setattr(settings, 'PIPELINE_CHUNK_ROWS', None)
+    monkeypatch.setattr(settings, 'STREAM_CHUNK_ROWS', 32)
+
+    resposta = cliente.post('/predict/upload-csv/stream', files={'file': ('upload.csv', arquivo_csv.read_bytes())})
+
+    assert resposta.status_code == 200, resposta.text
+    assert blocos == [32]
+    linhas = resposta.content.splitlines()
+    assert len(linhas) == 121 and b'"summary"' in linhas[-1]
@@ -0,0 +1,63 @@
+# backend/tests/test_feature_builder.py
+#
+# Paridade do motor de passada única (app/ml/feature_builder.py) com as funções
+# originais do notebook (app/ml/feature_engineering.py): mesmos valores, dtypes e
+# ordem de colunas, inclusive quando faltam colunas de entrada.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml import feature_builder, feature_engineering
+from benchmarks.dados_sinteticos import gerar_upload
+
+
+def _blocos_7_a_9(df: pd.DataFrame) -> pd.DataFrame:
+    return feature_engineering.criar_features_interacao(
+        feature_engineering.criar_features_tempo_contexto(
+            feature_engineering.criar_features_desempenho_jogo1(df)))
+
+
+@pytest.fixture(scope='module')
+def upload() -> pd.DataFrame:
+    return gerar_upload(300, seed=3).drop(columns=['Target1', 'Target2', 'Target3'])
+
+
+@pytest.mark.parametrize('remover', [
+    [],
+    ['Q0405'],                    # Bloco 7 não roda (e, sem 'tempo_medio_questao', nem o 8)
+    ['QtdSom'],                   # Só o Bloco 8 não roda
+    ['Q1201'],                    # Sem a segunda interação
+    ['QtdHorasSono', 'T1204'],    # Sem as duas interações
+    'colunas_p',                  # Sem as colunas 'Pxx' do questionário
+])
+def test_features_jogador_iguais_as_do_notebook(upload, remover):
+    if remover == 'colunas_p':
+        remover = [c for c in upload.columns if c.startswith('P') and c[1:].isdigit() and len(c) <= 5]
+    df = upload.drop(columns=remover)
+    esperado = _blocos_7_a_9(df)
+    obtido = feature_builder.construir_features_jogador(df)
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=True)
+    # O plano compilado à parte (como no cache de planos) gera o mesmo resultado
+    plano = feature_builder.planejar_features_jogador(df.columns)
+    pd.testing.assert_frame_equal(feature_builder.construir_features_jogador(df, plano=plano), esperado, check_exact=True)
+
+
+def _coluns_json(df: pd.DataFrame) -> dict:
+    return {
+        'colunas_deletar': ['TempoTotalExpl', 'PTempoTotalExpl'],
+        'target1_top10': ['taxa_acerto_total', 'Q0413', 'Cor0202'],
+        'target2_top10': ['T0498', 'P01', 'Q0_mean'],
+        'target3_top10': ['media_emocional', 'coluna_inexistente'],
+    }
+
+
+@pytest.mark.parametrize('com_cluster', [True, False])
+def test_engenharia_final_igual_a_do_notebook(upload, com_cluster):
+    df = feature_builder.construir_features_jogador(upload)
+    if com_cluster:
+        df['Cluster'] = np.random.default_rng(0).integers(0, 4, len(df))
+    coluns_json = _coluns_json(df)
+    esperado = feature_engineering.engenharia_final(df, coluns_json)
+    obtido = feature_builder.construir_engenharia_final(df, coluns_json)
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=True)
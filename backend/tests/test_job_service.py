@@ -0,0 +1,72 @@
+# backend/tests/test_job_service.py
+#
+# Jobs de análise: rodam a mesma pipeline do PredictionService (`run_pipeline`),
+# registrando o progresso de cada etapa; no startup, só os jobs de processos que
+# terminaram são dados como interrompidos.
+
+import io
+import json
+import subprocess
+import sys
+import time
+
+from app.services import upload_reader
+from app.services.job_service import JOB_STAGES, JobManager, JobStore
+from app.services.model_registry import model_registry
+from benchmarks.dados_sinteticos import gerar_upload
+
+
+def esperar(store, job_id, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        job = store.get(job_id)
+        if job['status'] in ('succeeded', 'failed'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} não terminou em {limite}s.")
+
+
+def test_job_usa_run_pipeline_e_registra_as_etapas(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, '_active', service)
+    manager = JobManager(JobStore(tmp_path, ttl_seconds=3600), max_workers=1)
+    manager.start()
+    upload = gerar_upload(50, seed=8).to_csv(sep=';', index=False).encode('utf-8')
+    etapas = []
+    run_pipeline = service.run_pipeline
+    def run_pipeline_espiado(df, progress=None):
+        etapas.append('run_pipeline')
+        return run_pipeline(df, progress)
+    monkeypatch.setattr(service, 'run_pipeline', run_pipeline_espiado)
+
+    try:
+        job = esperar(manager.store, manager.submit('upload.csv', 'csv', io.BytesIO(upload))['job_id'])
+    finally:
+        manager.shutdown()
+
+    assert job['status'] == 'succeeded', job.get('error')
+    assert etapas == ['run_pipeline']
+    assert [stage['name'] for stage in job['stages']] == JOB_STAGES
+    assert all(stage['status'] == 'done' for stage in job['stages'])
+    assert job['progress'] == 1
+
+    esperado = service.build_row_result(run_pipeline(upload_reader.read_dataframe(io.BytesIO(upload), 'csv')))
+    resultado = json.loads(manager.store.result_path(job['job_id']).read_text(encoding='utf-8'))
+    assert resultado == json.loads(esperado.model_dump_json())
+
+
+def test_fail_interrupted_so_falha_jobs_de_processos_mortos(tmp_path):
+    store = JobStore(tmp_path, ttl_seconds=3600)
+    morto = subprocess.Popen([sys.executable, '-c', 'pass'])
+    morto.wait()
+    vivo = store.create('vivo.csv', 'csv', io.BytesIO(b'a'))['job_id'] # Deste processo (outro worker ainda ativo)
+    interrompido = store.create('morto.csv', 'csv', io.BytesIO(b'a'))['job_id']
+    store.update(interrompido, status='running', pid=morto.pid)
+    antigo = store.create('antigo.csv', 'csv', io.BytesIO(b'a'))['job_id']
+    store.update(antigo, pid=None) # Gravado antes de os jobs guardarem o pid
+
+    store.fail_interrupted()
+
+    assert store.get(vivo)['status'] == 'queued'
+    assert store.get(interrompido)['status'] == 'failed'
+    assert store.get(antigo)['status'] == 'failed'
+
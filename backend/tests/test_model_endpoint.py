@@ -0,0 +1,12 @@
+# backend/tests/test_model_endpoint.py
+#
+# Troca de versão de modelos: no modo prefork ela valeria só para um worker, então é recusada.
+
+from app.services.instrumentation import process_info
+
+
+def test_ativacao_recusada_no_prefork(cliente, monkeypatch):
+    monkeypatch.setattr(process_info, 'mode', 'prefork')
+    resposta = cliente.post('/models/base/activate')
+    assert resposta.status_code == 409
+    assert 'prefork' in resposta.json()['detail']
@@ -0,0 +1,57 @@
+# backend/tests/test_pipeline_executor.py
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.pipeline_executor import ExecutorBusyError, PipelineExecutor
+
+
+def test_iter_local_roda_nas_threads_do_pool_e_ocupa_uma_vaga():
+    executor = PipelineExecutor(max_workers=1, max_queue=0)
+    threads = []
+
+    def gerador():
+        for i in range(3):
+            threads.append(threading.current_thread().name)
+            yield i
+
+    async def consumir():
+        itens = []
+        async for item in executor.iter_local(gerador()):
+            assert executor.pending == 1
+            with pytest.raises(ExecutorBusyError): # Envio em andamento lota o executor
+                executor.check_capacity()
+            itens.append(item)
+        return itens
+
+    try:
+        assert asyncio.run(consumir()) == [0, 1, 2]
+    finally:
+        executor.shutdown()
+    assert executor.pending == 0
+    assert all(name.startswith('pipeline') for name in threads)
+
+
+def test_iter_local_fecha_o_gerador_quando_o_envio_e_interrompido():
+    executor = PipelineExecutor(max_workers=1, max_queue=0)
+    fechado = threading.Event()
+
+    def gerador():
+        try:
+            yield from range(10)
+        finally:
+            fechado.set()
+
+    async def interromper():
+        stream = executor.iter_local(gerador())
+        assert await stream.__anext__() == 0
+        await stream.aclose()
+
+    try:
+        asyncio.run(interromper())
+    finally:
+        executor.shutdown()
+    assert fechado.is_set()
+    assert executor.pending == 0
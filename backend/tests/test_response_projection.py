@@ -0,0 +1,24 @@
+# backend/tests/test_response_projection.py
+#
+# Preset 'dashboard' de `fields`: só as colunas que o dashboard lê.
+
+from app.services.response_projection import parse_projection
+from benchmarks.dados_sinteticos import gerar_upload
+
+
+def test_dashboard_leva_so_os_componentes_rgb_das_cores():
+    colunas = [
+        'Target1', 'Cor0202', 'Cor0202_R', 'Cor0202_G', 'Cor0202_B',
+        'Cor0202_dominio_R', 'Cor0202_dominio_G', 'Cor0202_dominio_B', 'Cor0202_tinha_missing',
+        'Cor0209Outro_R', 'Cor0209Outro_dominio_B', 'Cor0206_eh_preto', 'F0207_R',
+    ]
+    assert parse_projection('dashboard').select(colunas) == [
+        'Target1', 'Cor0202_R', 'Cor0202_G', 'Cor0202_B', 'Cor0209Outro_R',
+    ]
+
+
+def test_dashboard_nas_colunas_da_pipeline(service):
+    df_pipeline, _ = service.prepare_features(gerar_upload(20, seed=2))
+    cores = [col for col in parse_projection('dashboard').select(df_pipeline.columns) if col.startswith('Cor')]
+    assert cores and all(col.rsplit('_', 1)[0] in service.coluns_json['colunas_cor'] for col in cores)
+
@@ -0,0 +1,57 @@
+# backend/tests/test_result_cache.py
+#
+# Chave do cache de resultados: o mesmo upload só é servido do cache quando o
+# tamanho de bloco e as configurações que mudam a saída são os mesmos.
+
+import pytest
+
+from app.api import prediction_endpoint
+from app.core.config import settings
+from app.services.result_cache import ResultCache
+from benchmarks.dados_sinteticos import gerar_upload
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = ResultCache(memory_bytes=64 * 1024 * 1024)
+    monkeypatch.setattr(prediction_endpoint, 'result_cache', cache)
+    monkeypatch.setattr(settings, 'PIPELINE_CHUNK_ROWS', None)
+    return cache
+
+
+@pytest.fixture(scope='module')
+def upload():
+    return gerar_upload(60, seed=3).to_csv(sep=';', index=False).encode('utf-8')
+
+
+def enviar(cliente, upload, rota='/predict/upload-csv', **params):
+    resposta = cliente.post(rota, params=params, files={'file': ('upload.csv', upload)})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.headers['X-Cache']
+
+
+@pytest.mark.parametrize('rota', ['/predict/upload-csv', '/predict/export'])
+def test_tamanho_de_bloco_entra_na_chave(cliente, cache, upload, rota):
+    assert enviar(cliente, upload, rota) == 'MISS'
+    assert enviar(cliente, upload, rota) == 'HIT'
+    assert enviar(cliente, upload, rota, chunk_rows=7) == 'MISS'
+    assert enviar(cliente, upload, rota, chunk_rows=7) == 'HIT'
+    assert enviar(cliente, upload, rota, chunk_rows=20) == 'MISS'
+
+
+def test_configuracoes_de_saida_entram_na_chave(cliente, cache, upload, monkeypatch):
+    assert enviar(cliente, upload) == 'MISS'
+    monkeypatch.setattr(settings, 'COMPACT_DTYPES', not settings.COMPACT_DTYPES)
+    assert enviar(cliente, upload) == 'MISS'
+    monkeypatch.setattr(settings, 'COMPACT_MODEL_FEATURES', not settings.COMPACT_MODEL_FEATURES)
+    assert enviar(cliente, upload) == 'MISS'
+    assert enviar(cliente, upload) == 'HIT'
+
+
+def test_fingerprint_de_saida_segue_o_carregamento(service, monkeypatch):
+    base = service.output_fingerprint
+    assert base.startswith(service.fingerprint)
+    monkeypatch.setattr(service, 'pipeline_features', None)
+    sem_poda = service.output_fingerprint
+    monkeypatch.setattr(service, 'reference_stats', object())
+    assert len({base, sem_poda, service.output_fingerprint}) == 3
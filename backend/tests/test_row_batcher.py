@@ -0,0 +1,166 @@
+# backend/tests/test_row_batcher.py
+#
+# Micro-batching de `/predict/rows` (RowBatcher): requisições simultâneas viram
+# um lote só e cada uma recebe as suas linhas, na ordem; uma requisição inválida
+# não derruba as outras, mas a fila cheia recusa o lote inteiro de uma vez; sem
+# estatísticas de referência não há agrupamento.
+
+import asyncio
+import json
+
+import httpx
+import pandas as pd
+import pytest
+
+from app.api import prediction_endpoint
+from app.main import create_app
+from app.services import upload_reader
+from app.services.chunked_pipeline import ChunkedPipelineRun
+from app.services.model_registry import model_registry
+from app.services.pipeline_executor import ExecutorBusyError, pipeline_executor
+from app.services.prediction_service import PredictionService
+from app.services.row_batcher import RowBatcher
+from benchmarks.dados_sinteticos import gerar_upload
+
+PREDICOES = ['PREDICAO_Target1', 'PREDICAO_Target2', 'PREDICAO_Target3']
+
+
+@pytest.fixture(scope='module')
+def estatisticas(artefatos):
+    """ Estatísticas de referência calculadas sobre um upload sintético (como em tools/gerar_estatisticas_referencia). """
+    service = PredictionService(artefatos, 'referencia')
+    service.ensure_loaded()
+    run = ChunkedPipelineRun(service, [gerar_upload(200, seed=11)], complete_statistics=True)
+    try:
+        return run.prepare().statistics
+    finally:
+        run.close()
+
+
+@pytest.fixture(scope='module')
+def registros():
+    # Passa pelo JSON, como as linhas chegam ao endpoint
+    return json.loads(gerar_upload(9, seed=4).to_json(orient='records'))
+
+
+@pytest.fixture
+def batcher(service, monkeypatch):
+    """ Janela longa: as requisições enviadas juntas caem sempre no mesmo lote. """
+    batcher = RowBatcher(window_ms=300, max_rows=512)
+    monkeypatch.setattr(prediction_endpoint, 'row_batcher', batcher)
+    monkeypatch.setattr(model_registry, '_active', service)
+    return batcher
+
+
+def enviar_juntas(*lotes_de_registros, fields=()):
+    async def enviar():
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url='http://teste') as cliente:
+            return await asyncio.gather(*(
+                cliente.post('/predict/rows', json={'records': r}, params={'fields': f} if f else None)
+                for r, f in zip(lotes_de_registros, list(fields) + [None] * len(lotes_de_registros))
+            ))
+    return asyncio.run(enviar())
+
+
+def sozinhas(service, registros):
+    df = upload_reader.coerce_column_types(pd.DataFrame.from_records(registros))
+    return [row.model_dump() for row in service.score_rows(df)[0]]
+
+
+def assert_mesmas_predicoes(resposta, esperadas):
+    recebidas = resposta.json()['predictions']
+    assert [r['codigo_acesso'] for r in recebidas] == [e['codigo_acesso'] for e in esperadas]
+    for recebida, esperada in zip(recebidas, esperadas):
+        assert [recebida[p] for p in PREDICOES] == pytest.approx([esperada[p] for p in PREDICOES], rel=1e-9)
+
+
+def test_requisicoes_simultaneas_viram_um_lote(service, estatisticas, registros, batcher):
+    service.reference_stats = estatisticas
+    partes = [registros[:2], registros[2:5], registros[5:]]
+
+    respostas = enviar_juntas(*partes)
+
+    for resposta, parte in zip(respostas, partes):
+        assert resposta.status_code == 200, resposta.text
+        assert resposta.headers['X-Batch-Rows'] == str(len(registros))
+        assert resposta.json()['processed_rows'] == len(parte)
+        assert_mesmas_predicoes(resposta, sozinhas(service, parte))
+
+
+def test_requisicao_invalida_nao_derruba_as_outras(service, estatisticas, registros, batcher):
+    service.reference_stats = estatisticas
+    invalida = [dict(registro) for registro in registros[3:6]]
+    invalida[1]['QtdHorasSono'] = 'muitas' # Texto em coluna numérica: a pipeline falha
+
+    primeira, ruim, ultima = enviar_juntas(registros[:3], invalida, registros[6:])
+
+    assert ruim.status_code == 500
+    assert_mesmas_predicoes(primeira, sozinhas(service, registros[:3]))
+    assert_mesmas_predicoes(ultima, sozinhas(service, registros[6:]))
+
+
+def test_sem_estatisticas_de_referencia_nao_agrupa(service, registros, batcher):
+    assert service.reference_stats is None
+    partes = [registros[:4], registros[4:]]
+
+    respostas = enviar_juntas(*partes)
+
+    for resposta, parte in zip(respostas, partes):
+        assert resposta.status_code == 200, resposta.text
+        assert resposta.headers['X-Batch-Rows'] == str(len(parte))
+        assert_mesmas_predicoes(resposta, sozinhas(service, parte))
+
+
+def test_cada_requisicao_do_lote_tem_a_sua_projecao(service, estatisticas, registros, batcher):
+    service.reference_stats = estatisticas
+    partes = [registros[:3], registros[3:6], registros[6:]]
+
+    todas, poucas, nenhuma = enviar_juntas(*partes, fields=[None, 'Target1,Cluster,Q0405', 'none'])
+
+    assert todas.headers['X-Batch-Rows'] == poucas.headers['X-Batch-Rows'] == str(len(registros))
+    completas = sozinhas(service, partes[1])
+    for linha, completa in zip(poucas.json()['predictions'], completas):
+        assert list(linha['original_data']) == [c for c in completa['original_data'] if c in ('Target1', 'Cluster', 'Q0405')]
+        assert linha['original_data'] == pytest.approx({c: completa['original_data'][c] for c in linha['original_data']})
+    assert all(linha['original_data'] == {} for linha in nenhuma.json()['predictions'])
+    assert len(todas.json()['predictions'][0]['original_data']) == len(completas[0]['original_data'])
+
+
+def pontuar_juntas(batcher, service, *lotes_de_registros):
+    async def pontuar():
+        return await asyncio.gather(*(batcher.score(service, r) for r in lotes_de_registros), return_exceptions=True)
+    return asyncio.run(pontuar())
+
+
+def test_fila_cheia_recusa_o_lote_sem_reenviar(service, estatisticas, registros, batcher, monkeypatch):
+    service.reference_stats = estatisticas
+    chamadas = []
+    async def fila_cheia(*args):
+        chamadas.append(args)
+        raise ExecutorBusyError(retry_after=5)
+    monkeypatch.setattr(pipeline_executor, 'run_service', fila_cheia)
+
+    resultados = pontuar_juntas(batcher, service, registros[:3], registros[3:6], registros[6:])
+
+    assert len(chamadas) == 1
+    assert all(isinstance(r, ExecutorBusyError) for r in resultados)
+
+
+def test_erro_dos_registros_reprocessa_cada_requisicao(service, estatisticas, registros, batcher, monkeypatch):
+    service.reference_stats = estatisticas
+    run_service = pipeline_executor.run_service
+    chamadas = []
+    async def espiado(*args):
+        chamadas.append(len(args[2]))
+        return await run_service(*args)
+    monkeypatch.setattr(pipeline_executor, 'run_service', espiado)
+    invalida = [dict(registro) for registro in registros[3:6]]
+    invalida[0]['QtdHorasSono'] = 'muitas'
+
+    primeira, ruim, ultima = pontuar_juntas(batcher, service, registros[:3], invalida, registros[6:])
+
+    assert chamadas == [9, 3, 3, 3]
+    assert isinstance(ruim, TypeError)
+    assert [row.codigo_acesso for row in primeira.rows] == [r['codigo_acesso'] for r in sozinhas(service, registros[:3])]
+    assert ultima.batch_requests == 1
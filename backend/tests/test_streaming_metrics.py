@@ -0,0 +1,128 @@
+# backend/tests/test_streaming_metrics.py
+#
+# Os acumuladores de app/services/streaming_metrics.py contra as referências que
+# eles substituem: sklearn.metrics.r2_score e DataFrame.corr.
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import r2_score
+
+from app.services.streaming_metrics import BLOCK_ROWS, CorrelationAccumulator, R2Accumulator
+
+TARGETS = ['Target1', 'Target2', 'Target3']
+
+
+def _dados_r2(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    y_true, predictions = {}, {}
+    for i, target in enumerate(TARGETS):
+        y = rng.normal(50, 10, n)
+        y[rng.random(n) < 0.1] = np.nan # Linhas sem valor real ficam de fora do R²
+        y_true[target] = pd.Series(y)
+        predictions[target] = y + rng.normal(0, 3 + i, n)
+    return y_true, predictions
+
+
+def _fatias(n: int, tamanhos):
+    inicio = 0
+    while inicio < n:
+        for tamanho in tamanhos:
+            yield inicio, min(inicio + tamanho, n)
+            inicio += tamanho
+            if inicio >= n:
+                return
+
+
+def _r2_sklearn(y_true: dict, predictions: dict) -> dict:
+    esperado = {}
+    for target in TARGETS:
+        y = y_true[target].to_numpy()
+        validas = ~np.isnan(y)
+        esperado[target] = r2_score(y[validas], predictions[target][validas])
+    return esperado
+
+
+@pytest.mark.parametrize('tamanhos', [[10_000], [1], [777, 4096, 13], [BLOCK_ROWS]])
+def test_r2_igual_ao_sklearn(tamanhos):
+    n = 2 * BLOCK_ROWS + 500
+    y_true, predictions = _dados_r2(n)
+    acumulador = R2Accumulator(TARGETS)
+    for inicio, fim in _fatias(n, tamanhos):
+        acumulador.update({t: y_true[t].iloc[inicio:fim] for t in TARGETS},
+                          {t: predictions[t][inicio:fim] for t in TARGETS}, fim - inicio)
+    scores = acumulador.scores()
+    for target, esperado in _r2_sklearn(y_true, predictions).items():
+        assert scores[target] == pytest.approx(esperado, rel=1e-12, abs=1e-12)
+
+
+def test_r2_em_blocos_e_shards_e_identico_ao_arquivo_inteiro():
+    n = 3 * BLOCK_ROWS + 123
+    y_true, predictions = _dados_r2(n, seed=1)
+    inteiro = R2Accumulator(TARGETS)
+    inteiro.update(y_true, predictions, n)
+
+    corte = BLOCK_ROWS + 1000 # Shard começando no meio de um bloco canônico
+    primeiro, segundo = R2Accumulator(TARGETS), R2Accumulator(TARGETS, start_row=corte)
+    primeiro.update({t: y_true[t].iloc[:corte] for t in TARGETS}, {t: predictions[t][:corte] for t in TARGETS}, corte)
+    for inicio, fim in _fatias(n - corte, [333]):
+        segundo.update({t: y_true[t].iloc[corte + inicio:corte + fim] for t in TARGETS},
+                       {t: predictions[t][corte + inicio:corte + fim] for t in TARGETS}, fim - inicio)
+    primeiro.merge(segundo)
+    assert primeiro.scores() == inteiro.scores()
+
+
+def test_r2_casos_limite():
+    acumulador = R2Accumulator(TARGETS)
+    constante = pd.Series([3.0, 3.0, 3.0])
+    acumulador.update({'Target1': constante, 'Target2': pd.Series([1.0, np.nan, np.nan])},
+                      {'Target1': np.array([3.0, 3.0, 3.0]), 'Target2': np.array([1.0, 2.0, 3.0]),
+                       'Target3': np.array([1.0, 2.0, 3.0])}, 3)
+    scores = acumulador.scores()
+    assert scores['Target1'] == r2_score(constante, [3.0, 3.0, 3.0]) == 1.0
+    assert scores['Target2'] is None # Uma única linha válida
+    assert scores['Target3'] is None # Sem coluna real
+
+
+def _dados_correlacao(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=n)
+    df = pd.DataFrame({
+        'f_correlacionada': base + rng.normal(0, 0.5, n),
+        'f_inteira': rng.integers(0, 5, n),
+        'f_com_nan': np.where(rng.random(n) < 0.2, np.nan, rng.normal(size=n)),
+        'f_constante': np.ones(n),
+        'Target1_pred': base,
+        'Target2_pred': np.where(rng.random(n) < 0.05, np.nan, rng.normal(size=n)),
+    })
+    return df
+
+
+FEATURES = ['f_correlacionada', 'f_inteira', 'f_com_nan', 'f_constante']
+PREDICOES = ['Target1_pred', 'Target2_pred']
+
+
+@pytest.mark.parametrize('tamanhos', [[10_000], [1000, 7], [BLOCK_ROWS]])
+def test_correlacao_igual_ao_dataframe_corr(tamanhos):
+    n = 2 * BLOCK_ROWS + 321
+    df = _dados_correlacao(n)
+    acumulador = CorrelationAccumulator(FEATURES, PREDICOES)
+    for inicio, fim in _fatias(n, tamanhos):
+        acumulador.update(df.iloc[inicio:fim])
+    esperado = df.corr().loc[FEATURES, PREDICOES]
+    obtido = pd.DataFrame(acumulador.correlations()).T.loc[FEATURES, PREDICOES]
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=False, rtol=1e-12, atol=1e-12, check_names=False)
+
+
+def test_correlacao_feature_ausente_em_um_lote():
+    df = _dados_correlacao(3000, seed=2)
+    acumulador = CorrelationAccumulator(FEATURES + ['f_nunca_vista'], PREDICOES)
+    acumulador.update(df.iloc[:1000].drop(columns=['f_com_nan']))
+    acumulador.update(df.iloc[1000:])
+    correlacoes = acumulador.correlations()
+    assert 'f_nunca_vista' not in correlacoes
+    # No lote sem a coluna, ela conta como NaN: igual ao corr com NaN nessas linhas
+    esperado_df = df.copy()
+    esperado_df.loc[:999, 'f_com_nan'] = np.nan
+    esperado = esperado_df.corr().loc['f_com_nan', PREDICOES]
+    assert correlacoes['f_com_nan'] == pytest.approx(esperado.to_dict(), rel=1e-12)
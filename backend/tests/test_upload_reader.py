@@ -0,0 +1,152 @@
+# backend/tests/test_upload_reader.py
+#
+# Leitura dos uploads (app/services/upload_reader.py) contra os leitores de
+# referência do pandas: o CSV lido pelo pyarrow (com a releitura pelo motor C
+# quando uma coluna de texto vem como número) igual ao lido pelo motor C, e o
+# XLSX lido em streaming igual ao `pd.read_excel`, inteiro ou em blocos.
+
+import io
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from app.core.config import settings
+from app.services import upload_reader
+from benchmarks.dados_sinteticos import gerar_upload, salvar_upload
+
+JOGADORES_XLSX = Path(__file__).resolve().parents[2] / 'Jogadores10linhas.xlsx'
+
+
+@pytest.fixture
+def motores_lidos(monkeypatch):
+    """ Motor de cada `pd.read_csv` feito pelo upload_reader ('pyarrow' ou 'c'). """
+    lidos = []
+    read_csv = pd.read_csv
+    def read_csv_espiado(*args, **kwargs):
+        lidos.append(kwargs.get('engine', 'c'))
+        return read_csv(*args, **kwargs)
+    monkeypatch.setattr(upload_reader.pd, 'read_csv', read_csv_espiado)
+    return lidos
+
+
+def ler_csv(dados: bytes, motor_arrow: bool, monkeypatch) -> pd.DataFrame:
+    if motor_arrow:
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(settings, 'CSV_ARROW_ENGINE', motor_arrow)
+    return upload_reader.read_dataframe(io.BytesIO(dados), 'csv')
+
+
+def test_texto_lido_pelo_pyarrow_sem_releitura(motores_lidos, monkeypatch):
+    dados = "Código de Acesso;Cor0202;Q0405\nA1;0A0B0C;3\nA2;FF0000;\n".encode('utf-8')
+    df = ler_csv(dados, True, monkeypatch)
+    assert motores_lidos == ['pyarrow']
+    assert df['Cor0202'].tolist() == ['0A0B0C', 'FF0000']
+
+
+@pytest.mark.parametrize('origem', ['bytes', 'caminho'])
+def test_cor_so_com_digitos_relida_pelo_motor_c(motores_lidos, monkeypatch, tmp_path, origem):
+    dados = "Código de Acesso;Cor0202;F0207;Q0405\nA1;012345;001122;3\nA2;000000;;4\nA3;;098765;\n".encode('utf-8')
+    pytest.importorskip('pyarrow')
+    fonte = io.BytesIO(dados)
+    if origem == 'caminho':
+        fonte = tmp_path / 'upload.csv'
+        fonte.write_bytes(dados)
+    monkeypatch.setattr(settings, 'CSV_ARROW_ENGINE', True)
+
+    df = upload_reader.read_dataframe(fonte, 'csv')
+
+    assert motores_lidos == ['pyarrow', 'c']
+    assert df['Cor0202'].iloc[:2].tolist() == ['012345', '000000'] and pd.isna(df['Cor0202'].iloc[2])
+    assert df['F0207'].iloc[[0, 2]].tolist() == ['001122', '098765']
+    pd.testing.assert_frame_equal(df, ler_csv(dados, False, monkeypatch))
+
+
+def test_coluna_de_texto_vazia_como_no_motor_c(motores_lidos, monkeypatch):
+    dados = "Código de Acesso;Cor0209Outro;Q0405\nA1;;3\nA2;;4\n".encode('utf-8')
+    df = ler_csv(dados, True, monkeypatch)
+    assert motores_lidos == ['pyarrow']
+    pd.testing.assert_frame_equal(df, ler_csv(dados, False, monkeypatch))
+
+
+def test_upload_sintetico_igual_nos_dois_motores(monkeypatch, tmp_path):
+    df = gerar_upload(80, seed=6)
+    df.loc[5:9, 'Cor0204'] = '012345' # Cores só com dígitos no meio das hexadecimais com letras
+    caminho = tmp_path / 'upload.csv'
+    salvar_upload(df, caminho)
+    dados = caminho.read_bytes()
+    pd.testing.assert_frame_equal(ler_csv(dados, True, monkeypatch), ler_csv(dados, False, monkeypatch))
+
+
+def planilha(linhas) -> bytes:
+    workbook = Workbook()
+    for linha in linhas:
+        workbook.active.append(linha)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+# Cabeçalho, números inteiros gravados como float, linha vazia no meio, linhas mais
+# curtas e mais longas que o cabeçalho e linhas vazias no fim da aba
+PLANILHA = [
+    ['Código de Acesso', 'Cor0202', 'Q0405', 'Target1', 'Data/Hora Último', 'Nome'],
+    ['A1', '012345', 3.0, '7,5', '01/02/2024 10:00:00', 'x'],
+    ['A2', '0A0B0C', 2.5, 8, 'inválida', None],
+    [],
+    ['A3', None, 4, None, None, 'z', 'extra'],
+    ['A4', '112233'],
+    [], [],
+]
+
+
+def referencia_excel(dados: bytes) -> pd.DataFrame:
+    """ `pd.read_excel` com as colunas de texto como texto e os tipos convertidos como no upload. """
+    df = pd.read_excel(io.BytesIO(dados), dtype={col: str for col in upload_reader.TEXT_COLUMNS})
+    return upload_reader.coerce_column_types(df)
+
+
+def test_xlsx_igual_ao_read_excel():
+    dados = planilha(PLANILHA)
+    df = upload_reader.read_dataframe(io.BytesIO(dados), 'xlsx')
+    pd.testing.assert_frame_equal(df, referencia_excel(dados))
+    assert list(df.columns)[-1] == 'Unnamed: 6'
+    assert df['Q0405'].tolist()[:2] == [3.0, 2.5] and df['Cor0202'].iloc[0] == '012345'
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 3])
+def test_xlsx_em_blocos_igual_ao_arquivo_inteiro(chunk_rows):
+    dados = planilha(PLANILHA)
+    blocos = list(upload_reader.iter_dataframe_chunks(io.BytesIO(dados), 'xlsx', chunk_rows))
+    assert all(len(bloco) <= chunk_rows for bloco in blocos)
+    pd.testing.assert_frame_equal(pd.concat(blocos), upload_reader.read_dataframe(io.BytesIO(dados), 'xlsx'))
+
+
+def test_inteiros_gravados_como_float_viram_int():
+    dados = planilha([['Q0405', 'Q0406'], [3.0, 1.5], [4.0, 2.0]])
+    df = upload_reader.read_dataframe(io.BytesIO(dados), 'xlsx')
+    pd.testing.assert_frame_equal(df, referencia_excel(dados))
+    assert df['Q0405'].dtype == 'int64'
+
+
+@pytest.mark.skipif(not JOGADORES_XLSX.exists(), reason="Planilha de exemplo ausente.")
+def test_planilha_de_exemplo_igual_ao_read_excel():
+    dados = JOGADORES_XLSX.read_bytes()
+    pd.testing.assert_frame_equal(upload_reader.read_dataframe(io.BytesIO(dados), 'xlsx'), referencia_excel(dados))
+
+
+def test_limite_de_linhas_do_xlsx():
+    dados = planilha(PLANILHA)
+    # 5 linhas (a vazia do meio conta; as do fim, não)
+    assert sum(len(b) for b in upload_reader.iter_xlsx_chunks(io.BytesIO(dados), 2, max_rows=5)) == 5
+    with pytest.raises(upload_reader.UploadTooLargeError):
+        list(upload_reader.iter_xlsx_chunks(io.BytesIO(dados), 2, max_rows=4))
+
+
+@pytest.mark.parametrize('rota', ['/predict/upload-csv', '/predict/upload-csv/stream', '/predict/export'])
+def test_xlsx_acima_do_limite_recusado_com_413(cliente, monkeypatch, rota):
+    monkeypatch.setattr(settings, 'XLSX_MAX_ROWS', 4)
+    resposta = cliente.post(rota, files={'file': ('upload.xlsx', planilha(PLANILHA))})
+    assert resposta.status_code == 413
+    assert 'XLSX_MAX_ROWS' in resposta.json()['detail']
@@ -0,0 +1,59 @@
+# backend/tools/gerar_estatisticas_referencia.py
+#
+# Gera o artefato de estatísticas de referência (estatisticas_referencia.pkl) de uma
+# versão de modelos, a partir de um conjunto de dados de referência (ex.: a base de treino).
+# Com settings.USE_REFERENCE_STATS = True, a API usa essas estatísticas em vez das
+# calculadas sobre cada upload.
+# Uso (a partir de backend/):
+#   python -m tools.gerar_estatisticas_referencia dados.csv [--versao base] [--linhas-por-bloco 50000]
+
+import argparse
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.ml.reference_stats import ARQUIVO_ESTATISTICAS, salvar_estatisticas
+from app.services import upload_reader
+from app.services.chunked_pipeline import ChunkedPipelineRun
+from app.services.model_registry import model_registry
+from app.services.prediction_service import PredictionService
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera as estatísticas de referência de uma versão de modelos.")
+    parser.add_argument('dados', type=Path, help="Arquivo .csv (separado por ';') ou .xlsx de referência.")
+    parser.add_argument('--versao', default='base', help="Versão de modelos (ver GET /models). Padrão: base.")
+    parser.add_argument('--linhas-por-bloco', type=int, default=50_000, help="Linhas lidas por vez (limita a memória).")
+    parser.add_argument('--saida', type=Path, default=None, help=f"Arquivo gerado. Padrão: <pasta da versão>/{ARQUIVO_ESTATISTICAS}.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    # O artefato ainda não existe (ou será substituído): carrega a versão sem ele
+    settings.USE_REFERENCE_STATS = False
+    pasta_versao = model_registry.path_for(args.versao)
+    service = PredictionService(pasta_versao, args.versao)
+    service.ensure_loaded()
+
+    extensao = args.dados.suffix.lower().lstrip('.')
+    chunks = upload_reader.iter_dataframe_chunks(args.dados, extensao, args.linhas_por_bloco)
+    run = ChunkedPipelineRun(service, chunks, complete_statistics=True)
+    try:
+        estatisticas = run.prepare().statistics
+    finally:
+        run.close()
+
+    # Inclui os clusters que o modelo pode gerar e que não apareceram na referência
+    n_clusters = getattr(service.cluster_model, 'n_clusters', None)
+    if n_clusters is not None:
+        estatisticas.clusters = sorted(set(estatisticas.clusters) | set(range(n_clusters)))
+        estatisticas.medias_cluster = estatisticas.medias_cluster.reindex(estatisticas.clusters)
+
+    saida = args.saida or pasta_versao / ARQUIVO_ESTATISTICAS
+    salvar_estatisticas(estatisticas, saida)
+    print(f"Linhas de referência: {run.total_rows} | Clusters: {estatisticas.clusters}")
+    print(f"   Medianas de preenchimento: {len(estatisticas.medianas_finais)} colunas")
+    print(f"   Colunas categóricas:       {len(estatisticas.categorias)}")
+    print(f"   Médias por cluster:        {estatisticas.medias_cluster.shape[1]} colunas")
+    print(f"✅ Estatísticas gravadas em {saida} ({time.perf_counter() - inicio:.1f}s).")
+
+if __name__ == '__main__':
+    main()
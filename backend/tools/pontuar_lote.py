@@ -0,0 +1,293 @@
+# backend/tools/pontuar_lote.py
+#
+# Pontuação offline em lote: roda a pipeline de predição sobre arquivos locais (CSV com
+# ';', XLSX, Parquet ou Arrow IPC), sem passar pelo upload HTTP, e grava para cada
+# arquivo as predições, o codigo_acesso e as features escolhidas em Parquet ou Arrow
+# IPC (mesmo formato de POST /predict/export), mais um resumo com R², heatmap e vazão.
+#
+# Os arquivos são pontuados em um pool de processos; cada worker carrega os artefatos
+# uma única vez. Com estatísticas de referência (--estatisticas-referencia), os
+# arquivos grandes são divididos em shards de --linhas-por-shard linhas, pontuados em
+# paralelo e juntados em ordem (mesmo resultado do arquivo inteiro). Sem elas, as
+# estatísticas dependem do arquivo inteiro e cada arquivo é uma tarefa.
+# Uso (a partir de backend/):
+#   python -m tools.pontuar_lote dados/ 'exportacoes/*.csv' --saida resultados/ [--workers 4]
+#       [--formato parquet] [--compressao zstd] [--estatisticas-referencia] [--linhas-por-shard 50000]
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.services import columnar_export, upload_reader
+from app.services.chunked_pipeline import ChunkedPipelineRun
+from app.services.streaming_metrics import CorrelationAccumulator, R2Accumulator
+
+LINHAS_POR_SHARD = 50_000
+ARQUIVO_RESUMO = 'resumo_lote.json'
+
+# --- Worker ---
+
+_versao_worker: Optional[str] = None
+_carga_worker: Optional[float] = None
+
+def _iniciar_worker(versao: str, estatisticas_referencia: bool) -> None:
+    """ Inicializador do pool: carrega os artefatos da versão uma vez por processo. """
+    global _versao_worker, _carga_worker
+    settings.USE_REFERENCE_STATS = estatisticas_referencia
+    from app.services.model_registry import model_registry
+    _versao_worker = versao
+    inicio = time.perf_counter()
+    try:
+        model_registry.get(versao)
+    except Exception:
+        return # Uma exceção aqui inutilizaria o pool: o erro de carga reaparece em cada tarefa
+    _carga_worker = time.perf_counter() - inicio
+
+@dataclass
+class Parte:
+    """ Resultado de uma tarefa: um arquivo inteiro ou um shard dele. """
+    arquivo: str
+    indice: int
+    linhas: int
+    segundos: float
+    pid: int
+    carga_segundos: Optional[float]
+    tabela: object # pyarrow.Table com as colunas exportadas
+    r2: R2Accumulator
+    heatmap: Optional[CorrelationAccumulator]
+
+def _pontuar(arquivo: str, indice: int, chunks, start_row: int, features: Optional[List[str]]) -> Parte:
+    from app.services.model_registry import model_registry
+    inicio = time.perf_counter()
+    service = model_registry.get(_versao_worker)
+    run = ChunkedPipelineRun(service, chunks, start_row=start_row)
+    tabelas = [columnar_export.build_table(output.df_pipeline, service.export_features(output.df_pipeline, features))
+               for output in run]
+    tabela = tabelas[0] if len(tabelas) == 1 else columnar_export.pa.concat_tables(tabelas, promote_options='permissive')
+    return Parte(arquivo=arquivo, indice=indice, linhas=tabela.num_rows, segundos=time.perf_counter() - inicio,
+                 pid=os.getpid(), carga_segundos=_carga_worker, tabela=tabela,
+                 r2=run.r2_accumulator, heatmap=run.heatmap_accumulator)
+
+def pontuar_arquivo(arquivo: str, linhas_por_bloco: Optional[int], features: Optional[List[str]]) -> Parte:
+    """ Tarefa de um arquivo inteiro, lido pelo próprio worker (em blocos, se pedido). """
+    caminho = Path(arquivo)
+    extensao = caminho.suffix.lower().lstrip('.')
+    if linhas_por_bloco:
+        chunks = upload_reader.iter_dataframe_chunks(caminho, extensao, linhas_por_bloco)
+    else:
+        chunks = [upload_reader.read_dataframe(caminho, extensao)]
+    return _pontuar(arquivo, 0, chunks, 0, features)
+
+def pontuar_shard(arquivo: str, indice: int, start_row: int, chunk, features: Optional[List[str]]) -> Parte:
+    """ Tarefa de um shard (linhas lidas pelo processo principal a partir de `start_row`). """
+    return _pontuar(arquivo, indice, [chunk], start_row, features)
+
+# --- Processo principal ---
+
+def listar_arquivos(entradas: List[str]) -> List[Path]:
+    """ Arquivos de formato suportado em cada entrada (arquivo, pasta ou padrão glob), sem repetição. """
+    extensoes = set(upload_reader.supported_extensions())
+    arquivos: Dict[Path, None] = {}
+    for entrada in entradas:
+        caminho = Path(entrada)
+        if caminho.is_dir():
+            candidatos = sorted(caminho.iterdir())
+        elif caminho.exists():
+            candidatos = [caminho]
+        else:
+            candidatos = sorted(Path(p) for p in glob.glob(entrada, recursive=True))
+        for candidato in candidatos:
+            if candidato.is_file() and candidato.suffix.lower().lstrip('.') in extensoes:
+                arquivos[candidato.resolve()] = None
+    return list(arquivos)
+
+@dataclass
+class _Arquivo:
+    caminho: Path
+    saida: Path
+    partes: List[Parte] = field(default_factory=list)
+    tarefas: int = 0
+    enviado: bool = False # Todas as tarefas já foram enviadas ao pool
+    falha: Optional[str] = None
+
+def _saidas(arquivos: List[Path], pasta: Path, formato: str) -> Dict[Path, Path]:
+    """ Arquivo de saída de cada entrada (nome + extensão do formato); recusa nomes repetidos. """
+    sufixo = columnar_export.EXPORT_FORMATS[formato][1]
+    saidas, vistos = {}, {}
+    for arquivo in arquivos:
+        nome = f"{arquivo.stem}.{sufixo}"
+        if nome in vistos:
+            raise SystemExit(f"❌ {arquivo} e {vistos[nome]} gerariam o mesmo arquivo de saída ({nome}).")
+        vistos[nome] = arquivo
+        saidas[arquivo] = pasta / nome
+    return saidas
+
+def _concluir(arquivo: _Arquivo, formato: str, compressao: str, finalizador) -> dict:
+    """ Junta as partes em ordem, grava o arquivo de saída e devolve o resumo do arquivo. """
+    partes = sorted(arquivo.partes, key=lambda p: p.indice)
+    r2, heatmap = partes[0].r2, partes[0].heatmap
+    for parte in partes[1:]:
+        r2.merge(parte.r2)
+        if heatmap is not None and parte.heatmap is not None:
+            heatmap.merge(parte.heatmap)
+        else:
+            heatmap = None # O heatmap de algum shard falhou
+    arquivo.saida.write_bytes(columnar_export.write_tables([p.tabela for p in partes], formato, compressao))
+    linhas = sum(p.linhas for p in partes)
+    print(f"   ✅ {arquivo.caminho.name}: {linhas} linhas em {len(partes)} parte(s) -> {arquivo.saida}")
+    return {
+        'arquivo': str(arquivo.caminho),
+        'saida': str(arquivo.saida),
+        'linhas': linhas,
+        'partes': len(partes),
+        'segundos_trabalho': round(sum(p.segundos for p in partes), 3),
+        'r2_scores': finalizador.finish_r2_scores(r2),
+        'correlation_heatmap_data': finalizador.finish_heatmap(heatmap) if heatmap is not None else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Pontua arquivos locais em lote e grava as predições em formato colunar.")
+    parser.add_argument('entradas', nargs='+', help="Arquivos, pastas ou padrões glob (CSV com ';', XLSX, Parquet, Arrow IPC).")
+    parser.add_argument('--saida', type=Path, required=True, help="Pasta dos arquivos gerados e do resumo.")
+    parser.add_argument('--versao', default='base', help="Versão de modelos (ver GET /models). Padrão: base.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processos de pontuação. Padrão: número de CPUs.")
+    parser.add_argument('--formato', choices=list(columnar_export.EXPORT_FORMATS), default='parquet')
+    parser.add_argument('--compressao', default='zstd', help="Compressão do arquivo gerado (ver POST /predict/export). Padrão: zstd.")
+    parser.add_argument('--features', nargs='*', default=None, help="Features exportadas. Padrão: as dos modelos de target.")
+    parser.add_argument('--estatisticas-referencia', action='store_true',
+                        help="Usa as estatísticas de referência da versão (permite dividir arquivos em shards).")
+    parser.add_argument('--linhas-por-shard', type=int, default=LINHAS_POR_SHARD,
+                        help="Com estatísticas de referência: linhas por shard. Padrão: %(default)s.")
+    parser.add_argument('--linhas-por-bloco', type=int, default=settings.PIPELINE_CHUNK_ROWS,
+                        help="Sem estatísticas de referência: lê e processa cada arquivo em blocos (limita a memória).")
+    args = parser.parse_args()
+
+    try:
+        columnar_export.check_export_options(args.formato, args.compressao)
+    except (columnar_export.ExportUnavailableError, ValueError) as e:
+        raise SystemExit(f"❌ {e}")
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        raise SystemExit("❌ Nenhum arquivo CSV, XLSX, Parquet ou Arrow IPC encontrado nas entradas.")
+    args.saida.mkdir(parents=True, exist_ok=True)
+    saidas = _saidas(arquivos, args.saida, args.formato)
+
+    # O processo principal só lê os shards e junta os resultados: não carrega os modelos
+    from app.services.model_registry import model_registry
+    from app.services.prediction_service import PredictionService
+    finalizador = PredictionService(model_registry.path_for(args.versao), args.versao)
+
+    print(f"🚀 {len(arquivos)} arquivo(s), {args.workers} worker(s), saída em {args.saida} ({args.formato}/{args.compressao}).")
+    inicio = time.perf_counter()
+    estado = {arquivo: _Arquivo(arquivo, saidas[arquivo]) for arquivo in arquivos}
+    pendentes: Dict[Future, _Arquivo] = {}
+    resumos: List[dict] = []
+    falhas: List[dict] = []
+    partes: List[Parte] = []
+    # Tarefas em andamento limitadas: os shards lidos esperam na memória do processo principal
+    limite = 2 * args.workers
+
+    def falhar(arquivo: _Arquivo, erro: str) -> None:
+        if arquivo.falha is None: # Só o primeiro erro; as demais partes do arquivo são descartadas
+            print(f"   ❌ {arquivo.caminho.name}: {erro}")
+            falhas.append({'arquivo': str(arquivo.caminho), 'erro': erro})
+            arquivo.falha = erro
+
+    def concluir_se_pronto(arquivo: _Arquivo) -> None:
+        if arquivo.falha is not None or not arquivo.enviado or len(arquivo.partes) < arquivo.tarefas:
+            return
+        try:
+            resumos.append(_concluir(arquivo, args.formato, args.compressao, finalizador))
+        except Exception as e:
+            falhar(arquivo, str(e))
+        for parte in arquivo.partes:
+            parte.tabela = None # Libera a tabela: o arquivo já foi gravado
+
+    def coletar() -> None:
+        prontos, _ = wait(list(pendentes), return_when=FIRST_COMPLETED)
+        for futuro in prontos:
+            arquivo = pendentes.pop(futuro)
+            try:
+                parte = futuro.result()
+            except Exception as e:
+                falhar(arquivo, str(e))
+                continue
+            partes.append(parte)
+            if arquivo.falha is None:
+                arquivo.partes.append(parte)
+                concluir_se_pronto(arquivo)
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_iniciar_worker,
+                             initargs=(args.versao, args.estatisticas_referencia)) as pool:
+        for caminho, arquivo in estado.items():
+            if args.estatisticas_referencia:
+                extensao = caminho.suffix.lower().lstrip('.')
+                start_row = 0
+                try:
+                    for indice, chunk in enumerate(upload_reader.iter_dataframe_chunks(caminho, extensao, args.linhas_por_shard)):
+                        if arquivo.falha is not None:
+                            break
+                        while len(pendentes) >= limite:
+                            coletar()
+                        pendentes[pool.submit(pontuar_shard, str(caminho), indice, start_row, chunk, args.features)] = arquivo
+                        arquivo.tarefas += 1
+                        start_row += len(chunk)
+                except Exception as e:
+                    falhar(arquivo, str(e))
+                if not arquivo.tarefas:
+                    falhar(arquivo, "O arquivo está vazio ou não pôde ser lido.")
+            else:
+                while len(pendentes) >= limite:
+                    coletar()
+                pendentes[pool.submit(pontuar_arquivo, str(caminho), args.linhas_por_bloco, args.features)] = arquivo
+                arquivo.tarefas = 1
+            arquivo.enviado = True
+            concluir_se_pronto(arquivo)
+        while pendentes:
+            coletar()
+
+    total = time.perf_counter() - inicio
+    resumo = _vazao(partes, total)
+    resumo.update({'arquivos': resumos, 'falhas': falhas, 'versao': args.versao,
+                   'estatisticas_referencia': args.estatisticas_referencia})
+    (args.saida / ARQUIVO_RESUMO).write_text(json.dumps(resumo, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    print(f"\n📊 Vazão ({resumo['linhas']} linhas em {total:.1f}s):")
+    for worker in resumo['workers']:
+        print(f"   worker {worker['pid']:>7}: {worker['linhas']:>9} linhas, {worker['tarefas']:>4} tarefas, "
+              f"{worker['segundos']:8.1f}s -> {worker['linhas_por_segundo']:>9.0f} linhas/s (carga {worker['carga_segundos']:.1f}s)")
+    print(f"   {'total':>14}: {resumo['linhas_por_segundo']:.0f} linhas/s")
+    if falhas:
+        print(f"⚠️ Resumo gravado em {args.saida / ARQUIVO_RESUMO} ({len(falhas)} arquivo(s) com falha).")
+        raise SystemExit(1)
+    print(f"✅ Resumo gravado em {args.saida / ARQUIVO_RESUMO}.")
+
+def _vazao(partes: List[Parte], total: float) -> dict:
+    """ Linhas por segundo de cada worker (tempo em tarefas) e do lote inteiro (tempo de parede). """
+    workers: Dict[int, dict] = {}
+    for parte in partes:
+        worker = workers.setdefault(parte.pid, {'pid': parte.pid, 'linhas': 0, 'tarefas': 0, 'segundos': 0.0,
+                                                'carga_segundos': parte.carga_segundos})
+        worker['linhas'] += parte.linhas
+        worker['tarefas'] += 1
+        worker['segundos'] += parte.segundos
+    for worker in workers.values():
+        worker['linhas_por_segundo'] = round(worker['linhas'] / worker['segundos'], 1) if worker['segundos'] else None
+        worker['segundos'] = round(worker['segundos'], 3)
+    linhas = sum(p.linhas for p in partes)
+    return {
+        'linhas': linhas,
+        'segundos': round(total, 3),
+        'linhas_por_segundo': round(linhas / total, 1) if total else None,
+        'workers': sorted(workers.values(), key=lambda w: w['pid']),
+    }
+
+if __name__ == '__main__':
+    main()
@@ -52,7 +52,8 @@ export const uploadAndPredict = async (file: File): Promise<ApiResponse> => {
 	const formData = new FormData();
 	formData.append("file", file);
 
-	const predictUrl = `${API_BASE_URL}/predict/upload-csv`;
+	// `fields=dashboard`: original_data só com as colunas que o dashboard lê
+	const predictUrl = `${API_BASE_URL}/predict/upload-csv?fields=dashboard`;
 	console.log(`Enviando arquivo para: ${predictUrl}`);
 
 	try {